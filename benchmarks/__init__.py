@@ -0,0 +1 @@
+# Benchmark suite (local stand-in services)
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Benchmark TresPax modules against local stand-in DNS, HTTP and TCP services
+
+    python -m benchmarks.run                          # run everything, print JSON
+    python -m benchmarks.run -o results.json          # save results
+    python -m benchmarks.run --compare baseline.json  # exit 1 on regressions
+
+Every service runs in-process on a loopback address, so results depend only
+on the machine and the code under test. Rate limits are disabled unless
+--rate-limits is given, so the numbers show what the engine itself can do.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.standins import StandInDNSServer, StandInHTTPServer, StandInTCPListeners, route_zone
+from trespax.core.config import Config
+from trespax.core.context import TargetContext
+from trespax.core.dnscache import dns_cache
+from trespax.core.engine import Engine
+from trespax.core.registry import registry
+from trespax.utils.logger import Logger
+from trespax.utils.wordlist_manager import WordlistManager
+
+
+ZONE = 'bench.test'
+HOST = '127.0.0.2'  # Whole 127/8 is loopback on Linux; keeps clear of services on 127.0.0.1
+HIT_EVERY = 10      # One wordlist entry in ten exists in the zone / on the web server
+MIN_SLOWDOWN = 0.02  # Seconds; below this a slowdown is timer and scheduler noise, whatever the percentage
+
+SERVICE_BANNERS = {
+    21: b'220 StandIn FTP ready\r\n',
+    22: b'SSH-2.0-OpenSSH_9.6 StandIn\r\n',
+    25: b'220 bench.test ESMTP StandIn\r\n',
+    110: b'+OK StandIn POP3 ready\r\n',
+    143: b'* OK StandIn IMAP4rev1 ready\r\n',
+    3306: b'\x4a\x00\x00\x00\x0a8.0.36-StandIn\x00',
+    8080: b'HTTP/1.1 200 OK\r\nServer: StandIn\r\n\r\n'
+}
+
+FULL_SCAN_MODULES = ['dns', 'subdomains', 'ports', 'directories', 'headers', 'emails', 'banner', 'robots']
+
+
+def read_wordlist(kind, limit):
+    """First `limit` entries of the wordlist the module itself will use"""
+    with open(WordlistManager().get_wordlist(kind), 'r', encoding='utf-8', errors='ignore') as f:
+        words = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return words[:limit]
+
+
+def bench_config(args, target):
+    """Quiet config for one benchmark run
+
+    The shared DNS cache is emptied, so every run resolves from cold.
+    """
+    dns_cache().flush()
+    config = Config()
+    config.target = target
+    config.quiet = True
+    config.timeout = 5
+    if not args.rate_limits:
+        config.rate_limits = {kind: 0 for kind in config.rate_limits}
+        config.dns_qps = 0
+    return config
+
+
+def run_module(name, config, context=None):
+    """Run one module the way the scanner does; returns (result, context)"""
+    context = context or TargetContext(config)
+    engine = Engine(config)
+    context.engine = engine
+    engine.limiter = context.limiter
+    engine.metrics = context.metrics
+    module = registry.create(name, config, Logger(False))
+    result = engine.run(engine.as_async(module).run(context))
+    return result, context
+
+
+def operations(metrics):
+    """Total network operations recorded in a Metrics object"""
+    return sum(kind["requests"] for module in metrics.to_dict()["requests"].values() for kind in module.values())
+
+
+def measure(repeat, func, warmup=1):
+    """Run `func` `repeat` times after `warmup` untimed runs; func returns (operations, found)
+
+    The warm-up run pays for lazy imports and cold caches so they do not
+    skew the first measurement.
+    """
+    for _ in range(warmup):
+        with redirect_stdout(io.StringIO()):
+            func()
+
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            ops, found = func()
+        runs.append({"seconds": time.perf_counter() - start, "operations": ops, "found": found})
+
+    seconds = statistics.median(run["seconds"] for run in runs)
+    ops = runs[-1]["operations"]
+    return {
+        "seconds": round(seconds, 4),
+        "operations": ops,
+        "ops_per_second": round(ops / seconds, 1) if seconds else None,
+        "found": runs[-1]["found"],
+        "runs": [round(run["seconds"], 4) for run in runs]
+    }
+
+
+def run_benchmarks(args):
+    """Start the stand-ins and run every benchmark"""
+    subdomains = read_wordlist('subdomains', 1000)
+    paths = read_wordlist('directories', 500)
+    zone_hits = subdomains[::HIT_EVERY]
+    path_hits = paths[::HIT_EVERY]
+
+    dns_server = StandInDNSServer(ZONE, zone_hits, HOST, latency=args.dns_latency).start()
+    listeners = StandInTCPListeners(SERVICE_BANNERS, host=HOST).start()
+    try:
+        http = StandInHTTPServer(path_hits, host=HOST, port=80, latency=args.http_latency).start()
+    except OSError:
+        http = StandInHTTPServer(path_hits, host=HOST, latency=args.http_latency).start()
+
+    results = {}
+    skipped = {}
+    selected = set(args.only.split(',')) if args.only else None
+
+    def wanted(name):
+        return selected is None or name in selected
+
+    try:
+        with route_zone(dns_server):
+            if wanted('subdomains'):
+                def subdomain_run():
+                    result, context = run_module('subdomains', bench_config(args, ZONE))
+                    return operations(context.metrics), len(result.get("subdomains", []))
+                results['subdomains'] = measure(args.repeat, subdomain_run)
+                results['subdomains']["expected"] = len(zone_hits)
+
+            for name, soft_404 in (('directories', False), ('directories_soft404', True)):
+                if not wanted(name):
+                    continue
+                def directory_run():
+                    http.soft_404 = soft_404
+                    result, context = run_module('directories', bench_config(args, http.url))
+                    return operations(context.metrics), len(result.get("directories", []))
+                results[name] = measure(args.repeat, directory_run)
+                if not soft_404:
+                    # Soft-404 pages are not filtered, so that variant is compared with the baseline only
+                    results[name]["expected"] = len(path_hits)
+            http.soft_404 = False
+
+            if wanted('ports'):
+                standin_ports = set(listeners.ports) | ({80} if http.port == 80 else set())
+
+                def port_run():
+                    result, context = run_module('ports', bench_config(args, HOST))
+                    # Anything else listening on all interfaces shows up too; count only the stand-ins
+                    open_ports = {int(port.split('/')[0]) for port in result.get("open_ports", [])}
+                    return operations(context.metrics), len(open_ports & standin_ports)
+                results['ports'] = measure(args.repeat, port_run)
+                results['ports']["expected"] = len(standin_ports)
+
+            if wanted('banner'):
+                if listeners.unavailable:
+                    skipped['banner'] = f"cannot listen on ports {listeners.unavailable} (needs root)"
+                else:
+                    def banner_run():
+                        config = bench_config(args, HOST)
+                        context = TargetContext(config)
+                        context.open_ports = list(listeners.ports)  # As if PORTS had run
+                        result, context = run_module('banner', config, context)
+                        return operations(context.metrics), len(result.get("services", {}))
+                    results['banner'] = measure(args.repeat, banner_run)
+                    results['banner']["expected"] = len(listeners.ports)
+
+            if wanted('full_scan'):
+                if http.port != 80:
+                    skipped['full_scan'] = "cannot listen on port 80 (needs root)"
+                else:
+                    def full_run():
+                        from trespax.core.scanner import Scanner
+                        config = bench_config(args, ZONE)
+                        for tool in config.selected_tools:
+                            config.selected_tools[tool] = tool in FULL_SCAN_MODULES
+                        scanner = Scanner(config, Logger(False))
+                        scanner.run()
+                        return operations(scanner.context.metrics), len(scanner.results)
+                    results['full_scan'] = measure(args.repeat, full_run)
+                    results['full_scan']["expected"] = len(FULL_SCAN_MODULES)
+    finally:
+        http.stop()
+        listeners.stop()
+        dns_server.stop()
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": git_commit(),
+            "repeat": args.repeat,
+            "dns_latency": args.dns_latency,
+            "http_latency": args.http_latency,
+            "rate_limits": args.rate_limits
+        },
+        "benchmarks": results,
+        "skipped": skipped
+    }
+
+
+def git_commit():
+    """Commit the benchmark ran against (None outside a git checkout)"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table and return the names that regressed
+
+    A benchmark regresses when it is slower than the baseline by more than
+    `tolerance` (and MIN_SLOWDOWN seconds), or when it finds something other than the expected count
+    (or, without one, than the baseline found).
+    """
+    regressions = []
+    print(f"{'benchmark':<22}{'baseline':>10}{'current':>10}{'change':>9}", file=sys.stderr)
+    for name, current in results["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name) or {}
+        expected = current.get("expected", before.get("found"))
+        found = current.get("found")
+        change = None
+        if before.get("seconds"):
+            change = (current["seconds"] - before["seconds"]) / before["seconds"]
+
+        flag = ""
+        if expected is not None and found != expected:
+            flag = f"  REGRESSION (found {found}, expected {expected})"
+        elif change is not None and change > tolerance and current["seconds"] - before["seconds"] > MIN_SLOWDOWN:
+            flag = "  REGRESSION"
+        elif before and found != before.get("found"):
+            flag = f"  found {before.get('found')} -> {found}"
+        if flag.startswith("  REGRESSION"):
+            regressions.append(name)
+
+        if not before:
+            print(f"{name:<22}{'-':>10}{current['seconds']:>9.3f}s{'new':>9}{flag}", file=sys.stderr)
+        else:
+            print(f"{name:<22}{before['seconds']:>9.3f}s{current['seconds']:>9.3f}s{change or 0.0:>+9.1%}{flag}",
+                  file=sys.stderr)
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='TresPax benchmark suite (local stand-in services)')
+    parser.add_argument('-o', '--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare against a stored results file')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed slowdown before --compare reports a regression (default: 0.15 = 15%%)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per benchmark, the median is reported')
+    parser.add_argument('--only', help='Comma-separated benchmarks (subdomains,directories,directories_soft404,ports,banner,full_scan)')
+    parser.add_argument('--dns-latency', type=float, default=0.002, help='Stand-in DNS reply delay in seconds')
+    parser.add_argument('--http-latency', type=float, default=0.005, help='Stand-in HTTP reply delay in seconds')
+    parser.add_argument('--rate-limits', action='store_true', help='Keep the default rate limits enabled')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    results = run_benchmarks(args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    for name, reason in results["skipped"].items():
+        print(f"[!] Skipped {name}: {reason}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"[!] Regressions: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
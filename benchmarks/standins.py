@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+import selectors
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.resolver
+import dns.rrset
+
+
+class StandInDNSServer:
+    """UDP DNS server answering A queries for a synthetic zone
+
+    Names in `names` (relative to `zone`) and the zone apex resolve to
+    `address`; everything else under the zone is NXDOMAIN. Replies can be
+    delayed by `latency` seconds without holding up other queries.
+    """
+
+    def __init__(self, zone, names, address, host='127.0.0.1', latency=0.0):
+        self.zone = zone.rstrip('.').lower()
+        self.names = {f"{name}.{self.zone}".lower() for name in names}
+        self.names.add(self.zone)
+        self.address = address
+        self.latency = latency
+        self.queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))
+        self.host, self.port = self.sock.getsockname()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self.sock.close()
+
+    def _serve(self):
+        while self._running:
+            try:
+                data, peer = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            self.queries += 1
+            try:
+                reply = self._answer(dns.message.from_wire(data)).to_wire()
+            except Exception:
+                continue
+            if self.latency:
+                threading.Timer(self.latency, self._send, (reply, peer)).start()
+            else:
+                self._send(reply, peer)
+
+    def _send(self, reply, peer):
+        try:
+            self.sock.sendto(reply, peer)
+        except OSError:
+            pass
+
+    def _answer(self, query):
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        name = question.name.to_text().rstrip('.').lower()
+
+        if name in self.names:
+            if question.rdtype == dns.rdatatype.A:
+                response.answer.append(dns.rrset.from_text(question.name, 60, 'IN', 'A', self.address))
+        elif name.endswith('.' + self.zone):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        else:
+            response.set_rcode(dns.rcode.REFUSED)
+        return response
+
+    def resolver(self):
+        """dnspython resolver pointed at this server"""
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = [self.host]
+        resolver.port = self.port
+        resolver.lifetime = 2
+        return resolver
+
+
+@contextmanager
+def route_zone(server):
+    """Send lookups for the stand-in zone to `server` instead of the system resolver
+
+    TresPax resolves through `socket` (subdomains, target resolution,
+    requests) and dnspython's default resolver (DNS module); both are pointed
+    at the stand-in while the block runs. Names outside the zone are
+    resolved as usual.
+    """
+    resolver = server.resolver()
+    real_getaddrinfo = socket.getaddrinfo
+    real_gethostbyname = socket.gethostbyname
+    real_default = dns.resolver.default_resolver
+
+    def in_zone(host):
+        host = (host.decode() if isinstance(host, bytes) else str(host or '')).rstrip('.').lower()
+        return host == server.zone or host.endswith('.' + server.zone)
+
+    def lookup(host):
+        try:
+            return resolver.resolve(host, 'A')[0].to_text()
+        except dns.resolver.NXDOMAIN:
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        except Exception:
+            raise socket.gaierror(socket.EAI_AGAIN, 'Temporary failure in name resolution')
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if in_zone(host):
+            return real_getaddrinfo(lookup(host), port, *args, **kwargs)
+        return real_getaddrinfo(host, port, *args, **kwargs)
+
+    def gethostbyname(host):
+        return lookup(host) if in_zone(host) else real_gethostbyname(host)
+
+    socket.getaddrinfo = getaddrinfo
+    socket.gethostbyname = gethostbyname
+    dns.resolver.default_resolver = resolver
+    try:
+        yield
+    finally:
+        socket.getaddrinfo = real_getaddrinfo
+        socket.gethostbyname = real_gethostbyname
+        dns.resolver.default_resolver = real_default
+
+
+class _BacklogHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a listen backlog deep enough for a scan burst
+
+    The default of 5 drops SYNs under load, adding a 1s retransmit to
+    random requests and making results noisy.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StandInHTTPServer:
+    """Threaded HTTP server with configurable hits, latency and soft-404s
+
+    Paths in `paths` answer 200; with `soft_404` every other path also
+    answers 200 (with a "not found" page), otherwise 404.
+    """
+
+    def __init__(self, paths, host='127.0.0.1', port=0, latency=0.0, soft_404=False):
+        self.paths = {'/' + path.lstrip('/') for path in paths}
+        self.latency = latency
+        self.soft_404 = soft_404
+        self.requests = 0
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            server_version = 'StandIn/1.0'
+
+            def do_GET(self):
+                standin.requests += 1
+                if standin.latency:
+                    time.sleep(standin.latency)
+                path = self.path.split('?', 1)[0]
+                if path == '/' or path in standin.paths:
+                    self._reply(200, b'<html><body>ok contact: admin@bench.test</body></html>')
+                elif standin.soft_404:
+                    self._reply(200, b'<html><body>Page not found</body></html>')
+                else:
+                    self._reply(404, b'not found')
+
+            do_HEAD = do_GET
+
+            def _reply(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _BacklogHTTPServer((host, port), Handler)
+        self.host, self.port = self.httpd.server_address[:2]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StandInTCPListeners:
+    """TCP listeners that send a banner to every client and hang up
+
+    `banners` maps port to banner bytes. Ports that cannot be bound (in use,
+    or privileged without root) are skipped and listed in `unavailable`.
+    """
+
+    def __init__(self, banners, host='127.0.0.1'):
+        self.host = host
+        self.selector = selectors.DefaultSelector()
+        self.ports = []
+        self.unavailable = []
+        for port, banner in banners.items():
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.bind((host, port))
+            except OSError:
+                sock.close()
+                self.unavailable.append(port)
+                continue
+            sock.listen(512)
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ, banner)
+            self.ports.append(sock.getsockname()[1])
+        self._running = False
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._thread.join(timeout=1)
+        for key in list(self.selector.get_map().values()):
+            key.fileobj.close()
+        self.selector.close()
+
+    def _serve(self):
+        while self._running:
+            for key, _ in self.selector.select(timeout=0.1):
+                try:
+                    client, _ = key.fileobj.accept()
+                except OSError:
+                    continue
+                try:
+                    client.sendall(key.data)
+                except OSError:
+                    pass
+                client.close()
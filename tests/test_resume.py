@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+from trespax.core.config import Config
+from trespax.main import (NOT_RESUMED, apply_module_selection, apply_port_options, apply_scan_options,
+                          load_run_arguments, parse_arguments, save_run_arguments)
+
+# A value other than the default for every argument --resume restores
+SCAN_ARGUMENTS = [
+    '-t', 'example.com', '-f', 'targets.txt', '--batch', '-c', '8', '-p', '2', '--tor',
+    '--ports', '22,80,U:53', '--top-ports', '50', '--port-confidence', '0.9',
+    '--port-timeout', '2.5', '--port-retries', '3', '--udp', '--syn',
+    '--rate', 'http=5/10', '--rate', 'dns=500', '--max-concurrency', '50', '--no-adaptive',
+    '--resolvers', '1.1.1.1,9.9.9.9', '--authoritative', '--no-zone-walk', '--dns-qps', '200',
+    '--wildcard', 'filter', '--recursion-depth', '2', '--no-permutations', '--stream', 'events.ndjson',
+]
+
+EFFECTIVE = ('rate_limits', 'rate_bursts', 'adaptive_concurrency', 'max_concurrency', 'resolvers', 'dns_mode',
+             'zone_walk', 'dns_qps', 'wildcard_policy', 'subdomain_permutations', 'recursion_depth',
+             'event_stream', 'ports', 'top_ports', 'port_confidence', 'port_timeout', 'port_retries',
+             'udp_scan', 'scan_type', 'selected_tools')
+
+
+def configure(args, config):
+    apply_scan_options(config, args)
+    if args.modules:
+        apply_module_selection(config, args.modules)
+    apply_port_options(config, args)
+    config.use_tor = args.tor
+    return config
+
+
+def test_every_scan_argument_is_covered():
+    defaults = vars(parse_arguments([]))
+    given = vars(parse_arguments(SCAN_ARGUMENTS))
+    untested = [key for key in defaults if key not in NOT_RESUMED and given[key] == defaults[key]]
+    assert not untested, f"add non-default values for {untested} to SCAN_ARGUMENTS"
+
+
+def test_resume_restores_every_option(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    args = parse_arguments(SCAN_ARGUMENTS + ['-m', 'dns,subdomains'])
+    config = configure(args, Config())
+    config.output_dir = str(tmp_path)
+    save_run_arguments(args, config)
+
+    resumed = parse_arguments(['--resume', str(tmp_path)])
+    resumed_config = Config()
+    load_run_arguments(resumed, resumed_config)
+    configure(resumed, resumed_config)
+
+    saved, restored = vars(args), vars(resumed)
+    for key in saved:
+        if key in ('target_file', 'stream'):
+            continue  # Saved as absolute paths
+        if key not in NOT_RESUMED:
+            assert restored[key] == saved[key], key
+    assert resumed.target_file == [str(tmp_path / 'targets.txt')]
+    assert resumed.stream == str(tmp_path / 'events.ndjson')
+    assert resumed.output == str(tmp_path)
+
+    for attribute in EFFECTIVE:
+        if attribute != 'event_stream':
+            assert getattr(resumed_config, attribute) == getattr(config, attribute), attribute
+    assert resumed_config.resume
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+import asyncio
+import threading
+
+
+class AdaptiveConcurrency:
+    """AIMD controller for how many requests a module keeps in flight
+
+    While latency stays close to the best seen and requests succeed, the limit
+    grows additively (one slot per round of completions, faster during the
+    initial slow start). Timeouts, connection resets, 429s and 503s cut it
+    multiplicatively, at most once per round so a burst of failures from the
+    same window only counts once.
+    """
+
+    DECREASE_FACTOR = 0.5
+    LATENCY_TOLERANCE = 2.0
+
+    def __init__(self, initial, minimum=1, maximum=None, adaptive=True):
+        maximum = maximum or initial
+        self.minimum = max(1, min(minimum, initial))
+        self.maximum = max(initial, maximum) if adaptive else initial
+        if not adaptive:
+            self.minimum = initial
+        self.limit = float(initial)
+        self.peak_limit = initial
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.backoffs = 0
+        self.base_latency = None
+        self._slow_start = adaptive
+        self._completed_since_backoff = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        """Current in-flight limit"""
+        return int(self.limit)
+
+    def record(self, latency=None, error=False):
+        """Feed the outcome of one finished request into the controller"""
+        with self._lock:
+            self._completed_since_backoff += 1
+
+            if error:
+                # One decrease per round: ignore failures of requests that were
+                # already in flight when the previous decrease happened
+                if self._completed_since_backoff >= self.limit * self.DECREASE_FACTOR:
+                    self.limit = max(self.minimum, self.limit * self.DECREASE_FACTOR)
+                    self._slow_start = False
+                    self._completed_since_backoff = 0
+                    self.backoffs += 1
+                return
+
+            if latency is not None:
+                if self.base_latency is None or latency < self.base_latency:
+                    self.base_latency = latency
+                if latency > self.base_latency * self.LATENCY_TOLERANCE + 0.05:
+                    self._slow_start = False
+                    return  # Queueing somewhere: hold steady
+
+            if self.inflight * 2 < self.limit:
+                return  # Not using the current limit, no evidence it can go higher
+
+            if self._slow_start:
+                self.limit = min(self.maximum, self.limit + 1)
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self.peak_limit = max(self.peak_limit, int(self.limit))
+
+    def _enter(self):
+        self.inflight += 1
+        self.peak_inflight = max(self.peak_inflight, self.inflight)
+
+    def stats(self):
+        """Current and peak concurrency for reports"""
+        return {
+            "current": self.current,
+            "peak": self.peak_limit,
+            "peak_in_flight": self.peak_inflight,
+            "backoffs": self.backoffs
+        }
+
+
+class ThreadedAdaptiveConcurrency(AdaptiveConcurrency):
+    """Adaptive limit for modules that run requests on a thread pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition(self._lock)
+
+    def acquire(self):
+        """Block until a slot is free under the current limit"""
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self._enter()
+
+    def release(self, latency=None, error=False):
+        """Free a slot and record the request's outcome"""
+        self.record(latency, error)
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+
+class AsyncAdaptiveConcurrency(AdaptiveConcurrency):
+    """Adaptive limit for coroutines on the engine's event loop"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = None
+
+    async def acquire(self):
+        """Wait until a slot is free under the current limit"""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            while self.inflight >= int(self.limit):
+                await self._cond.wait()
+            self._enter()
+
+    async def release(self, latency=None, error=False):
+        """Free a slot and record the request's outcome"""
+        self.record(latency, error)
+        async with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+
+def adaptive_settings(config, initial, maximum=None):
+    """Keyword arguments for a controller starting at `initial` requests in flight"""
+    return {
+        "initial": initial,
+        "minimum": config.min_concurrency,
+        "maximum": maximum or config.max_concurrency,
+        "adaptive": config.adaptive_concurrency
+    }
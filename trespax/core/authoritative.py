@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import asyncio
+import dns.rdatatype
+import dns.resolver
+
+
+async def find_authoritative(name, query, soa=None, ns=None):
+    """(zone, {nameserver host: [addresses]}) of the zone `name` belongs to
+
+    `query(rdtype, name)` is a coroutine returning (records as strings,
+    reply), the reply None when no nameserver answered (see resolve_reply).
+    `soa` and `ns` are replies for `name` the caller already has; the ones
+    missing are asked together. The SOA reply names the zone whether
+    `name` is its apex or not (see zone_from_response). The NS set is the
+    NS answer for `name` at the apex, one more query below it. Nameserver
+    addresses come from that reply's glue, otherwise every host's A and
+    AAAA are asked at once. Returns (None, {}) when no zone is found.
+    """
+    if soa is None or ns is None:
+        missing = [rdtype for rdtype, reply in (('SOA', soa), ('NS', ns)) if reply is None]
+        replies = dict(zip(missing, await asyncio.gather(*(query(rdtype, name) for rdtype in missing))))
+        soa = soa if soa is not None else replies['SOA'][1]
+        ns = ns if ns is not None else replies['NS'][1]
+
+    zone = zone_from_response(soa) if soa is not None else None
+    if not zone:
+        return None, {}
+    if zone != name.rstrip('.').lower():
+        _, ns = await query('NS', zone)
+    if ns is None or not ns.answer:
+        return zone, {}
+
+    hosts = sorted({rdata.target.to_text().rstrip('.').lower()
+                    for rrset in ns.answer if rrset.rdtype == dns.rdatatype.NS for rdata in rrset})
+    nameservers = {host: [] for host in hosts}
+    nameservers.update(glue(ns, hosts))
+    missing = [(host, rdtype) for host in hosts if not nameservers[host] for rdtype in ('A', 'AAAA')]
+    answers = await asyncio.gather(*(query(rdtype, host) for host, rdtype in missing))
+    for (host, _), (records, _) in zip(missing, answers):
+        nameservers[host] += records
+    return zone, nameservers
+
+
+async def resolve_reply(resolver, rdtype, name):
+    """(records as strings, reply) of one query through a dnspython async resolver
+
+    Records are [] when there are none; the reply is kept for NODATA and
+    NXDOMAIN too (its authority section names the zone). Other failures
+    raise dns.exception.DNSException.
+    """
+    try:
+        answers = await resolver.resolve(name, rdtype)
+        return [str(answer) for answer in answers], answers.response
+    except dns.resolver.NXDOMAIN as e:
+        return [], next(iter(e.kwargs.get('responses', {}).values()), None)
+    except dns.resolver.NoAnswer as e:
+        return [], e.response()
+
+
+def zone_from_response(response):
+    """Apex named by the SOA in a reply (None if it carries none)
+
+    A name's own SOA answer names its zone; for any other name, NODATA and
+    NXDOMAIN replies carry the enclosing zone's SOA in the authority section.
+    """
+    for section in (response.answer, response.authority):
+        for rrset in section:
+            if rrset.rdtype == dns.rdatatype.SOA:
+                return rrset.name.to_text().rstrip('.').lower()
+    return None
+
+
+def glue(response, hosts):
+    """{host: [addresses]} from the A/AAAA records in a reply's additional section"""
+    addresses = {}
+    for rrset in response.additional:
+        host = rrset.name.to_text().rstrip('.').lower()
+        if host in hosts and rrset.rdtype in (dns.rdatatype.A, dns.rdatatype.AAAA):
+            addresses.setdefault(host, []).extend(rdata.to_text() for rdata in rrset)
+    return addresses
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+import copy
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from trespax.core.scanner import Scanner
+from trespax.core.reporter import Reporter
+from trespax.utils.colors import Colors
+from trespax.utils.logger import Logger
+
+
+def scan_shard(config, targets, workers):
+    """Scan a shard of targets inside a worker process and return their records"""
+    scanner = BatchScanner(config, Logger(config.verbose), workers=workers)
+    with ThreadPoolExecutor(max_workers=scanner.workers) as executor:
+        return list(executor.map(scanner._scan_target, targets))
+
+
+class BatchScanner:
+    """Scan many targets through a bounded pool of concurrent Scanner instances
+
+    With `processes` > 1 the target stream is cut into shards that run in a
+    ProcessPoolExecutor, each shard scanning `workers` targets at a time, so
+    CPU-heavy work (HTML parsing, regex extraction, report formatting)
+    spreads over all cores. Records are merged back in the parent.
+    """
+
+    def __init__(self, config, logger, workers=4, processes=1):
+        self.config = config
+        self.logger = logger
+        self.workers = max(1, workers)
+        self.processes = max(1, processes)
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()  # Set on Ctrl+C: targets not started yet are skipped
+
+    def run(self, targets):
+        """Scan every target from the `targets` iterable
+
+        Targets are pulled from the iterable only when a slot frees up, so
+        memory stays flat no matter how many targets are queued.
+        """
+        start_time = time.time()
+
+        if self.config.resume:
+            finished = self._finished_targets()
+            if finished:
+                print(f"{Colors.CYAN}[*] Skipping {len(finished)} targets finished in the previous run{Colors.RESET}")
+                targets = (t for t in targets if t not in finished)
+
+        if self.processes > 1:
+            self._run_processes(targets)
+        else:
+            self._run_threads(targets)
+
+        duration = time.time() - start_time
+        print(f"\n{Colors.GREEN}[+] Batch completed: {self.completed} targets scanned, "
+              f"{self.failed} failed in {duration:.2f} seconds{Colors.RESET}")
+
+        return {"completed": self.completed, "failed": self.failed}
+
+    def _run_threads(self, targets):
+        """Scan targets on a bounded thread pool in this process"""
+        slots = threading.BoundedSemaphore(self.workers * 2)
+
+        def done(future):
+            slots.release()
+            if future.cancelled():
+                return
+            record = future.result()
+            if record:
+                self._merge(record)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for target in targets:
+                slots.acquire()
+                executor.submit(self._scan_target, target).add_done_callback(done)
+        except KeyboardInterrupt:
+            self._interrupt(executor)
+            raise
+        executor.shutdown(wait=True)
+
+    def _run_processes(self, targets):
+        """Scan shards of targets on a process pool and merge their records here"""
+        slots = threading.BoundedSemaphore(self.processes * 2)
+        targets = iter(targets)
+
+        def done(future):
+            slots.release()
+            if future.cancelled():
+                return
+            try:
+                records = future.result()
+            except Exception as e:
+                print(f"{Colors.RED}[!] Worker process failed: {str(e)}{Colors.RESET}")
+                return
+            for record in records:
+                if record:
+                    self._merge(record)
+
+        executor = ProcessPoolExecutor(max_workers=self.processes)
+        try:
+            while True:
+                shard = list(itertools.islice(targets, self.workers))
+                if not shard:
+                    break
+                slots.acquire()
+                executor.submit(scan_shard, self.config, shard, self.workers).add_done_callback(done)
+        except KeyboardInterrupt:
+            self._interrupt(executor)
+            raise
+        executor.shutdown(wait=True)
+
+    def _interrupt(self, executor):
+        """Drop every queued target; scans already running finish on their own"""
+        self._stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finished_targets(self):
+        """Targets the interrupted run already scanned successfully"""
+        finished = set()
+        merged = os.path.join(self.config.output_dir or '', "batch_results.jsonl")
+        if not os.path.isfile(merged):
+            return finished
+
+        with open(merged, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("status") == "ok":
+                    finished.add(record.get("target"))
+        return finished
+
+    def _target_config(self, target):
+        """Build an independent config for a single target"""
+        config = copy.copy(self.config)
+        config.target = target
+        config.selected_tools = dict(self.config.selected_tools)
+        config.manual_mode = False
+        config.quiet = True
+
+        if self.config.output_dir:
+            config.output_dir = os.path.join(self.config.output_dir, self._safe_name(target))
+        return config
+
+    def _scan_target(self, target):
+        """Run a full scan of one target, write its report and return its record
+
+        Returns None without scanning once the batch was interrupted.
+        """
+        if self._stop.is_set():
+            return None
+        config = self._target_config(target)
+        start_time = time.time()
+        results = {}
+
+        try:
+            if config.output_dir:
+                os.makedirs(config.output_dir, exist_ok=True)
+
+            scanner = Scanner(config, self.logger)
+            results = scanner.run()
+
+            if config.output_dir:
+                Reporter(config, self.logger).generate_report(results)
+
+            found = len([r for r in results.values() if r])
+            status = "ok"
+            print(f"{Colors.GREEN}[+] {target}: {found}/{len(results)} modules returned data "
+                  f"({time.time() - start_time:.2f}s){Colors.RESET}")
+        except Exception as e:
+            status = f"error: {e}"
+            print(f"{Colors.RED}[!] {target}: {str(e)}{Colors.RESET}")
+
+        return {
+            "target": target,
+            "status": status,
+            "duration": round(time.time() - start_time, 2),
+            "output_dir": config.output_dir,
+            "results": results
+        }
+
+    def _merge(self, record):
+        """Count a finished target and append it to the batch summary files"""
+        with self._lock:
+            if record["status"] == "ok":
+                self.completed += 1
+            else:
+                self.failed += 1
+
+            if not self.config.output_dir:
+                return
+
+            try:
+                summary = os.path.join(self.config.output_dir, "batch_summary.txt")
+                with open(summary, 'a', encoding='utf-8') as f:
+                    f.write(f"{record['target']}\t{record['status']}\t{record['duration']:.2f}s\t{record['output_dir']}\n")
+
+                merged = os.path.join(self.config.output_dir, "batch_results.jsonl")
+                with open(merged, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+            except Exception as e:
+                print(f"{Colors.RED}[!] Failed to write batch summary: {e}{Colors.RESET}")
+
+    def _safe_name(self, target):
+        """Turn a target into a directory name"""
+        return re.sub(r'[^A-Za-z0-9._-]', '_', re.sub(r'^https?://', '', target)).strip('_') or "target"
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+import time
+
+
+class ModuleProgress:
+    """Track how far a brute-force module got through its wordlist
+
+    Entries finish out of order, so only the contiguous prefix of finished
+    entries is recorded: on resume, everything before `offset` is skipped and
+    the findings recorded so far are restored.
+    """
+
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, journal, module, start=0, findings=None):
+        self.journal = journal
+        self.module = module
+        self.start = start
+        self.offset = start
+        self.findings = list(findings or [])
+        self._finished = set()
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+
+    def finding(self, item):
+        """Record a finding so it survives an interruption"""
+        if self.journal:
+            self.journal.write({"event": "finding", "module": self.module, "item": item})
+
+    def done(self, index):
+        """Mark wordlist entry `index` as finished"""
+        with self._lock:
+            self._finished.add(index)
+            while self.offset in self._finished:
+                self._finished.discard(self.offset)
+                self.offset += 1
+
+            if self.journal and time.time() - self._last_flush >= self.FLUSH_INTERVAL:
+                self._last_flush = time.time()
+                self.journal.write({"event": "progress", "module": self.module, "offset": self.offset})
+
+    def close(self):
+        """Record the final offset"""
+        if self.journal:
+            with self._lock:
+                self.journal.write({"event": "progress", "module": self.module, "offset": self.offset})
+
+
+class CheckpointJournal:
+    """Append-only journal of finished modules and brute-force progress for one target
+
+    Every line is a JSON event flushed as soon as it is written, so an
+    interrupted scan loses at most the entries that were still in flight.
+    """
+
+    FILENAME = "checkpoint.jsonl"
+
+    def __init__(self, output_dir, target, resume=False):
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self.target = target
+        self.modules = {}
+        self.offsets = {}
+        self.findings = {}
+        self.finished = False
+        self._lock = threading.Lock()
+
+        if resume and os.path.isfile(self.path):
+            self._load()
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self.write({"event": "start", "target": target, "time": time.time()})
+
+    def _load(self):
+        """Replay the journal of a previous run"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Line cut short by the interruption
+
+                event = entry.get("event")
+                module = entry.get("module")
+                if event == "module":
+                    self.modules[module] = entry.get("result")
+                elif event == "progress":
+                    self.offsets[module] = entry.get("offset", 0)
+                elif event == "finding":
+                    self.findings.setdefault(module, []).append(entry.get("item"))
+                elif event == "finish":
+                    self.finished = True
+
+    def write(self, entry, sync=False):
+        """Append one event to the journal"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(json.dumps(entry, default=str) + "\n")
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def module_done(self, module, result):
+        """Record a finished module and its result"""
+        self.modules[module] = result
+        self.write({"event": "module", "module": module, "result": result}, sync=True)
+
+    def progress(self, module):
+        """Progress tracker for a brute-force module, resuming where it stopped"""
+        return ModuleProgress(self, module, self.offsets.get(module, 0), self.findings.get(module))
+
+    def finish(self):
+        """Mark the whole scan as finished and close the journal"""
+        self.write({"event": "finish", "time": time.time()}, sync=True)
+        self.close()
+
+    def close(self):
+        """Close the journal file"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def module_progress(context, module):
+    """Progress tracker for `module`, a no-op one when no journal is kept"""
+    journal = getattr(context, 'checkpoint', None)
+    if journal:
+        return journal.progress(module)
+    return ModuleProgress(None, module)
@@ -10,8 +10,51 @@ class Config:
         self.tor_proxy = None
         self.output_dir = None
         self.manual_mode = False
+        self.quiet = False
+        self.resume = False
+        self.event_stream = None  # NDJSON findings as they happen ('-' = stdout)
         self.timeout = 10
         self.threads = 50
+        self.max_inflight = 5000  # Probes the async engine keeps in flight at once
+
+        # AIMD concurrency of the brute-force modules (grows while the target keeps up)
+        self.adaptive_concurrency = True
+        self.min_concurrency = 1
+        self.max_concurrency = 500
+
+        # Port scanning (None = the 100 most common ports of the bundled port table)
+        self.ports = None          # e.g. '22,80,8000-8100', 'http,ssh' or '-' for all 65535
+        self.top_ports = None      # Scan the N most common ports instead
+        self.port_confidence = None  # Stop once this fraction of the expected open ports is covered
+        self.port_timeout = 1.0    # Seconds before an unanswered connect counts as filtered
+        self.port_retries = 1      # Extra attempts for filtered ports before trusting the timeout
+        self.port_concurrency = 2000  # Upper bound for connects in flight (adaptive)
+        self.scan_type = 'connect'  # 'syn' = half-open scan over raw sockets (root, IPv4)
+        self.udp_scan = False      # Also scan UDP ports (implied by 'U:' ports in self.ports)
+
+        # DNS resolution for the subdomain and DNS modules
+        self.resolvers = None      # [(address, port)] to spread queries over (None = /etc/resolv.conf)
+        self.confirm_hits = True   # Confirm brute-force hits with a second resolver (when there is one)
+        self.dns_mode = 'recursive'  # 'authoritative' = brute force against the zone's own nameservers
+        self.dns_payload = 1232    # EDNS UDP buffer size in bytes (0 = no EDNS, 512-byte replies)
+        self.dns_cache_entries = 100000  # Answers the process-wide DNS cache keeps (LRU, 0 disables it)
+        self.dns_record_types = ['A', 'AAAA', 'CNAME', 'MX', 'NS', 'TXT', 'SOA', 'PTR',
+                                 'SRV', 'CAA', 'DNSKEY', 'DS', 'HTTPS', 'SVCB']  # Queried by the DNS module
+        self.zone_walk = True      # Try AXFR and NSEC/NSEC3 walking before the brute force
+        self.zone_walk_queries = 5000  # Query budget of an NSEC walk or NSEC3 hash collection
+
+        # Subdomain brute force (async DNS client speaking UDP to the resolvers)
+        self.dns_qps = 1000        # Queries per second the brute force aims for (0 = unpaced)
+        self.dns_timeout = 2.0     # Ceiling for the adaptive retransmission timeout
+        self.dns_retries = 2       # Retransmissions before a name counts as unanswered
+        self.wildcard_policy = 'skip'  # Under a wildcard zone: 'skip' it, or 'filter' answers matching it
+        self.subdomain_permutations = True  # Try permutations of found names (dev-api, api2, api.staging)
+        self.recursion_depth = 1   # Brute force under found names up to this many levels below the target
+        self.recursion_words = 500  # Wordlist entries tried under each found name
+
+        # Per-host / per-IP token buckets shared by every module (ops per second, 0 = unlimited)
+        self.rate_limits = {'http': 20, 'tcp': 1000, 'udp': 500, 'dns': 300}
+        self.rate_bursts = {'http': 20, 'tcp': 200, 'udp': 100, 'dns': 100}
         self.user_agent = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         
         # Tool selection for manual mode
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import socket
+import threading
+from urllib.parse import urlparse
+from trespax.core.dnscache import getaddrinfo
+from trespax.core.events import open_stream
+from trespax.core.metrics import Metrics
+from trespax.core.ratelimit import RateLimiter, remember_ip
+
+
+class TargetContext:
+    """Per-target state shared by every module
+
+    The target is resolved (A/AAAA) and its base URL probed only once, no
+    matter how many modules ask for it. Both steps are lazy and thread-safe,
+    so modules running side by side wait for the first caller instead of
+    repeating the lookup or the HTTP round trips.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.target = config.target
+        self.limiter = RateLimiter(config)
+        self.metrics = Metrics()
+
+        self._resolve_lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._resolved = False
+        self._probed = False
+
+        # Filled by resolve()
+        self.ipv4 = []
+        self.ipv6 = []
+
+        # Filled by probe()
+        self.base_url = None
+        self.scheme = None
+        self.homepage = None
+        self.redirect_chain = []
+
+        # Filled by the PORTS module for modules that depend on it
+        self.open_ports = None
+
+        # Set by the scanner so async modules can use its probe primitives
+        self.engine = None
+
+        # Set by the scanner when a checkpoint journal is kept
+        self.checkpoint = None
+
+        # NDJSON event stream (None unless --stream was given)
+        self.events = open_stream(config.event_stream)
+
+    @property
+    def hostname(self):
+        """Target host name without scheme, path or port"""
+        if self.target.startswith(('http://', 'https://')):
+            return urlparse(self.target).hostname or self.target
+        return self.target
+
+    @property
+    def is_ip(self):
+        """Check if the target is an IP address"""
+        try:
+            socket.inet_aton(self.hostname)
+            return True
+        except socket.error:
+            return False
+
+    @property
+    def ip(self):
+        """Primary IPv4 address of the target (falls back to IPv6)"""
+        self.resolve()
+        if self.ipv4:
+            return self.ipv4[0]
+        if self.ipv6:
+            return self.ipv6[0]
+        return None
+
+    @property
+    def addresses(self):
+        """All resolved addresses, IPv4 first"""
+        return self.resolve()
+
+    def resolve(self):
+        """Resolve the target's A/AAAA addresses once"""
+        with self._resolve_lock:
+            if self._resolved:
+                return self.ipv4 + self.ipv6
+
+            host = self.hostname
+            try:
+                infos = getaddrinfo(host, self.config, self.limiter, self.metrics, 'resolve')
+                for family, address in infos:
+                    if family == socket.AF_INET and address not in self.ipv4:
+                        self.ipv4.append(address)
+                    elif family == socket.AF_INET6 and address not in self.ipv6:
+                        self.ipv6.append(address)
+            except Exception:
+                pass  # Unresolvable target, modules report it themselves
+
+            if self.ipv4:
+                remember_ip(host, self.ipv4[0])
+            self._resolved = True
+            return self.ipv4 + self.ipv6
+
+    def probe(self):
+        """Find the working base URL (HTTPS first, then HTTP) once"""
+        with self._probe_lock:
+            if self._probed:
+                return self.homepage
+
+            if not self.target.startswith(('http://', 'https://')):
+                urls = [f"https://{self.target}", f"http://{self.target}"]
+            else:
+                urls = [self.target]
+
+            session = self.session('probe')
+
+            # Prefer the first URL that answers without an error status,
+            # otherwise keep the first one that answered at all
+            fallback = None
+            for url in urls:
+                try:
+                    response = session.get(url, timeout=self.config.timeout, verify=False)
+                except Exception:
+                    continue
+
+                if response.status_code < 400:
+                    self._set_homepage(url, response)
+                    break
+                if fallback is None:
+                    fallback = (url, response)
+
+            if self.homepage is None and fallback:
+                self._set_homepage(*fallback)
+
+            session.close()
+            self._probed = True
+            return self.homepage
+
+    def session(self, module):
+        """HTTP session for `module`: user agent, TOR proxy and rate limiting applied"""
+        from trespax.core.session import RateLimitedSession  # requests is slow to import
+
+        session = RateLimitedSession(self.limiter, module, self.metrics)
+        session.headers.update({'User-Agent': self.config.user_agent})
+        if self.config.use_tor and self.config.tor_proxy:
+            session.proxies.update(self.config.tor_proxy)
+        return session
+
+    def emit(self, event, **fields):
+        """Stream an event for this target (no-op unless streaming is enabled)"""
+        if self.events:
+            self.events.emit(event, target=self.target, **fields)
+
+    def _set_homepage(self, url, response):
+        """Record the working base URL and its homepage response"""
+        self.base_url = url
+        self.scheme = urlparse(url).scheme
+        self.homepage = response
+        self.redirect_chain = [r.url for r in response.history] + [response.url]
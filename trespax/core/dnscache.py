@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+
+MAX_ENTRIES = 100000   # Answers kept before the least recently used are evicted
+MAX_TTL = 86400        # Longest an answer is kept, whatever its TTL says
+SYSTEM_TTL = 60        # Lifetime of getaddrinfo results, which carry no TTL
+NEGATIVE_TTL = 30      # Lifetime of a getaddrinfo lookup that found no such name
+
+_NEGATIVE_ERRORS = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+
+class DnsCache:
+    """Process-wide DNS answers, kept for their TTL and bounded by LRU eviction
+
+    Entries map a key to a value and its expiry time. The cache doubles as
+    dnspython's resolver cache (get/put/flush, Answer objects carrying their
+    own expiration): dnspython puts NXDOMAIN and NODATA answers in it too,
+    expiring after the SOA TTL or minimum, whichever is lower (RFC 2308).
+    Other callers store their own values under keys of their own with an
+    explicit `ttl`.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached value for `key`, or None when absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            expires, value, negative = entry
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if negative:
+                self.negative_hits += 1
+            return value
+
+    def put(self, key, value, ttl=None, negative=False):
+        """Keep `value` for `ttl` seconds (a dnspython Answer's own expiration when None)"""
+        now = time.time()
+        if ttl is None:
+            expires = value.expiration
+            negative = value.rrset is None
+        else:
+            expires = now + ttl
+        expires = min(expires, now + MAX_TTL)
+        if expires <= now or not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = (expires, value, negative)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def flush(self, key=None):
+        """Drop `key`, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def dns_cache(config=None):
+    """The process-wide cache (sized by `config.dns_cache_entries` when first created)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DnsCache(getattr(config, 'dns_cache_entries', MAX_ENTRIES))
+        return _cache
+
+
+def getaddrinfo(host, config=None, limiter=None, metrics=None, module=None):
+    """[(family, address)] of `host` from the system resolver, cached
+
+    getaddrinfo also reads /etc/hosts but reports no TTL, so results are
+    kept for SYSTEM_TTL seconds and failures for NEGATIVE_TTL. Only an
+    actual lookup takes a `limiter` token and is timed into `metrics`.
+    Raises socket.gaierror when the name does not resolve.
+    """
+    cache = dns_cache(config)
+    key = ('addrinfo', host.rstrip('.').lower())
+    addresses = cache.get(key)
+    if addresses is None:
+        if limiter:
+            limiter.acquire('dns', 'resolver', module)
+        try:
+            with metrics.measure('dns', module, answers=(socket.gaierror,)) if metrics else nullcontext():
+                infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        except socket.gaierror as e:
+            if e.errno in _NEGATIVE_ERRORS:  # Not temporary failures (EAI_AGAIN)
+                cache.put(key, [], ttl=NEGATIVE_TTL, negative=True)
+            raise
+        addresses = []
+        for family, _, _, _, sockaddr in infos:
+            if (family, sockaddr[0]) not in addresses:
+                addresses.append((family, sockaddr[0]))
+        cache.put(key, addresses, ttl=SYSTEM_TTL)
+    if not addresses:
+        raise socket.gaierror(socket.EAI_NONAME, f"{host} did not resolve (cached)")
+    return addresses
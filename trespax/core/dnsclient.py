@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+
+import asyncio
+import errno
+import random
+import socket
+import struct
+import time
+from trespax.core.dnscache import dns_cache
+from trespax.core.ratelimit import TokenBucket
+from trespax.core.resolverpool import resolver_pool
+
+TYPE_A, TYPE_NS, TYPE_CNAME, TYPE_AAAA = 1, 2, 5, 28
+CLASS_IN = 1
+
+RCODE_NOERROR, RCODE_SERVFAIL, RCODE_NXDOMAIN, RCODE_REFUSED = 0, 2, 3, 5
+RCODE_STATUS = {RCODE_NOERROR: 'ok', RCODE_SERVFAIL: 'servfail', RCODE_NXDOMAIN: 'nxdomain', RCODE_REFUSED: 'refused'}
+
+FLAG_RD = 0x0100  # Recursion desired
+FLAG_TC = 0x0200  # Reply truncated
+
+SOCKETS = 4         # Query sockets per address family, each with its own 16-bit ID space and source port
+MAX_POINTERS = 64   # Compression pointers followed in one name before it counts as malformed
+
+
+def encode_name(name):
+    """Wire form of `name` (lowercased); ValueError if it cannot be a DNS name"""
+    wire = b''
+    for label in name.rstrip('.').lower().split('.'):
+        try:
+            encoded = label.encode('ascii')
+        except UnicodeEncodeError:
+            try:
+                encoded = label.encode('idna')
+            except UnicodeError:
+                encoded = b''
+        if not 0 < len(encoded) < 64:
+            raise ValueError(f"Invalid DNS name '{name}'")
+        wire += bytes([len(encoded)]) + encoded
+    if len(wire) >= 255:
+        raise ValueError(f"DNS name too long '{name}'")
+    return wire + b'\x00'
+
+
+def _read_name(data, offset):
+    """Read a possibly compressed name at `offset`; returns (name, offset after it)"""
+    labels = []
+    end = None
+    pointers = 0
+    while True:
+        length = data[offset]
+        if length & 0xc0 == 0xc0:
+            if end is None:
+                end = offset + 2
+            pointers += 1
+            if pointers > MAX_POINTERS:
+                raise ValueError("Compression loop")
+            offset = ((length & 0x3f) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if not length:
+            break
+        labels.append(data[offset:offset + length].decode('ascii', 'replace'))
+        offset += length
+    return '.'.join(labels).lower(), end if end is not None else offset
+
+
+def _read_record(data, offset):
+    """(owner, type, ttl, rdata offset, rdata length) of the record at `offset`"""
+    owner, offset = _read_name(data, offset)
+    rtype, _, ttl, length = struct.unpack_from('!HHIH', data, offset)
+    offset += 10
+    if offset + length > len(data):
+        raise ValueError("Record runs past the end of the reply")
+    return owner, rtype, ttl, offset, length
+
+
+def parse_response(data):
+    """Parse a reply into (rcode, truncated, [(owner, type, ttl, value)])
+
+    A, AAAA and CNAME records of the answer section are decoded, plus the
+    NS records of a referral for the question name itself (an
+    authoritative server's way of saying the name is a delegated zone);
+    everything else is skipped. ValueError for a malformed packet.
+    """
+    try:
+        _, flags, questions, answers, authority = struct.unpack_from('!HHHHH', data)
+        offset = 12
+        qname = None
+        for _ in range(questions):
+            name, offset = _read_name(data, offset)
+            qname = name if qname is None else qname
+            offset += 4
+
+        records = []
+        for _ in range(answers):
+            owner, rtype, ttl, offset, length = _read_record(data, offset)
+            if rtype == TYPE_A and length == 4:
+                records.append((owner, rtype, ttl, socket.inet_ntop(socket.AF_INET, data[offset:offset + 4])))
+            elif rtype == TYPE_AAAA and length == 16:
+                records.append((owner, rtype, ttl, socket.inet_ntop(socket.AF_INET6, data[offset:offset + 16])))
+            elif rtype == TYPE_CNAME:
+                records.append((owner, rtype, ttl, _read_name(data, offset)[0]))
+            offset += length
+
+        if not answers:
+            for _ in range(authority):
+                owner, rtype, ttl, offset, length = _read_record(data, offset)
+                if rtype == TYPE_NS and owner == qname:
+                    records.append((owner, rtype, ttl, _read_name(data, offset)[0]))
+                offset += length
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"Malformed DNS reply: {e}")
+    return flags & 0x000f, bool(flags & FLAG_TC), records
+
+
+class DnsAnswer:
+    """What one name resolved to: status plus its A, AAAA and CNAME records
+
+    `status` is 'ok', 'nxdomain', 'servfail', 'refused' or 'timeout'
+    (no usable reply after every retransmission). `delegation` holds the
+    nameservers of a referral, when an authoritative server answered that
+    the name is a delegated zone.
+    """
+
+    def __init__(self, name, status, addresses=None, ipv6=None, cnames=None, ttl=None):
+        self.name = name
+        self.status = status
+        self.resolver = None  # ResolverHealth of the nameserver that answered
+        self.addresses = addresses or []
+        self.ipv6 = ipv6 or []
+        self.cnames = cnames or []
+        self.delegation = []
+        self.ttl = ttl
+
+    @classmethod
+    def from_records(cls, name, rcode, records):
+        """Answer from the parsed records of a reply"""
+        answer = cls(name, RCODE_STATUS.get(rcode, 'servfail'))
+        for _, rtype, ttl, value in records:
+            target = {TYPE_A: answer.addresses, TYPE_AAAA: answer.ipv6, TYPE_NS: answer.delegation}.get(rtype, answer.cnames)
+            if value not in target:
+                target.append(value)
+            answer.ttl = ttl if answer.ttl is None else min(answer.ttl, ttl)
+        return answer
+
+    @property
+    def found(self):
+        """Check if the name resolved to at least one address or alias, or is a delegated zone"""
+        return bool(self.addresses or self.ipv6 or self.cnames or self.delegation)
+
+    def merge(self, other):
+        """Add the records of another answer for the same name (e.g. its AAAA lookup)"""
+        for source, target in ((other.addresses, self.addresses), (other.ipv6, self.ipv6),
+                               (other.cnames, self.cnames), (other.delegation, self.delegation)):
+            target.extend(value for value in source if value not in target)
+        if other.ttl is not None:
+            self.ttl = other.ttl if self.ttl is None else min(self.ttl, other.ttl)
+        return self
+
+    def to_dict(self):
+        return {"name": self.name, "a": self.addresses, "aaaa": self.ipv6, "cname": self.cnames,
+                "ns": self.delegation, "ttl": self.ttl}
+
+
+class DnsClient:
+    """Stub resolver speaking DNS over UDP directly, built for brute force
+
+    Queries go out over a few non-blocking sockets per address family, each
+    with its own ID space, and an event loop reader matches every reply to
+    its query by ID, nameserver address and question, so a late reply to an
+    ID that has since been reused is dropped. Every attempt goes to a
+    resolver picked from the pool (a different one on retransmission when
+    possible), waits for that resolver's own RTO and feeds the outcome back
+    into its health score.
+
+    With `recursion` off the queries carry no RD flag, for asking a zone's
+    authoritative servers directly.
+
+    Sends are paced by a token bucket at `qps` queries per second, and each
+    one also takes a 'dns' token from `limiter` keyed by the resolver's
+    address, so --rate dns=N caps what any one nameserver receives; how
+    many queries are in flight is left to the caller.
+    """
+
+    def __init__(self, pool=None, qps=500, timeout=2.0, retries=2, metrics=None, module='subdomains',
+                 recursion=True, limiter=None):
+        self.pool = pool or resolver_pool()
+        self.flags = FLAG_RD if recursion else 0
+        self.timeout = timeout
+        self.retries = retries
+        self.metrics = metrics
+        self.limiter = limiter
+        self.module = module
+        self.bucket = TokenBucket(qps, max(1, qps / 10)) if qps else None
+        self.cache = dns_cache()
+
+        self._sockets = {}
+        self._pending = {}
+        self._next_socket = 0
+
+    def _socket(self, family):
+        """(key, socket) for the next query to a `family` resolver (created inside the running loop)"""
+        sockets = self._sockets.get(family)
+        if sockets is None:
+            loop = asyncio.get_running_loop()
+            sockets = self._sockets[family] = []
+            for index in range(SOCKETS):
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+                loop.add_reader(sock.fileno(), self._on_readable, (family, index), sock)
+                sockets.append(sock)
+        self._next_socket = (self._next_socket + 1) % SOCKETS
+        return (family, self._next_socket), sockets[self._next_socket]
+
+    def close(self):
+        """Close the sockets; pending queries time out"""
+        if not self._sockets:
+            return
+        loop = asyncio.get_running_loop()
+        for sockets in self._sockets.values():
+            for sock in sockets:
+                loop.remove_reader(sock.fileno())
+                sock.close()
+        self._sockets = {}
+
+    async def lookup(self, name, confirm=False):
+        """Resolve `name` to its A, AAAA and CNAME records
+
+        The AAAA query is only sent when the A query showed the name exists,
+        so a miss costs one query. With `confirm`, a hit is only believed
+        once a second resolver agrees (see _confirm).
+
+        Hits are kept in the shared DNS cache for their lowest TTL. Misses
+        are not: a brute force would flood the cache with them.
+        """
+        key = ('lookup', name.rstrip('.').lower(), bool(self.flags))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        answer = await self.query(name, TYPE_A)
+        if answer.status == 'ok':
+            if confirm and answer.found and not await self._confirm(answer):
+                return DnsAnswer(answer.name, 'nxdomain')
+            ipv6 = await self.query(name, TYPE_AAAA)
+            if ipv6.status == 'ok':
+                answer.merge(ipv6)
+            if answer.found and answer.ttl:
+                self.cache.put(key, answer, ttl=answer.ttl)
+        return answer
+
+    async def _confirm(self, answer):
+        """Ask another resolver whether `answer` exists; a third one breaks a tie
+
+        The resolvers on the losing side are marked as disagreeing, which
+        counts against their health score. Returns False when the hit does
+        not hold up.
+        """
+        second = await self.query(answer.name, TYPE_A, exclude=(answer.resolver,))
+        if second.resolver is answer.resolver or second.status in ('timeout', 'servfail', 'refused'):
+            return True  # No other resolver to ask: keep the hit unconfirmed
+        if second.found:
+            self.pool.agree(answer.resolver, second.resolver)
+            return True
+
+        third = await self.query(answer.name, TYPE_A, exclude=(answer.resolver, second.resolver))
+        if third.resolver in (answer.resolver, second.resolver) or third.status in ('timeout', 'servfail', 'refused'):
+            return True
+        if third.found:
+            self.pool.agree(answer.resolver, third.resolver)
+            self.pool.disagree(second.resolver)
+            return True
+        self.pool.agree(second.resolver, third.resolver)
+        self.pool.disagree(answer.resolver)
+        return False
+
+    async def query(self, name, qtype=TYPE_A, exclude=()):
+        """Send one question, retransmitting until it is answered; returns a DnsAnswer"""
+        wire = encode_name(name)
+        question = wire + struct.pack('!HH', qtype, CLASS_IN)
+        name = name.rstrip('.').lower()
+        status = 'timeout'
+        tried = list(exclude)
+        resolver = None
+
+        for attempt in range(self.retries + 1):
+            if attempt and self.metrics:
+                self.metrics.retry('dns', self.module)
+            if self.bucket:
+                delay = self.bucket.reserve()
+                if delay:
+                    await asyncio.sleep(delay)
+
+            resolver = self.pool.pick(exclude=tried)
+            tried.append(resolver)
+            if self.limiter:
+                await self.limiter.acquire_async('dns', resolver.address, self.module)
+            start = time.monotonic()
+            reply = await self._exchange(resolver, question)
+            if reply is None:
+                self.pool.record(resolver, 'timeout')
+                continue
+            rtt = time.monotonic() - start
+
+            try:
+                rcode, _, records = parse_response(reply)
+            except ValueError:
+                self.pool.record(resolver, 'servfail')
+                if self.metrics:
+                    self.metrics.error('dns', self.module)
+                continue
+            answer = DnsAnswer.from_records(name, rcode, records)
+            answer.resolver = resolver
+            # Karn: a retransmitted query's reply cannot be timed
+            self.pool.record(resolver, answer.status, rtt if attempt == 0 else None)
+            if rcode in (RCODE_SERVFAIL, RCODE_REFUSED):
+                # The resolver failed, not the name: ask again (another resolver)
+                status = answer.status
+                if self.metrics:
+                    self.metrics.error('dns', self.module)
+                continue
+            if self.metrics:
+                self.metrics.observe('dns', rtt, self.module)
+            return answer
+
+        if status == 'timeout' and self.metrics:
+            self.metrics.timeout('dns', self.module)
+        answer = DnsAnswer(name, status)
+        answer.resolver = resolver
+        return answer
+
+    async def _exchange(self, resolver, question):
+        """Send `question` to `resolver` once; the reply bytes, or None after its RTO"""
+        loop = asyncio.get_running_loop()
+        key, sock = self._socket(resolver.family)
+
+        query_id = random.getrandbits(16)
+        while (key, query_id) in self._pending:
+            query_id = random.getrandbits(16)
+        packet = struct.pack('!HHHHHH', query_id, self.flags, 1, 0, 0, 0) + question
+
+        future = loop.create_future()
+        self._pending[(key, query_id)] = (future, resolver.address, question.lower())
+        try:
+            while True:
+                try:
+                    sock.sendto(packet, (resolver.address, resolver.port))
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(0.001)  # Send buffer full, let the NIC drain it
+                except OSError as e:
+                    if e.errno == errno.ECONNREFUSED:
+                        continue  # Queued ICMP error from an earlier datagram
+                    if self.metrics:
+                        self.metrics.error('dns', self.module)
+                    return None
+            if self.metrics:
+                self.metrics.transferred(self.module, sent=len(packet))
+
+            timer = loop.call_later(resolver.rto(self.timeout), _expire, future)
+            try:
+                return await future
+            finally:
+                timer.cancel()
+        finally:
+            del self._pending[(key, query_id)]
+
+    def _on_readable(self, key, sock):
+        """Match replies to pending queries (event loop reader callback)"""
+        received = 0
+        while True:
+            try:
+                data, address = sock.recvfrom(65535)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.ECONNREFUSED:
+                    continue  # ICMP error for an earlier datagram
+                break
+            received += len(data)
+            if len(data) < 12:
+                continue
+            pending = self._pending.get((key, (data[0] << 8) | data[1]))
+            if pending is None:
+                continue  # Late reply to a query that was already retransmitted or answered
+            future, server, question = pending
+            if address[0] != server or data[12:12 + len(question)].lower() != question:
+                continue  # Not the reply to this query
+            if not future.done():
+                future.set_result(data)
+        if received and self.metrics:
+            self.metrics.transferred(self.module, received=received)
+
+
+def _expire(future):
+    if not future.done():
+        future.set_result(None)
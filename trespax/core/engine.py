@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+import asyncio
+import errno
+import ipaddress
+import socket
+import ssl
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+
+class SyncModuleAdapter:
+    """Expose a blocking module through the async module protocol
+
+    The wrapped module's run() is executed on the engine's thread pool, so
+    modules that still use requests/socket keep working unchanged.
+    """
+
+    def __init__(self, module, engine):
+        self.module = module
+        self.engine = engine
+
+    async def run(self, context=None):
+        """Run the wrapped module without blocking the event loop"""
+        return await self.engine.run_blocking(self.module.run, context)
+
+
+class Engine:
+    """Asyncio engine that runs module tasks and network probes on one event loop
+
+    Async modules implement `async def run(context)` and use the TCP probe
+    primitives below. Every probe holds one slot of a shared semaphore, so a
+    single process can keep thousands of sockets in flight without a thread
+    per socket. Async DNS goes through DnsClient and the shared resolver
+    pool; HTTP modules use RateLimitedSession through SyncModuleAdapter.
+    """
+
+    OVERLOAD_ERRNOS = (errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.EAGAIN,
+                       errno.ECONNRESET, errno.EADDRNOTAVAIL)
+
+    def __init__(self, config, blocking_workers=16):
+        self.config = config
+        self.max_inflight = self._inflight_limit(config.max_inflight)
+        self.executor = ThreadPoolExecutor(max_workers=blocking_workers)
+        self._slots = None
+        self.limiter = None  # Set by the scanner to the target's RateLimiter
+        self.metrics = None  # Set by the scanner to the target's Metrics
+
+    def run(self, coro):
+        """Run a coroutine to completion on a fresh event loop"""
+        try:
+            return asyncio.run(coro)
+        finally:
+            self.executor.shutdown(wait=False)
+
+    @property
+    def slots(self):
+        """Semaphore bounding in-flight probes (created inside the running loop)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_inflight)
+        return self._slots
+
+    async def run_blocking(self, func, *args):
+        """Run a blocking callable on the engine's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    def as_async(self, module):
+        """Return `module` if it is async, otherwise wrap it in an adapter"""
+        if asyncio.iscoroutinefunction(getattr(module, 'run', None)):
+            return module
+        return SyncModuleAdapter(module, self)
+
+    def _inflight_limit(self, requested):
+        """Raise the open-file limit as far as allowed and cap in-flight probes to it"""
+        if not RESOURCE_AVAILABLE:
+            return requested
+        try:
+            soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            if hard == resource.RLIM_INFINITY or hard > soft:
+                target = hard if hard != resource.RLIM_INFINITY else max(soft, requested + 256)
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+                soft = target
+            # Leave room for wordlists, output files and the resolver
+            return max(1, min(requested, soft - 128))
+        except (ValueError, OSError):
+            return requested
+
+    # ------------------------------------------------------------------
+    # Rate limits and metrics
+    # ------------------------------------------------------------------
+
+    async def _throttle(self, kind, host, module):
+        """Take a rate-limit token before a probe"""
+        if self.limiter:
+            await self.limiter.acquire_async(kind, host, module)
+
+    def _record(self, kind, module, latency=None, outcome='ok'):
+        """Feed one finished operation into the target's metrics"""
+        if not self.metrics:
+            return
+        if outcome == 'timeout':
+            self.metrics.timeout(kind, module)
+        elif outcome == 'error':
+            self.metrics.error(kind, module)
+        else:
+            self.metrics.observe(kind, latency, module)
+
+    # ------------------------------------------------------------------
+    # TCP
+    # ------------------------------------------------------------------
+
+    async def tcp_connect(self, host, port, timeout=1, module=None):
+        """Try a TCP connection and classify the port as open, closed or filtered"""
+        await self._throttle('tcp', host, module)
+        async with self.slots:
+            start = time.monotonic()
+            # A bare non-blocking socket: no transport or stream objects per probe
+            try:
+                sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+            except OSError:
+                self._record('tcp_connect', module, outcome='error')
+                return 'error', 0.0
+            sock.setblocking(False)
+            try:
+                await asyncio.wait_for(asyncio.get_running_loop().sock_connect(sock, (host, port)), timeout)
+            except asyncio.TimeoutError:
+                self._record('tcp_connect', module, outcome='timeout')
+                return 'filtered', time.monotonic() - start
+            except ConnectionRefusedError:
+                self._record('tcp_connect', module, time.monotonic() - start)
+                return 'closed', time.monotonic() - start
+            except OSError as e:
+                self._record('tcp_connect', module, outcome='error')
+                # Local resource exhaustion or resets say nothing about the port
+                if e.errno in self.OVERLOAD_ERRNOS:
+                    return 'error', time.monotonic() - start
+                return 'filtered', time.monotonic() - start
+            finally:
+                sock.close()
+
+            latency = time.monotonic() - start
+            self._record('tcp_connect', module, latency)
+            return 'open', latency
+
+    async def open_connection(self, host, port, timeout=None, use_ssl=False, server_hostname=None):
+        """Open a stream connection, through TOR's SOCKS5 proxy when enabled"""
+        timeout = timeout or self.config.timeout
+        ssl_context = self._ssl_context() if use_ssl else None
+
+        if self.config.use_tor and self.config.tor_proxy:
+            return await asyncio.wait_for(
+                self._open_socks5(host, port, ssl_context, server_hostname), timeout
+            )
+
+        return await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=ssl_context,
+                                    server_hostname=(server_hostname or host) if ssl_context else None),
+            timeout
+        )
+
+    async def _open_socks5(self, host, port, ssl_context, server_hostname):
+        """Tunnel a connection through the configured SOCKS5 proxy"""
+        proxy = urlsplit(self.config.tor_proxy.get('https') or self.config.tor_proxy.get('http'))
+        reader, writer = await asyncio.open_connection(proxy.hostname, proxy.port or 9050)
+
+        writer.write(b'\x05\x01\x00')
+        await writer.drain()
+        if await reader.readexactly(2) != b'\x05\x00':
+            writer.close()
+            raise ConnectionError("SOCKS5 proxy refused the handshake")
+
+        try:
+            address = ipaddress.ip_address(host)
+            if address.version == 4:
+                dest = b'\x01' + address.packed
+            else:
+                dest = b'\x04' + address.packed
+        except ValueError:
+            encoded = host.encode('idna')
+            dest = b'\x03' + bytes([len(encoded)]) + encoded
+
+        writer.write(b'\x05\x01\x00' + dest + struct.pack('>H', port))
+        await writer.drain()
+        reply = await reader.readexactly(4)
+        if reply[1] != 0:
+            writer.close()
+            raise ConnectionError(f"SOCKS5 connect failed (code {reply[1]})")
+
+        # Skip the bound address in the reply
+        if reply[3] == 1:
+            await reader.readexactly(4 + 2)
+        elif reply[3] == 4:
+            await reader.readexactly(16 + 2)
+        else:
+            length = (await reader.readexactly(1))[0]
+            await reader.readexactly(length + 2)
+
+        if ssl_context:
+            await writer.start_tls(ssl_context, server_hostname=server_hostname or host)
+        return reader, writer
+
+    def _ssl_context(self):
+        """TLS context that accepts any certificate (recon, not validation)"""
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        return context
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+import time
+
+
+class EventStream:
+    """Newline-delimited JSON events written the moment they happen
+
+    Every event is a single `os.write` on a file opened for appending (or on
+    stdout), so lines from concurrent threads and batch worker processes never
+    interleave and downstream tools can consume findings while the scan runs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path == '-':
+            self._fd = 1
+            self._owned = False
+        else:
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._owned = True
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        """Write one event line"""
+        entry = {"event": event, "time": round(time.time(), 3)}
+        entry.update(fields)
+        line = (json.dumps(entry, default=str) + "\n").encode('utf-8')
+        with self._lock:
+            if self._fd is None:
+                return
+            try:
+                os.write(self._fd, line)
+            except OSError:
+                pass  # Reader went away, keep scanning
+
+    def close(self):
+        """Close the underlying file (stdout stays open)"""
+        with self._lock:
+            if self._owned and self._fd is not None:
+                os.close(self._fd)
+            self._fd = None
+
+
+# One stream per destination and process, shared by every target scanned in it
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def open_stream(path):
+    """Get the process-wide event stream for `path` (None when streaming is off)"""
+    if not path:
+        return None
+    with _streams_lock:
+        pid = os.getpid()
+        stream = _streams.get((pid, path))
+        if stream is None:
+            stream = EventStream(path)
+            _streams[(pid, path)] = stream
+        return stream
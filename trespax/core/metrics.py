@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from trespax.core.dnscache import dns_cache
+
+
+def _escape_label(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative latency histogram with Prometheus-style buckets"""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        """Add one observation"""
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs, ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.BUCKETS, self.counts):
+            total += count
+            pairs.append((bound, total))
+        pairs.append((float('inf'), self.count))
+        return pairs
+
+    def to_dict(self):
+        """Counts, sum, average and cumulative buckets"""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "buckets": {("+Inf" if bound == float('inf') else str(bound)): total
+                        for bound, total in self.cumulative()}
+        }
+
+
+class Metrics:
+    """Per-module and per-request counters for one target
+
+    Latencies are kept per (kind, module), where kind is one of `KINDS`.
+    Every measured operation counts as a request; timeouts and other
+    failures are counted on top of that. Exported as `metrics.json` and as a
+    Prometheus textfile (`metrics.prom`) for node_exporter's textfile
+    collector.
+    """
+
+    KINDS = ('dns', 'tcp_connect', 'tcp_syn', 'udp', 'tls_handshake', 'http_ttfb')
+    JSON_FILE = "metrics.json"
+    PROM_FILE = "metrics.prom"
+
+    def __init__(self):
+        self.module_times = {}
+        self.requests = {}
+        self.timeouts = {}
+        self.errors = {}
+        self.retries = {}
+        self.bytes = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bump(counter, key, amount=1):
+        counter[key] = counter.get(key, 0) + amount
+
+    def observe(self, kind, seconds, module=None):
+        """Record one successful operation and its latency"""
+        key = (kind, module or 'other')
+        with self._lock:
+            self._bump(self.requests, key)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def timeout(self, kind, module=None):
+        """Record an operation that timed out"""
+        key = (kind, module or 'other')
+        with self._lock:
+            self._bump(self.requests, key)
+            self._bump(self.timeouts, key)
+
+    def error(self, kind, module=None):
+        """Record an operation that failed for any other reason"""
+        key = (kind, module or 'other')
+        with self._lock:
+            self._bump(self.requests, key)
+            self._bump(self.errors, key)
+
+    def retry(self, kind, module=None):
+        """Record a retransmission or retry of an earlier operation"""
+        with self._lock:
+            self._bump(self.retries, (kind, module or 'other'))
+
+    def transferred(self, module, received=0, sent=0):
+        """Add bytes received from / sent to the target"""
+        with self._lock:
+            if received:
+                self._bump(self.bytes, (module or 'other', 'received'), received)
+            if sent:
+                self._bump(self.bytes, (module or 'other', 'sent'), sent)
+
+    def module_time(self, module, seconds):
+        """Record the wall time of a finished module"""
+        with self._lock:
+            self.module_times[module] = seconds
+
+    @contextmanager
+    def measure(self, kind, module=None, answers=()):
+        """Time the enclosed operation; timeouts and errors are counted and re-raised
+
+        Exceptions listed in `answers` are valid replies (e.g. NXDOMAIN) and
+        are timed like a success.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        except answers:
+            self.observe(kind, time.monotonic() - start, module)
+            raise
+        except (socket.timeout, TimeoutError):
+            self.timeout(kind, module)
+            raise
+        except Exception as e:
+            if 'timeout' in type(e).__name__.lower() or 'timed out' in str(e).lower():
+                self.timeout(kind, module)
+            else:
+                self.error(kind, module)
+            raise
+        self.observe(kind, time.monotonic() - start, module)
+
+    def to_dict(self):
+        """Everything collected so far as plain JSON-friendly data"""
+        with self._lock:
+            modules = {}
+            for (kind, module), total in sorted(self.requests.items()):
+                entry = modules.setdefault(module, {}).setdefault(kind, {})
+                entry["requests"] = total
+                entry["timeouts"] = self.timeouts.get((kind, module), 0)
+                entry["errors"] = self.errors.get((kind, module), 0)
+                entry["retries"] = self.retries.get((kind, module), 0)
+                histogram = self.histograms.get((kind, module))
+                entry["latency"] = histogram.to_dict() if histogram else None
+
+            transferred = {}
+            for (module, direction), total in sorted(self.bytes.items()):
+                transferred.setdefault(module, {})[direction] = total
+
+            return {
+                "module_seconds": {m: round(t, 3) for m, t in self.module_times.items()},
+                "requests": modules,
+                "bytes": transferred,
+                "dns_cache": dns_cache().stats()
+            }
+
+    def prometheus(self, target):
+        """Render the metrics in the Prometheus text exposition format"""
+        def labels(**values):
+            return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in values.items()) + "}"
+
+        lines = []
+        with self._lock:
+            lines += ["# HELP trespax_module_duration_seconds Wall time of each module.",
+                      "# TYPE trespax_module_duration_seconds gauge"]
+            for module, seconds in sorted(self.module_times.items()):
+                lines.append(f"trespax_module_duration_seconds{labels(target=target, module=module)} {seconds:.6f}")
+
+            for name, counter, help_text in (
+                ("requests", self.requests, "Network operations issued."),
+                ("timeouts", self.timeouts, "Network operations that timed out."),
+                ("errors", self.errors, "Network operations that failed."),
+                ("retries", self.retries, "Retried network operations.")
+            ):
+                lines += [f"# HELP trespax_{name}_total {help_text}", f"# TYPE trespax_{name}_total counter"]
+                for (kind, module), total in sorted(counter.items()):
+                    lines.append(f"trespax_{name}_total{labels(target=target, module=module, kind=kind)} {total}")
+
+            lines += ["# HELP trespax_bytes_total Bytes exchanged with the target.",
+                      "# TYPE trespax_bytes_total counter"]
+            for (module, direction), total in sorted(self.bytes.items()):
+                lines.append(f"trespax_bytes_total{labels(target=target, module=module, direction=direction)} {total}")
+
+            lines += ["# HELP trespax_latency_seconds Latency of network operations by kind.",
+                      "# TYPE trespax_latency_seconds histogram"]
+            for (kind, module), histogram in sorted(self.histograms.items()):
+                for bound, total in histogram.cumulative():
+                    le = "+Inf" if bound == float('inf') else str(bound)
+                    lines.append(f"trespax_latency_seconds_bucket{labels(target=target, module=module, kind=kind, le=le)} {total}")
+                lines.append(f"trespax_latency_seconds_sum{labels(target=target, module=module, kind=kind)} {histogram.sum:.6f}")
+                lines.append(f"trespax_latency_seconds_count{labels(target=target, module=module, kind=kind)} {histogram.count}")
+
+        # Process-wide, shared with every other target of the run
+        cache = dns_cache().stats()
+        for name, help_text in (("hits", "DNS cache lookups answered from the cache."),
+                                ("negative_hits", "DNS cache hits on cached NXDOMAIN/NODATA answers."),
+                                ("misses", "DNS cache lookups that needed a query."),
+                                ("evictions", "DNS cache entries evicted to stay within its size.")):
+            lines += [f"# HELP trespax_dns_cache_{name}_total {help_text}",
+                      f"# TYPE trespax_dns_cache_{name}_total counter",
+                      f"trespax_dns_cache_{name}_total {cache[name]}"]
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir, target):
+        """Write metrics.json and metrics.prom (atomically, for textfile collectors)"""
+        with open(os.path.join(output_dir, self.JSON_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+        path = os.path.join(output_dir, self.PROM_FILE)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(self.prometheus(target))
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import hashlib
+import math
+import re
+
+# Environment and role words combined with the labels of found names
+ENVIRONMENT_WORDS = ('dev', 'development', 'staging', 'stage', 'stg', 'test', 'testing', 'qa', 'uat',
+                     'prod', 'production', 'preprod', 'beta', 'demo', 'sandbox', 'internal', 'int',
+                     'old', 'new', 'v1', 'v2', 'admin', 'api', 'backup')
+
+NUMBER_RANGE = 3   # Numeric labels are tried this far above and below the found number
+
+_DIGITS = re.compile(r'\d+')
+
+
+class _BloomLayer:
+    """One fixed-size bit array, sized for `capacity` items at `error_rate`"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.items = 0
+
+    def contains(self, h1, h2):
+        # Double hashing: position i is h1 + i * h2 (Kirsch-Mitzenmacher);
+        # most absent items stop at the first clear bit
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            p = (h1 + i * h2) % size
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def add(self, h1, h2):
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            p = (h1 + i * h2) % size
+            bits[p >> 3] |= 1 << (p & 7)
+        self.items += 1
+
+
+class BloomFilter:
+    """Set of strings with a bounded false-positive rate, grown as it fills
+
+    The first layer is sized for `capacity` items; each time the newest
+    layer is full another one twice as large is added with half the error
+    rate, so the overall rate stays below 2 * `error_rate` (a scalable
+    bloom filter). Memory follows the items actually added, about 2 bytes
+    each at 0.1%. A false positive makes a new candidate look seen;
+    nothing seen is ever missed.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.error_rate = error_rate
+        self.layers = [_BloomLayer(max(int(capacity), 64), error_rate)]
+        self.count = 0
+
+    @staticmethod
+    def _hashes(item):
+        digest = hashlib.blake2b(item.encode('utf-8', 'replace'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def __contains__(self, item):
+        h1, h2 = self._hashes(item)
+        return any(layer.contains(h1, h2) for layer in self.layers)
+
+    def add(self, item):
+        """Add `item`; returns False if it was (probably) there already"""
+        h1, h2 = self._hashes(item)
+        if any(layer.contains(h1, h2) for layer in self.layers):
+            return False
+        layer = self.layers[-1]
+        if layer.items >= layer.capacity:
+            layer = _BloomLayer(layer.capacity * 2, self.error_rate / 2 ** len(self.layers))
+            self.layers.append(layer)
+        layer.add(h1, h2)
+        self.count += 1
+        return True
+
+
+def _numbers(label):
+    """`label` with each number in it moved up and down by up to NUMBER_RANGE"""
+    for match in _DIGITS.finditer(label):
+        digits = match.group()
+        value = int(digits)
+        for step in range(-NUMBER_RANGE, NUMBER_RANGE + 1):
+            if step and value + step >= 0:
+                number = str(value + step).zfill(len(digits))
+                yield label[:match.start()] + number + label[match.end():]
+
+
+def permutations(relative):
+    """Names derived from `relative`, a found name without the target zone
+
+    For 'api-dev.eu': environment words put around the first label
+    ('staging-api-dev', 'api-dev-staging', 'stagingapi-dev', 'staging.api-dev'),
+    other words in place of an environment part ('api-staging'), numbers
+    moved up and down ('api2' -> 'api1', 'api3'), and dashes and dots
+    swapped ('api.dev', 'api-dev-eu'). Names are generated lazily and may
+    repeat; callers deduplicate.
+    """
+    labels = relative.split('.')
+    first, tail = labels[0], labels[1:]
+
+    def name(*head):
+        return '.'.join(list(head) + tail)
+
+    parts = first.split('-')
+    for word in ENVIRONMENT_WORDS:
+        if word in parts:
+            for other in ENVIRONMENT_WORDS:
+                if other != word and other not in parts:
+                    yield name('-'.join(other if part == word else part for part in parts))
+            continue
+        yield name(f"{word}-{first}")
+        yield name(f"{first}-{word}")
+        yield name(f"{word}{first}")
+        yield name(f"{first}{word}")
+        yield name(word, first)
+
+    for number in _numbers(first):
+        yield name(number)
+    if not _DIGITS.search(first):
+        for number in range(1, NUMBER_RANGE + 1):
+            yield name(f"{first}{number}")
+
+    if len(parts) > 1:
+        yield name(*parts)              # api-dev -> api.dev
+        yield name(''.join(parts))      # api-dev -> apidev
+    if tail:
+        yield '.'.join([f"{first}-{tail[0]}"] + tail[1:])  # api.eu -> api-eu
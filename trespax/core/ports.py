@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+import threading
+from array import array
+from pathlib import Path
+
+MAX_PORT = 65535
+PROTOCOLS = ('tcp', 'udp')
+
+# Bundled nmap-services style table, rows pre-sorted by open-frequency
+DATA_FILE = Path(__file__).resolve().parent.parent / 'data' / 'port-services'
+
+DEFAULT_TOP_PORTS = 100      # Ports scanned when neither --ports nor --top-ports is given
+UNLISTED_FREQUENCY = 1e-6    # Assumed open-frequency of a port missing from the table
+UNKNOWN_SERVICE = 'Unknown'
+
+PROTOCOL_PREFIXES = {'t': 'tcp', 'u': 'udp'}
+
+
+class PortTable:
+    """Frequency-ranked ports of one protocol, kept in flat arrays
+
+    `ports` and `frequencies` hold the listed ports, likeliest first.
+    `rank` maps every port number to its position in that order (unlisted
+    ports rank after all listed ones) and `service` maps it to an index
+    into `names`, so every lookup is an array read and a table costs a few
+    hundred kilobytes whatever the number of rows.
+    """
+
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.ports = array('H')
+        self.frequencies = array('d')
+        self.rank = array('I', [MAX_PORT + 1]) * (MAX_PORT + 1)
+        self.service = array('H', [0]) * (MAX_PORT + 1)
+        self.names = [UNKNOWN_SERVICE]
+        self._name_index = {UNKNOWN_SERVICE: 0}
+
+    def add(self, port, name, frequency):
+        """Append a row (rows must arrive in descending frequency)"""
+        if self.rank[port] <= MAX_PORT:
+            return  # Keep the first, most frequent, entry
+        index = self._name_index.get(name)
+        if index is None:
+            index = self._name_index[name] = len(self.names)
+            self.names.append(name)
+        self.rank[port] = len(self.ports)
+        self.service[port] = index
+        self.ports.append(port)
+        self.frequencies.append(frequency)
+
+    def service_name(self, port):
+        return self.names[self.service[port]]
+
+    def frequency(self, port):
+        rank = self.rank[port]
+        return self.frequencies[rank] if rank <= MAX_PORT else UNLISTED_FREQUENCY
+
+    def ports_for_service(self, name):
+        """Listed ports whose service is `name` (case-insensitive), likeliest first"""
+        name = name.lower()
+        return [port for port in self.ports if self.names[self.service[port]].lower() == name]
+
+    def order(self, ports):
+        """`ports` sorted likeliest-open first; unlisted ports keep their relative order"""
+        return sorted(ports, key=self.rank.__getitem__)
+
+    def top(self, count):
+        """The `count` likeliest ports, filled up with unlisted ports in numeric order"""
+        if count < 1:
+            raise ValueError("--top-ports needs a positive count")
+        if count <= len(self.ports):
+            return self.ports[:count].tolist()
+        listed = self.ports.tolist()
+        rest = (port for port in range(1, MAX_PORT + 1) if self.rank[port] > MAX_PORT)
+        return listed + [port for _, port in zip(range(count - len(listed)), rest)]
+
+    def truncate(self, ports, confidence):
+        """Cut probability-ordered `ports` once they cover `confidence` of the expected open ports
+
+        The expected number of open ports in the selection is the sum of
+        their open-frequencies; scanning stops at the shortest prefix that
+        reaches `confidence` of it. Returns (ports, covered fraction).
+        """
+        frequencies = [self.frequency(port) for port in ports]
+        total = sum(frequencies)
+        if not total or confidence >= 1:
+            return ports, 1.0
+        goal = confidence * total
+        covered = 0.0
+        for count, frequency in enumerate(frequencies, 1):
+            covered += frequency
+            if covered >= goal:
+                return ports[:count], covered / total
+        return ports, 1.0
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def port_database():
+    """{protocol: PortTable} from the bundled table, loaded on first use"""
+    global _database
+    with _database_lock:
+        if _database is None:
+            tables = {protocol: PortTable(protocol) for protocol in PROTOCOLS}
+            with open(DATA_FILE, 'r', encoding='utf-8') as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 3 or fields[0].startswith('#'):
+                        continue
+                    port, _, protocol = fields[1].partition('/')
+                    if protocol in tables:
+                        tables[protocol].add(int(port), fields[0], float(fields[2]))
+            _database = tables
+        return _database
+
+
+def parse_port_spec(spec):
+    """Parse a port spec into {protocol: [ports]}, likeliest-open first
+
+    Parts are port numbers, ranges ('8000-8100', '-1024', '60000-') or
+    service names from the port table ('http', 'ssh'). 'T:' and 'U:'
+    restrict the parts that follow to TCP or UDP until the next prefix;
+    parts before any prefix apply to both. '-' or 'all' is every port.
+    """
+    spec = str(spec).strip().lower()
+    if spec in ('-', 'all'):
+        spec = '1-'
+    database = port_database()
+
+    selected = {protocol: set() for protocol in PROTOCOLS}
+    protocols = PROTOCOLS
+    for part in spec.split(','):
+        part = part.strip()
+        prefix, colon, rest = part.partition(':')
+        if colon:
+            if prefix not in PROTOCOL_PREFIXES:
+                raise ValueError(f"Unknown protocol prefix '{prefix}:' (use T: or U:)")
+            protocols = (PROTOCOL_PREFIXES[prefix],)
+            part = rest.strip()
+        if not part:
+            continue
+
+        if part == 'all':
+            part = '-'
+        if not part.replace('-', '').isdigit() and part != '-':
+            # Service name, e.g. 'http' or 'ms-rpc'
+            found = False
+            for protocol in protocols:
+                ports = database[protocol].ports_for_service(part)
+                selected[protocol].update(ports)
+                found = found or bool(ports)
+            if not found:
+                raise ValueError(f"Unknown port or service '{part}'")
+            continue
+
+        start, dash, end = part.partition('-')
+        try:
+            first = int(start) if start else 1
+            last = (int(end) if end else MAX_PORT) if dash else first
+        except ValueError:
+            raise ValueError(f"Invalid port '{part}'")
+        if not 1 <= first <= last <= MAX_PORT:
+            raise ValueError(f"Invalid port range '{part}' (ports are 1-{MAX_PORT})")
+        for protocol in protocols:
+            selected[protocol].update(range(first, last + 1))
+
+    if not any(selected.values()):
+        raise ValueError(f"No ports in '{spec}'")
+    return {protocol: database[protocol].order(sorted(ports)) for protocol, ports in selected.items()}
+
+
+def parse_ports(spec, protocol='tcp'):
+    """Ports of `protocol` in a port spec (see parse_port_spec), likeliest-open first"""
+    return parse_port_spec(spec)[protocol]
+
+
+def top_ports(count, protocol='tcp'):
+    """The `count` most common ports of `protocol`"""
+    return port_database()[protocol].top(count)
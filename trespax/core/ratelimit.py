@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import asyncio
+import socket
+import threading
+import time
+from trespax.core.dnscache import getaddrinfo
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(max(burst, 1))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Take `tokens` and return how long the caller must wait before using them
+
+        The balance may go negative, so concurrent callers queue up in order
+        instead of all waking at the same moment.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def idle(self):
+        """Check if the bucket is full again (safe to forget)"""
+        with self._lock:
+            refilled = self.tokens + (time.monotonic() - self.updated) * self.rate
+            return refilled >= self.burst
+
+
+# Buckets are shared by every scan in the process, so concurrent targets on
+# the same host or IP draw from the same budget.
+_buckets = {}
+_buckets_lock = threading.Lock()
+_host_ips = {}
+_MAX_HOST_IPS = 100000
+_PRUNE_EVERY = 1000
+_created = 0
+
+
+def _shared_bucket(kind, key, rate, burst):
+    """Get or create the process-wide bucket for (kind, key)"""
+    global _created
+    with _buckets_lock:
+        bucket = _buckets.get((kind, key))
+        if bucket is None or bucket.rate != rate or bucket.burst != max(burst, 1):
+            bucket = TokenBucket(rate, burst)
+            _buckets[(kind, key)] = bucket
+            _created += 1
+            if _created % _PRUNE_EVERY == 0:
+                for stale in [k for k, b in _buckets.items() if b is not bucket and b.idle()]:
+                    del _buckets[stale]
+        return bucket
+
+
+def remember_ip(host, ip):
+    """Record an address already resolved elsewhere so the limiter never looks it up"""
+    if len(_host_ips) >= _MAX_HOST_IPS:
+        _host_ips.clear()
+    _host_ips[host] = ip
+
+
+def _ip_for(host, lookup=True):
+    """Resolve a host to the IP its per-IP bucket is keyed on (cached)
+
+    With `lookup` False only literals and addresses already known are
+    returned; a name nobody resolved yet gives None.
+    """
+    if host in _host_ips:
+        return _host_ips[host]
+    try:
+        socket.inet_pton(socket.AF_INET6 if ':' in host else socket.AF_INET, host)
+        ip = host
+    except (OSError, ValueError):
+        if not lookup:
+            return None
+        try:
+            addresses = getaddrinfo(host)
+            ip = next((address for family, address in addresses if family == socket.AF_INET), addresses[0][1])
+        except Exception:
+            ip = None
+    remember_ip(host, ip)
+    return ip
+
+
+class RateLimiter:
+    """Per-host and per-IP token-bucket limiter for every HTTP, TCP and DNS call
+
+    Limits come from `config.rate_limits` / `config.rate_bursts` (operations
+    per second and burst size per kind; 0 disables a kind). Time spent
+    waiting for tokens is accounted to the module that asked for them.
+    """
+
+    KINDS = ('http', 'tcp', 'udp', 'dns')
+
+    def __init__(self, config):
+        self.limits = dict(config.rate_limits)
+        self.bursts = dict(config.rate_bursts)
+        self.wait_times = {}
+        self.wait_counts = {}
+        self._lock = threading.Lock()
+
+    def _reserve(self, kind, host, count=1, lookup=True):
+        """Reserve `count` tokens from the host bucket and the IP bucket behind it"""
+        rate = self.limits.get(kind, 0)
+        if not rate or not host:
+            return 0.0
+
+        burst = self.bursts.get(kind) or rate
+        delay = _shared_bucket(kind, host, rate, burst).reserve(count)
+
+        if kind != 'dns':
+            ip = _ip_for(host, lookup)
+            if ip and ip != host:
+                delay = max(delay, _shared_bucket(kind, ip, rate, burst).reserve(count))
+        return delay
+
+    def _account(self, module, delay):
+        """Add waiting time to a module's total"""
+        if not delay:
+            return
+        module = module or 'other'
+        with self._lock:
+            self.wait_times[module] = self.wait_times.get(module, 0.0) + delay
+            self.wait_counts[module] = self.wait_counts.get(module, 0) + 1
+
+    def acquire(self, kind, host, module=None, count=1, lookup=True):
+        """Block until `count` `kind` operations against `host` are allowed
+
+        `lookup` False keeps `host` from being resolved for the per-IP
+        bucket, for keys that name a group of servers rather than a host.
+        """
+        delay = self._reserve(kind, host, count, lookup)
+        if delay:
+            time.sleep(delay)
+            self._account(module, delay)
+        return delay
+
+    async def acquire_async(self, kind, host, module=None, count=1):
+        """Wait (without blocking the loop) until `count` `kind` operations are allowed
+
+        getaddrinfo would block the event loop, so the per-IP bucket only
+        applies once the host's address is known (see remember_ip).
+        """
+        delay = self._reserve(kind, host, count, lookup=False)
+        if delay:
+            await asyncio.sleep(delay)
+            self._account(module, delay)
+        return delay
+
+    def summary(self):
+        """Seconds each module spent waiting for tokens"""
+        with self._lock:
+            return {module: round(waited, 2) for module, waited in sorted(self.wait_times.items())}
+
+
+def parse_rate(value):
+    """Parse a KIND=RATE[/BURST] command line value"""
+    kind, _, spec = value.partition('=')
+    kind = kind.strip().lower()
+    if kind not in RateLimiter.KINDS or not spec:
+        raise ValueError(f"Invalid rate '{value}' (expected {'|'.join(RateLimiter.KINDS)}=RATE[/BURST])")
+    rate, _, burst = spec.partition('/')
+    return kind, float(rate), float(burst) if burst else None
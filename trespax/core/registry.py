@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import importlib
+import threading
+
+try:
+    from importlib.metadata import entry_points
+    ENTRY_POINTS_AVAILABLE = True
+except ImportError:
+    ENTRY_POINTS_AVAILABLE = False
+
+
+# Built-in modules in report order, as "package.module:Class". Nothing is
+# imported until a module is actually selected, so a ports-only scan never
+# pays for whois, dnspython, bs4 or requests.
+BUILTIN_MODULES = {
+    'whois': 'trespax.modules.whois_module:WhoisModule',
+    'dns': 'trespax.modules.dns_module:DNSModule',
+    'subdomains': 'trespax.modules.subdomain_module:SubdomainModule',
+    'ports': 'trespax.modules.port_module:PortModule',
+    'directories': 'trespax.modules.directory_module:DirectoryModule',
+    'headers': 'trespax.modules.header_module:HeaderModule',
+    'emails': 'trespax.modules.email_module:EmailModule',
+    'banner': 'trespax.modules.banner_module:BannerModule',
+    'robots': 'trespax.modules.robots_module:RobotsModule',
+    'ssl': 'trespax.modules.ssl_module:SSLModule',
+    'geolocation': 'trespax.modules.geolocation_module:GeolocationModule'
+}
+
+# Third-party packages add modules with an entry point in this group, e.g.
+#   [project.entry-points."trespax.modules"]
+#   shodan = "trespax_shodan:ShodanModule"
+ENTRY_POINT_GROUP = 'trespax.modules'
+
+
+class ModuleRegistry:
+    """Scanning modules declared by name and imported only when selected
+
+    A module class takes `(config, logger)` and provides `run(context)`,
+    plain or async.
+    """
+
+    def __init__(self):
+        self._specs = dict(BUILTIN_MODULES)
+        self._classes = {}
+        self._discovered = False
+        self._lock = threading.Lock()
+
+    def _discover(self):
+        """Add modules published by installed plugins (once)"""
+        with self._lock:
+            if self._discovered:
+                return
+            self._discovered = True
+            if not ENTRY_POINTS_AVAILABLE:
+                return
+
+            try:
+                found = entry_points()
+                plugins = found.select(group=ENTRY_POINT_GROUP) if hasattr(found, 'select') \
+                    else found.get(ENTRY_POINT_GROUP, [])
+            except Exception:
+                return  # Broken metadata must not stop a scan
+
+            for plugin in plugins:
+                # Built-in names cannot be shadowed by a plugin
+                self._specs.setdefault(plugin.name, plugin.value)
+
+    def names(self):
+        """Every available module name, built-ins first"""
+        self._discover()
+        return list(self._specs)
+
+    def load(self, name):
+        """Import and return the class of module `name`"""
+        if name not in self._classes:
+            if name not in self._specs:
+                self._discover()
+            spec = self._specs.get(name)
+            if spec is None:
+                raise KeyError(f"Unknown module: {name}")
+
+            module_path, _, class_name = spec.partition(':')
+            self._classes[name] = getattr(importlib.import_module(module_path), class_name)
+        return self._classes[name]
+
+    def create(self, name, config, logger):
+        """Instantiate module `name`"""
+        return self.load(name)(config, logger)
+
+
+registry = ModuleRegistry()
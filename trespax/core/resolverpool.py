@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import socket
+import threading
+from trespax.core.dnscache import dns_cache
+
+DEFAULT_RTT = 0.1       # Assumed round-trip time of a resolver that has not answered yet
+MIN_TIMEOUT = 0.1       # Floor for a resolver's retransmission timeout
+FAILURE_WEIGHT = 0.05   # Weight of the latest outcome in a resolver's failure rate (EWMA)
+MIN_QUERIES = 20        # Outcomes seen before a resolver can be demoted or evicted
+DEMOTE_FAILURE = 0.3    # Failure rate (timeouts, SERVFAIL) that demotes a resolver
+EVICT_FAILURE = 0.7     # Failure rate that evicts it
+EVICT_DISAGREEMENTS = 3  # Hits contradicted by the other resolvers before a resolver is evicted
+RETRY_DEMOTED = 50      # One pick in this many goes to a demoted resolver so it can recover
+EDNS_PAYLOAD = 1232     # EDNS UDP buffer size (DNS Flag Day 2020: no IP fragmentation)
+
+
+class ResolverHealth:
+    """Running health of one nameserver: latency, failure rate and answer consistency"""
+
+    def __init__(self, address, port=53):
+        self.address = address
+        self.port = port
+        self.state = 'active'
+        self.queries = 0
+        self.timeouts = 0
+        self.servfails = 0
+        self.agreements = 0
+        self.disagreements = 0
+        self.failure = 0.0
+        self.srtt = None
+        self.rttvar = None
+
+    @property
+    def family(self):
+        return socket.AF_INET6 if ':' in self.address else socket.AF_INET
+
+    def rto(self, ceiling):
+        """Retransmission timeout (SRTT + 4 * RTTVAR), capped by `ceiling`"""
+        if self.srtt is None:
+            return ceiling
+        return min(ceiling, max(MIN_TIMEOUT, self.srtt + 4 * self.rttvar))
+
+    @property
+    def score(self):
+        """Expected cost of a query here (lower is better)"""
+        latency = self.srtt if self.srtt is not None else DEFAULT_RTT
+        checked = self.agreements + self.disagreements
+        inconsistency = self.disagreements / checked if checked else 0.0
+        return latency * (1 + 10 * self.failure) * (1 + 10 * inconsistency)
+
+    def to_dict(self):
+        return {
+            "state": self.state,
+            "queries": self.queries,
+            "timeouts": self.timeouts,
+            "servfails": self.servfails,
+            "disagreements": self.disagreements,
+            "failure_rate": round(self.failure, 3),
+            "srtt_ms": round(self.srtt * 1000, 1) if self.srtt is not None else None
+        }
+
+
+class ResolverPool:
+    """Nameservers to spread queries over, ranked by health
+
+    Each pick takes the better of two random active resolvers (by score:
+    latency, weighted up by the recent timeout/SERVFAIL rate and by how
+    often the resolver's hits were contradicted). Resolvers failing more
+    than DEMOTE_FAILURE of their queries are demoted and only get an
+    occasional query to show they recovered; above EVICT_FAILURE, or after
+    EVICT_DISAGREEMENTS contradicted hits, they are evicted. The last
+    usable resolver is never evicted.
+
+    The pool is shared by every module and target in the process (see
+    resolver_pool), so what one scan learns about a resolver sticks.
+    """
+
+    def __init__(self, nameservers):
+        self.resolvers = [ResolverHealth(address, port) for address, port in nameservers]
+        if not self.resolvers:
+            raise ValueError("Resolver pool needs at least one nameserver")
+        self._picks = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.usable)
+
+    @property
+    def usable(self):
+        return [resolver for resolver in self.resolvers if resolver.state != 'evicted']
+
+    def pick(self, exclude=()):
+        """Resolver for the next query, avoiding `exclude` while others are left"""
+        with self._lock:
+            self._picks += 1
+            candidates = self.usable
+            fresh = [resolver for resolver in candidates if resolver not in exclude] or candidates
+            active = [resolver for resolver in fresh if resolver.state == 'active']
+            demoted = [resolver for resolver in fresh if resolver.state == 'demoted']
+            if not active or demoted and self._picks % RETRY_DEMOTED == 0:
+                active = demoted
+            if len(active) == 1:
+                return active[0]
+            first, second = random.sample(active, 2)
+            return first if first.score <= second.score else second
+
+    def record(self, resolver, status, rtt=None):
+        """Feed the outcome of one query ('ok', 'nxdomain', 'servfail', 'refused', 'timeout')"""
+        with self._lock:
+            resolver.queries += 1
+            failed = status in ('timeout', 'servfail', 'refused')
+            if status == 'timeout':
+                resolver.timeouts += 1
+            elif failed:
+                resolver.servfails += 1
+            resolver.failure += FAILURE_WEIGHT * ((1.0 if failed else 0.0) - resolver.failure)
+
+            if rtt is not None:
+                # RFC 6298 estimator; callers only pass first-attempt replies (Karn)
+                if resolver.srtt is None:
+                    resolver.srtt, resolver.rttvar = rtt, rtt / 2
+                else:
+                    resolver.rttvar = 0.75 * resolver.rttvar + 0.25 * abs(resolver.srtt - rtt)
+                    resolver.srtt = 0.875 * resolver.srtt + 0.125 * rtt
+            self._update_state(resolver)
+
+    def agree(self, *resolvers):
+        """Resolvers whose answers matched another resolver's"""
+        with self._lock:
+            for resolver in resolvers:
+                resolver.agreements += 1
+
+    def disagree(self, resolver):
+        """A hit from `resolver` that the other resolvers contradicted"""
+        with self._lock:
+            resolver.disagreements += 1
+            self._update_state(resolver)
+
+    def _update_state(self, resolver):
+        if resolver.state == 'evicted':
+            return
+        state = resolver.state
+        if resolver.disagreements >= EVICT_DISAGREEMENTS:
+            state = 'evicted'
+        elif resolver.queries >= MIN_QUERIES:
+            if resolver.failure >= EVICT_FAILURE:
+                state = 'evicted'
+            elif resolver.failure >= DEMOTE_FAILURE:
+                state = 'demoted'
+            elif resolver.failure < DEMOTE_FAILURE / 2:
+                state = 'active'
+        if state == 'evicted' and len(self.usable) <= 1:
+            state = 'demoted'
+        resolver.state = state
+
+    def ranked(self):
+        """Usable resolvers, healthiest first"""
+        with self._lock:
+            return sorted(self.usable, key=lambda resolver: (resolver.state != 'active', resolver.score))
+
+    def get(self, address):
+        """Resolver with `address`, or None"""
+        return next((resolver for resolver in self.resolvers if resolver.address == address), None)
+
+    def dnspython_resolver(self, timeout, payload=EDNS_PAYLOAD, asynchronous=False):
+        """dnspython Resolver trying the usable nameservers healthiest first
+
+        Queries carry EDNS with a `payload`-byte UDP buffer (0 sends plain
+        512-byte DNS), so large answers such as TXT or DNSKEY sets fit in one
+        datagram; truncated replies are retried over TCP by dnspython.
+        Answers, including NXDOMAIN and NODATA, go through the shared DNS cache.
+        `asynchronous` returns a dns.asyncresolver.Resolver instead.
+        """
+        import dns.nameserver  # Imported on first use
+        import dns.resolver
+
+        if asynchronous:
+            import dns.asyncresolver
+            resolver = dns.asyncresolver.Resolver(configure=False)
+        else:
+            resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = [dns.nameserver.Do53Nameserver(health.address, health.port)
+                                for health in self.ranked()]
+        resolver.lifetime = timeout
+        resolver.cache = dns_cache()
+        if payload:
+            resolver.use_edns(0, 0, payload)
+        return resolver
+
+    def stats(self):
+        with self._lock:
+            return {f"{resolver.address}:{resolver.port}": resolver.to_dict() for resolver in self.resolvers}
+
+
+def parse_nameserver(value, port=53):
+    """(address, port) from '1.1.1.1', '1.1.1.1:5353', '2606:4700::1111' or '[2606:4700::1111]:53'"""
+    value = value.strip()
+    if value.startswith('['):
+        address, _, rest = value[1:].partition(']')
+        if rest.startswith(':'):
+            port = int(rest[1:])
+    elif value.count(':') == 1:
+        address, _, port_text = value.partition(':')
+        port = int(port_text)
+    else:
+        address = value
+    try:
+        socket.inet_pton(socket.AF_INET6 if ':' in address else socket.AF_INET, address)
+    except (OSError, ValueError):
+        raise ValueError(f"Invalid nameserver '{value}' (expected an IP address)")
+    return address, port
+
+
+def parse_resolvers(spec):
+    """Nameservers from a comma-separated list or a file with one per line"""
+    if os.path.isfile(spec):
+        with open(spec, 'r', encoding='utf-8') as f:
+            values = [line.split('#')[0].strip() for line in f]
+    else:
+        values = spec.split(',')
+    nameservers = [parse_nameserver(value) for value in values if value.strip()]
+    if not nameservers:
+        raise ValueError(f"No nameservers in '{spec}'")
+    return nameservers
+
+
+def system_nameservers():
+    """[(address, port)] of dnspython's default resolver, i.e. /etc/resolv.conf"""
+    import dns.resolver  # Imported on first use
+
+    try:
+        resolver = dns.resolver.get_default_resolver()
+    except Exception:
+        return [('127.0.0.1', 53)]
+    servers = []
+    for server in resolver.nameservers:
+        server = str(getattr(server, 'address', server))
+        try:
+            servers.append(parse_nameserver(server, getattr(resolver, 'port', 53)))
+        except ValueError:
+            continue  # DNS-over-HTTPS/TLS entries, not plain UDP
+    return servers or [('127.0.0.1', 53)]
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def resolver_pool(config=None):
+    """Process-wide pool for `config.resolvers` (the system nameservers when unset)"""
+    nameservers = tuple(getattr(config, 'resolvers', None) or system_nameservers())
+    with _pools_lock:
+        pool = _pools.get(nameservers)
+        if pool is None:
+            pool = _pools[nameservers] = ResolverPool(nameservers)
+        return pool
@@ -2,42 +2,42 @@
 
 import os
 import time
-from trespax.modules.whois_module import WhoisModule
-from trespax.modules.dns_module import DNSModule
-from trespax.modules.subdomain_module import SubdomainModule
-from trespax.modules.port_module import PortModule
-from trespax.modules.directory_module import DirectoryModule
-from trespax.modules.header_module import HeaderModule
-from trespax.modules.email_module import EmailModule
-from trespax.modules.banner_module import BannerModule
-from trespax.modules.robots_module import RobotsModule
-from trespax.modules.ssl_module import SSLModule
-from trespax.modules.geolocation_module import GeolocationModule
+from functools import partial
+from trespax.core.checkpoint import CheckpointJournal
+from trespax.core.context import TargetContext
+from trespax.core.engine import Engine
+from trespax.core.registry import registry
+from trespax.core.scheduler import ModuleScheduler
 from trespax.utils.colors import Colors
 
 
 class Scanner:
     """Main scanner class that orchestrates all modules"""
+
+    # Steps that must finish before a module may start. 'resolve' and 'probe'
+    # are internal steps that fill the shared TargetContext once per target.
+    DEPENDENCIES = {
+        'ports': ['resolve'],
+        'banner': ['resolve', 'ports'],
+        'geolocation': ['resolve'],
+        'directories': ['probe'],
+        'headers': ['probe'],
+        'emails': ['probe'],
+        'robots': ['probe']
+    }
+
+    INTERNAL_STEPS = ('resolve', 'probe')
     
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
         self.results = {}
+        self.context = TargetContext(config)
+        self.engine = None
+        self.journal = None
 
-        # Initialize modules
-        self.modules = {
-            'whois': WhoisModule(config, logger),
-            'dns': DNSModule(config, logger),
-            'subdomains': SubdomainModule(config, logger),
-            'ports': PortModule(config, logger),
-            'directories': DirectoryModule(config, logger),
-            'headers': HeaderModule(config, logger),
-            'emails': EmailModule(config, logger),
-            'banner': BannerModule(config, logger),
-            'robots': RobotsModule(config, logger),
-            'ssl': SSLModule(config, logger),
-            'geolocation': GeolocationModule(config, logger)
-        }
+        # Modules are imported and created in run(), only once they are selected
+        self.modules = {}
     
     def select_tools_manual(self):
         """Allow user to manually select tools"""
@@ -46,13 +46,13 @@ class Scanner:
         
         tool_descriptions = {
             'whois': 'WHOIS Lookup - Domain registration information',
-            'dns': 'DNS Enumeration - DNS records (A, AAAA, CNAME, MX, NS, TXT, SOA)',
+            'dns': 'DNS Enumeration - DNS records (A, AAAA, MX, NS, TXT, SOA, SRV, CAA, DNSSEC)',
             'subdomains': 'Subdomain Brute Force - Find subdomains using wordlists',
             'ports': 'Port Scanning - Identify open ports and services',
             'directories': 'Directory Busting - Find hidden directories and files',
             'headers': 'HTTP Header Analysis - Analyze HTTP headers and detect technologies',
             'emails': 'Email & Contact Finder - Extract email addresses from pages',
-            'banner': 'Banner Grabbing - Extract server information and versions',
+            'banner': 'Service Detection - Identify products and versions on open ports',
             'robots': 'Robots.txt & Sitemap Parser - Analyze robots.txt and sitemap.xml',
             'ssl': 'SSL/TLS Analysis - Analyze SSL certificate and configuration',
             'geolocation': 'IP Geolocation - Get geographical location of IP'
@@ -101,6 +101,9 @@ class Scanner:
 
     def show_result_inline(self, module_name, result):
         """Print result of a module on screen"""
+        if self.config.quiet:
+            return
+        
         print(f"\n{Colors.MAGENTA}--- {module_name.upper()} RESULTS ---{Colors.RESET}")
         
         if not result:
@@ -116,41 +119,163 @@ class Scanner:
         else:
             print(f"{Colors.WHITE}{str(result)}{Colors.RESET}")
 
+    async def _run_module(self, module_name, module):
+        """Run a single module, natively if async or through the sync adapter"""
+        if not self.config.quiet:
+            print(f"\n{Colors.CYAN}[*] Running {module_name.upper()} module...{Colors.RESET}")
+        start = time.monotonic()
+        try:
+            return await self.engine.as_async(module).run(self.context)
+        finally:
+            self.context.metrics.module_time(module_name, time.monotonic() - start)
+
+    def _module_completed(self, module_name, result, error):
+        """Record, show and save a module result as soon as it finishes"""
+        if module_name in self.INTERNAL_STEPS:
+            return
+
+        if error:
+            print(f"{Colors.RED}[!] Error in {module_name} module ({self.config.target}): {str(error)}{Colors.RESET}")
+            if self.config.verbose:
+                import traceback
+                traceback.print_exception(type(error), error, error.__traceback__)
+            self.results[module_name] = None
+            self.context.emit('module', module=module_name, status='error', error=str(error))
+            return
+
+        self.results[module_name] = result
+        failed = isinstance(result, dict) and 'error' in result
+        self.context.emit('module', module=module_name, status='error' if failed else 'done')
+        if self.journal:
+            self.journal.module_done(module_name, result)
+
+        self.show_result_inline(module_name, result)
+        self.save_partial_result(module_name, result)
+
+        if result and self.config.verbose:
+            print(f"{Colors.GREEN}[+] {module_name.upper()} completed successfully{Colors.RESET}")
+        elif not result and not self.config.quiet:
+            print(f"{Colors.YELLOW}[!] {module_name.upper()} completed but returned no data{Colors.RESET}")
+
+    def _report_rate_limit_waits(self):
+        """Show and save how long each module waited for rate-limit tokens"""
+        waits = self.context.limiter.summary()
+        if not waits:
+            return
+
+        if not self.config.quiet:
+            print(f"\n{Colors.YELLOW}[*] Time spent waiting for rate limits (summed over concurrent requests):{Colors.RESET}")
+            for module_name, waited in waits.items():
+                print(f"    {module_name}: {waited:.2f}s")
+        self.save_partial_result('rate_limit_waits', waits)
+
+    def _report_metrics(self):
+        """Show per-module timings and write metrics.json / metrics.prom"""
+        metrics = self.context.metrics.to_dict()
+
+        if not self.config.quiet and metrics["module_seconds"]:
+            print(f"\n{Colors.CYAN}[*] Module timings:{Colors.RESET}")
+            for module_name, seconds in metrics["module_seconds"].items():
+                requests = sum(kind["requests"] for kind in metrics["requests"].get(module_name, {}).values())
+                timeouts = sum(kind["timeouts"] for kind in metrics["requests"].get(module_name, {}).values())
+                print(f"    {module_name}: {seconds:.2f}s, {requests} requests, {timeouts} timeouts")
+            cache = metrics["dns_cache"]
+            if cache["hits"] or cache["misses"]:
+                print(f"    DNS cache: {cache['hits']} hits ({cache['negative_hits']} negative), "
+                      f"{cache['misses']} misses, {cache['entries']} entries")
+
+        if self.config.output_dir:
+            try:
+                self.context.metrics.write(self.config.output_dir, self.config.target)
+            except OSError as e:
+                print(f"{Colors.RED}[!] Failed to save metrics: {e}{Colors.RESET}")
+
+    def _restore_module(self, module_name, result):
+        """Reuse a module result recorded by an interrupted run"""
+        self.results[module_name] = result
+        if module_name == 'ports' and isinstance(result, dict):
+            # TCP only, as PortModule.run fills it: BANNER probes these over TCP
+            ports = [str(p).split(' ')[0].split('/') for p in result.get('open_ports', [])]
+            self.context.open_ports = [int(port[0]) for port in ports if port[1:] in ([], ['tcp'])]
+
+        if not self.config.quiet:
+            print(f"\n{Colors.CYAN}[*] {module_name.upper()} already completed in the previous run{Colors.RESET}")
+        self.show_result_inline(module_name, result)
+
+    def _open_journal(self):
+        """Open the checkpoint journal in the output directory (if saving)"""
+        if not self.config.output_dir:
+            return None
+        try:
+            return CheckpointJournal(self.config.output_dir, self.config.target, resume=self.config.resume)
+        except OSError as e:
+            print(f"{Colors.YELLOW}[!] Checkpoint journal disabled: {e}{Colors.RESET}")
+            return None
+
     def run(self):
         """Run the selected scanning modules"""
-        print(f"\n{Colors.BLUE}[*] Starting TresPax scan on target: {self.config.target}{Colors.RESET}")
+        if not self.config.quiet:
+            print(f"\n{Colors.BLUE}[*] Starting TresPax scan on target: {self.config.target}{Colors.RESET}")
 
-        if self.config.use_tor:
-            print(f"{Colors.YELLOW}[*] Using TOR network for anonymity{Colors.RESET}")
+            if self.config.use_tor:
+                print(f"{Colors.YELLOW}[*] Using TOR network for anonymity{Colors.RESET}")
         
         if self.config.manual_mode:
             self.select_tools_manual()
 
         start_time = time.time()
 
+        # Journal finished modules and brute-force progress so the scan can be resumed
+        self.journal = self._open_journal()
+        self.context.checkpoint = self.journal
+        restored = self.journal.modules if self.journal else {}
+
+        module_order = registry.names()
+        for module_name in module_order:
+            if not self.config.selected_tools.get(module_name, False):
+                continue
+            if module_name in restored:
+                self._restore_module(module_name, restored[module_name])
+                continue
+            self.modules[module_name] = registry.create(module_name, self.config, self.logger)
+
+        # One event loop per scan; blocking modules get a thread each through the adapter
+        self.engine = Engine(self.config, blocking_workers=len(self.modules) + 2)
+        self.context.engine = self.engine
+        self.engine.limiter = self.context.limiter
+        self.engine.metrics = self.context.metrics
+
+        # Internal steps run only when a selected module needs them
+        tasks = {}
+        steps = {step for module_name in self.modules for step in self.DEPENDENCIES.get(module_name, [])}
+        for step in self.INTERNAL_STEPS:
+            if step in steps:
+                tasks[step] = partial(self.engine.run_blocking, getattr(self.context, step))
         for module_name, module in self.modules.items():
-            if self.config.selected_tools.get(module_name, True):
-                print(f"\n{Colors.CYAN}[*] Running {module_name.upper()} module...{Colors.RESET}")
-                try:
-                    result = module.run()
-                    self.results[module_name] = result
-
-                    self.show_result_inline(module_name, result)
-                    self.save_partial_result(module_name, result)
-
-                    if result and self.config.verbose:
-                        print(f"{Colors.GREEN}[+] {module_name.upper()} completed successfully{Colors.RESET}")
-                    elif not result:
-                        print(f"{Colors.YELLOW}[!] {module_name.upper()} completed but returned no data{Colors.RESET}")
-                except Exception as e:
-                    print(f"{Colors.RED}[!] Error in {module_name} module: {str(e)}{Colors.RESET}")
-                    if self.config.verbose:
-                        import traceback
-                        traceback.print_exc()
-                    self.results[module_name] = None
+            tasks[module_name] = partial(self._run_module, module_name, module)
+
+        self.context.emit('scan_start', modules=[name for name in tasks if name not in self.INTERNAL_STEPS])
+
+        # Independent modules run side by side; results still stream in as each one finishes
+        scheduler = ModuleScheduler(self.DEPENDENCIES)
+        try:
+            self.engine.run(scheduler.run(tasks, self._module_completed))
+        except BaseException:
+            if self.journal:
+                self.journal.close()
+            raise
+        if self.journal:
+            self.journal.finish()
+
+        # Keep report order stable regardless of completion order
+        self.results = {name: self.results[name] for name in module_order if name in self.results}
 
         end_time = time.time()
         duration = end_time - start_time
-        print(f"\n{Colors.GREEN}[+] Scan completed in {duration:.2f} seconds{Colors.RESET}")
+        self._report_rate_limit_waits()
+        self._report_metrics()
+        self.context.emit('scan_finish', duration=round(duration, 2))
+        if not self.config.quiet:
+            print(f"\n{Colors.GREEN}[+] Scan completed in {duration:.2f} seconds{Colors.RESET}")
 
         return self.results
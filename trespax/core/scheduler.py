@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import asyncio
+
+
+class ModuleScheduler:
+    """Run scan tasks concurrently, waiting only on declared dependencies"""
+
+    def __init__(self, dependencies=None):
+        self.dependencies = dependencies or {}
+
+    async def run(self, tasks, on_complete):
+        """Run every task in `tasks` (name -> coroutine function) and report each as it finishes
+
+        `on_complete(name, result, error)` is called on the event loop thread,
+        so output and file writes never interleave between modules.
+        Dependencies on tasks that were not selected are ignored.
+        """
+        deps = {
+            name: [d for d in self.dependencies.get(name, []) if d in tasks]
+            for name in tasks
+        }
+        self._check_cycles(deps)
+
+        finished = {name: asyncio.Event() for name in tasks}
+
+        async def run_task(name, task):
+            for dep in deps[name]:
+                await finished[dep].wait()
+
+            try:
+                result, error = await task(), None
+            except Exception as e:
+                result, error = None, e
+
+            try:
+                on_complete(name, result, error)
+            finally:
+                finished[name].set()
+
+        await asyncio.gather(*(run_task(name, task) for name, task in tasks.items()))
+
+    def _check_cycles(self, deps):
+        """Refuse dependency graphs that could never finish"""
+        remaining = dict(deps)
+        while remaining:
+            ready = [name for name, needs in remaining.items() if not any(n in remaining for n in needs)]
+            if not ready:
+                raise ValueError(f"Circular module dependencies: {', '.join(remaining)}")
+            for name in ready:
+                del remaining[name]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.utils import select_proxy
+from trespax.core.dnscache import getaddrinfo
+
+# Modules probe with verify=False; imported only once a scan actually needs HTTP
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class CachedDnsAdapter(HTTPAdapter):
+    """HTTPAdapter that connects to addresses from the shared DNS cache
+
+    Connection pools are keyed by the resolved address, while the Host
+    header, SNI and certificate check keep the name. Requests going through
+    a proxy are left alone, so the proxy (e.g. TOR) resolves the name
+    itself and nothing leaks to the local resolver.
+    """
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        if select_proxy(request.url, proxies):
+            return super().get_connection_with_tls_context(request, verify, proxies, cert)
+        host_params, pool_kwargs = self.build_connection_pool_key_attributes(request, verify, cert)
+        address = self._address(host_params["host"])
+        if address:
+            if host_params["scheme"] == "https":
+                pool_kwargs["server_hostname"] = host_params["host"]
+            host_params["host"] = address
+        return self.poolmanager.connection_from_host(**host_params, pool_kwargs=pool_kwargs)
+
+    def add_headers(self, request, **kwargs):
+        # The connection's host may be an address now; the server wants the name.
+        # Redirects resend a copy of the request, so this is set again for every hop
+        request.headers["Host"] = urlsplit(request.url).netloc.rpartition("@")[2]
+
+    @staticmethod
+    def _address(host):
+        """Cached address of `host` (IPv4 first), or None for literals and failures"""
+        try:
+            ipaddress.ip_address(host.strip("[]"))
+            return None
+        except ValueError:
+            pass
+        try:
+            addresses = getaddrinfo(host)
+        except OSError:
+            return None  # Let the connection attempt report it
+        return next((address for family, address in addresses if family == socket.AF_INET), addresses[0][1])
+
+
+class RateLimitedSession(requests.Session):
+    """requests.Session whose every request first takes an 'http' token
+
+    Names are resolved through the shared DNS cache (see CachedDnsAdapter).
+
+    When metrics are given, each request's time to first byte (requests'
+    `elapsed`, measured up to the parsed response headers), timeouts and
+    body size are recorded for the session's module.
+    """
+
+    def __init__(self, limiter=None, module=None, metrics=None):
+        super().__init__()
+        self.mount('http://', CachedDnsAdapter())
+        self.mount('https://', CachedDnsAdapter())
+        self.limiter = limiter
+        self.module = module
+        self.metrics = metrics
+
+    def request(self, method, url, *args, **kwargs):
+        if self.limiter:
+            self.limiter.acquire('http', urlsplit(url).hostname, self.module)
+        if not self.metrics:
+            return super().request(method, url, *args, **kwargs)
+
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.exceptions.Timeout:
+            self.metrics.timeout('http_ttfb', self.module)
+            raise
+        except requests.exceptions.RequestException:
+            self.metrics.error('http_ttfb', self.module)
+            raise
+
+        self.metrics.observe('http_ttfb', response.elapsed.total_seconds(), self.module)
+        if not kwargs.get('stream'):
+            self.metrics.transferred(self.module, received=len(response.content))
+        return response
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+import ipaddress
+import os
+import random
+import socket
+import struct
+import threading
+import time
+
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+# MSS option, so probes look like an ordinary connection attempt
+TCP_OPTIONS = b'\x02\x04\x05\xb4'
+
+
+def syn_scan_available(target_ip):
+    """Check if a SYN scan of `target_ip` can run here (root, raw sockets, IPv4)"""
+    if not hasattr(os, 'geteuid') or os.geteuid() != 0:
+        return False
+    try:
+        if ipaddress.ip_address(target_ip).version != 4:
+            return False
+        socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP).close()
+        return True
+    except (ValueError, OSError):
+        return False
+
+
+def _checksum(data):
+    """Internet checksum (RFC 1071)"""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def _source_ip(target_ip):
+    """Local address the kernel routes `target_ip` through"""
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.connect((target_ip, 9))
+        return probe.getsockname()[0]
+    finally:
+        probe.close()
+
+
+class SynScanner:
+    """Half-open TCP scan of one IPv4 host over raw sockets
+
+    SYNs are sent from a single source port in random port order, paced by
+    the rate limiter's 'tcp' bucket (so `--rate tcp=N` sets the packet
+    rate). A separate thread reads replies: SYN-ACK means open (the kernel
+    answers it with a RST, so no connection is ever completed), RST means
+    closed. Replies are matched by the sequence number, which encodes the
+    probed port under a per-scan secret. Unanswered ports are re-sent
+    `retries` times, then reported as filtered.
+    """
+
+    def __init__(self, target_ip, ports, timeout=1.0, retries=1, limiter=None, metrics=None, module='ports'):
+        self.target_ip = target_ip
+        self.ports = list(ports)
+        self.timeout = timeout
+        self.retries = retries
+        self.limiter = limiter
+        self.metrics = metrics
+        self.module = module
+
+        self.source_ip = _source_ip(target_ip)
+        self.source_port = random.randint(40000, 60999)
+        self.secret = random.getrandbits(32)
+        self.states = {}
+        self._sent_at = {}
+        self._wanted = set(self.ports)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pseudo = socket.inet_aton(self.source_ip) + socket.inet_aton(target_ip)
+
+    def _sequence(self, port):
+        """Per-port initial sequence number (validates replies)"""
+        return (self.secret ^ (port * 2654435761)) & 0xffffffff
+
+    def _packet(self, port):
+        """TCP SYN segment for `port` (the kernel adds the IP header)"""
+        offset = (5 + len(TCP_OPTIONS) // 4) << 4
+        header = struct.pack('!HHIIBBHHH', self.source_port, port, self._sequence(port), 0,
+                             offset, TCP_SYN, 1024, 0, 0) + TCP_OPTIONS
+        pseudo = self._pseudo + struct.pack('!BBH', 0, socket.IPPROTO_TCP, len(header))
+        checksum = _checksum(pseudo + header)
+        return header[:16] + struct.pack('!H', checksum) + header[18:]
+
+    def scan(self):
+        """Run the scan and return {port: 'open' | 'closed' | 'filtered'}"""
+        sender = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        receiver.settimeout(0.1)
+        receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+        listener = threading.Thread(target=self._receive, args=(receiver,), daemon=True)
+        listener.start()
+
+        try:
+            for attempt in range(self.retries + 1):
+                with self._lock:
+                    unanswered = [port for port in self.ports if port not in self.states]
+                if not unanswered:
+                    break
+                random.shuffle(unanswered)
+
+                for port in unanswered:
+                    if self.limiter:
+                        self.limiter.acquire('tcp', self.target_ip, self.module)
+                    if attempt and self.metrics:
+                        self.metrics.retry('tcp_syn', self.module)
+                    with self._lock:
+                        self._sent_at[port] = time.monotonic()
+                    try:
+                        sender.sendto(self._packet(port), (self.target_ip, 0))
+                    except OSError:
+                        if self.metrics:
+                            self.metrics.error('tcp_syn', self.module)
+
+                self._wait_for_replies()
+        finally:
+            self._stop.set()
+            listener.join()
+            sender.close()
+            receiver.close()
+
+        with self._lock:
+            for port in self.ports:
+                if port not in self.states:
+                    self.states[port] = 'filtered'
+                    if self.metrics:
+                        self.metrics.timeout('tcp_syn', self.module)
+            return dict(self.states)
+
+    def _wait_for_replies(self):
+        """Wait until every port answered or the timeout passed since the last send"""
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if len(self.states) >= len(self._wanted):
+                    return
+            time.sleep(0.01)
+
+    def _receive(self, receiver):
+        """Match SYN-ACK / RST replies to probes (runs on its own thread)"""
+        target = socket.inet_aton(self.target_ip)
+        while not self._stop.is_set():
+            try:
+                packet = receiver.recv(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            ihl = (packet[0] & 0x0f) * 4
+            if len(packet) < ihl + 20 or packet[9] != socket.IPPROTO_TCP or packet[12:16] != target:
+                continue
+            port, destination, _, ack = struct.unpack('!HHII', packet[ihl:ihl + 12])
+            flags = packet[ihl + 13]
+            if destination != self.source_port or port not in self._wanted:
+                continue
+            if ack != (self._sequence(port) + 1) & 0xffffffff:
+                continue  # Not a reply to our probe
+
+            if flags & TCP_SYN and flags & TCP_ACK:
+                state = 'open'
+            elif flags & TCP_RST:
+                state = 'closed'
+            else:
+                continue
+
+            with self._lock:
+                if port in self.states:
+                    continue
+                self.states[port] = state
+                sent = self._sent_at.get(port)
+            if self.metrics and sent:
+                self.metrics.observe('tcp_syn', time.monotonic() - sent, self.module)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import ipaddress
+import sys
+
+
+def expand_target(target):
+    """Yield the hosts behind a single target (CIDR ranges are expanded lazily)"""
+    target = target.strip()
+    if not target or target.startswith('#'):
+        return
+
+    if '/' in target and not target.startswith(('http://', 'https://')):
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            yield target
+            return
+
+        if network.num_addresses == 1:
+            yield str(network.network_address)
+        else:
+            # hosts() is a generator, so a /8 never sits in memory
+            for host in network.hosts():
+                yield str(host)
+        return
+
+    yield target
+
+
+def iter_target_file(path, stdin_copy=None):
+    """Yield targets from a file, one per line ('-' reads stdin)
+
+    Lines read from stdin are appended to `stdin_copy` (when given) so a
+    resumed run can replay them.
+    """
+    if path == '-':
+        copy = open(stdin_copy, 'a', encoding='utf-8') if stdin_copy else None
+        try:
+            for line in sys.stdin:
+                if copy:
+                    copy.write(line if line.endswith('\n') else line + '\n')
+                    copy.flush()
+                yield from expand_target(line)
+        finally:
+            if copy:
+                copy.close()
+        return
+
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            yield from expand_target(line)
+
+
+def iter_targets(targets=None, target_files=None, stdin_copy=None):
+    """Yield every target from command line targets and target files, in order"""
+    for target in targets or []:
+        yield from expand_target(target)
+
+    for path in target_files or []:
+        yield from iter_target_file(path, stdin_copy)
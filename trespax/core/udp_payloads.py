@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Protocol payloads for UDP scanning
+
+Most UDP services ignore an empty datagram, so a port only answers (and
+shows up as open) when it receives a request its protocol understands.
+`udp_payload(port)` returns the probe for a well-known port, or an empty
+datagram for anything else.
+"""
+
+import struct
+
+
+def _ber(tag, body):
+    """BER type-length-value (short and long length forms)"""
+    length = len(body)
+    if length < 0x80:
+        return bytes([tag, length]) + body
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([tag, 0x80 | len(encoded)]) + encoded + body
+
+
+def _ber_int(value):
+    return _ber(0x02, value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big'))
+
+
+def _dns_name(name):
+    return b''.join(bytes([len(label)]) + label.encode() for label in name.split('.')) + b'\x00'
+
+
+def _dns_query(name, qtype, qclass, query_id=0x5450, flags=0x0100):
+    return struct.pack('!HHHHHH', query_id, flags, 1, 0, 0, 0) + _dns_name(name) + struct.pack('!HH', qtype, qclass)
+
+
+def _snmp_get(community=b'public'):
+    """SNMPv1 GetRequest for sysDescr.0"""
+    sys_descr = _ber(0x06, bytes([0x2b, 6, 1, 2, 1, 1, 1, 0]))
+    varbinds = _ber(0x30, _ber(0x30, sys_descr + b'\x05\x00'))
+    pdu = _ber(0xa0, _ber_int(0x5450) + _ber_int(0) + _ber_int(0) + varbinds)
+    return _ber(0x30, _ber_int(0) + _ber(0x04, community) + pdu)
+
+
+def _ike_main_mode():
+    """IKEv1 main mode SA proposal (3DES/SHA1/PSK/MODP1024), answered by any IKE daemon"""
+    attributes = b''.join(struct.pack('!HH', 0x8000 | kind, value)
+                          for kind, value in ((1, 5), (2, 2), (3, 1), (4, 2), (11, 1), (12, 28800)))
+    transform = struct.pack('!BBHBBH', 0, 0, 8 + len(attributes), 1, 1, 0) + attributes
+    proposal = struct.pack('!BBHBBBB', 0, 0, 8 + len(transform), 1, 1, 0, 1) + transform
+    sa = struct.pack('!BBHII', 0, 0, 12 + len(proposal), 1, 1) + proposal
+    header = b'TresPax!' + bytes(8) + struct.pack('!BBBBII', 1, 0x10, 2, 0, 0, 28 + len(sa))
+    return header + sa
+
+
+def _netbios_status():
+    """NetBIOS NBSTAT query for the wildcard name '*'"""
+    name = b'*' + bytes(15)
+    encoded = bytes(c for byte in name for c in (0x41 + (byte >> 4), 0x41 + (byte & 0x0f)))
+    return struct.pack('!HHHHHH', 0x5450, 0, 1, 0, 0, 0) + b'\x20' + encoded + b'\x00' + struct.pack('!HH', 0x21, 1)
+
+
+def _sunrpc_null(program=100000, version=2):
+    """ONC RPC NULL call (portmapper by default)"""
+    return struct.pack('!IIIIIIIIII', 0x54504158, 0, 2, program, version, 0, 0, 0, 0, 0)
+
+
+def _slp_service_request():
+    """SLPv2 request for directory agents"""
+    body = b''.join(struct.pack('!H', len(field)) + field
+                    for field in (b'', b'service:directory-agent', b'default', b'', b''))
+    header_length = 14 + 2
+    length = header_length + len(body)
+    return (struct.pack('!BB', 2, 1) + length.to_bytes(3, 'big') + b'\x00\x00' + bytes(3)
+            + struct.pack('!HH', 0x5450, 2) + b'en' + body)
+
+
+def _quic_version_probe():
+    """QUIC Initial with a reserved version, so the server replies with Version Negotiation"""
+    packet = b'\xc0' + struct.pack('!I', 0x0a0a0a0a) + b'\x08TresPax!' + b'\x00'
+    return packet + bytes(1200 - len(packet))  # Servers drop Initials under 1200 bytes
+
+
+SSDP_DISCOVER = (b'M-SEARCH * HTTP/1.1\r\n'
+                 b'HOST: 239.255.255.250:1900\r\n'
+                 b'MAN: "ssdp:discover"\r\n'
+                 b'MX: 1\r\n'
+                 b'ST: ssdp:all\r\n\r\n')
+
+SIP_OPTIONS = (b'OPTIONS sip:nm SIP/2.0\r\n'
+               b'Via: SIP/2.0/UDP nm;branch=z9hG4bK5450;rport\r\n'
+               b'From: <sip:nm@nm>;tag=5450\r\n'
+               b'To: <sip:nm2@nm2>\r\n'
+               b'Call-ID: 5450@nm\r\n'
+               b'CSeq: 42 OPTIONS\r\n'
+               b'Max-Forwards: 70\r\n'
+               b'Content-Length: 0\r\n'
+               b'Contact: <sip:nm@nm>\r\n'
+               b'Accept: application/sdp\r\n\r\n')
+
+WS_DISCOVERY_PROBE = (b'<?xml version="1.0" encoding="utf-8"?>'
+                      b'<soap:Envelope xmlns:soap="http://www.w3.org/2003/05/soap-envelope" '
+                      b'xmlns:wsa="http://schemas.xmlsoap.org/ws/2004/08/addressing" '
+                      b'xmlns:wsd="http://schemas.xmlsoap.org/ws/2005/04/discovery">'
+                      b'<soap:Header>'
+                      b'<wsa:To>urn:schemas-xmlsoap-org:ws:2005:04:discovery</wsa:To>'
+                      b'<wsa:Action>http://schemas.xmlsoap.org/ws/2005/04/discovery/Probe</wsa:Action>'
+                      b'<wsa:MessageID>urn:uuid:54504158-0000-4000-8000-000000005450</wsa:MessageID>'
+                      b'</soap:Header>'
+                      b'<soap:Body><wsd:Probe/></soap:Body>'
+                      b'</soap:Envelope>')
+
+# Any datagram gets an answer from the simple inetd services
+ANY_DATAGRAM = b'\r\n'
+
+PAYLOADS = {
+    7: ANY_DATAGRAM,                                                  # echo
+    13: ANY_DATAGRAM,                                                 # daytime
+    17: ANY_DATAGRAM,                                                 # qotd
+    19: ANY_DATAGRAM,                                                 # chargen
+    53: _dns_query('version.bind', 16, 3),                            # DNS, TXT CH
+    111: _sunrpc_null(),                                              # rpcbind
+    123: b'\xe3' + bytes(47),                                         # NTP v4 client request
+    137: _netbios_status(),                                           # NetBIOS name service
+    161: _snmp_get(),                                                 # SNMP
+    177: b'\x00\x01\x00\x02\x00\x01\x00',                             # XDMCP Query
+    427: _slp_service_request(),                                      # SLP
+    443: _quic_version_probe(),                                       # QUIC
+    500: _ike_main_mode(),                                            # IKE
+    520: b'\x01\x02\x00\x00' + bytes(16) + b'\x00\x00\x00\x10',       # RIPv2 full table request
+    623: b'\x06\x00\xff\x06\x00\x00\x11\xbe\x80\x00\x00\x00',         # IPMI RMCP presence ping
+    1194: b'\x38TresPax!\x00\x00\x00\x00\x00',                        # OpenVPN hard reset
+    1434: b'\x02',                                                    # MSSQL browser
+    1604: b'\x1e\x00\x01\x30\x02\xfd\xa8\xe3' + bytes(22),            # Citrix ICA browser
+    1900: SSDP_DISCOVER,                                              # SSDP
+    2049: _sunrpc_null(100003, 3),                                    # NFS
+    3478: struct.pack('!HHI', 1, 0, 0x2112a442) + b'TresPaxStun!',    # STUN binding request
+    3702: WS_DISCOVERY_PROBE,                                         # WS-Discovery
+    4500: bytes(4) + _ike_main_mode(),                                # IKE over NAT-T (non-ESP marker)
+    5060: SIP_OPTIONS,                                                # SIP
+    5351: b'\x00\x00',                                                # NAT-PMP external address
+    5353: _dns_query('_services._dns-sd._udp.local', 12, 1, 0, 0),    # mDNS service enumeration
+    5683: b'\x40\x01\x54\x50\xbb.well-known\x04core',                 # CoAP GET /.well-known/core
+    10001: b'\x01\x00\x00\x00',                                       # Ubiquiti discovery
+    11211: b'\x54\x50\x00\x00\x00\x01\x00\x00stats\r\n',              # memcached
+    27015: b'\xff\xff\xff\xffTSource Engine Query\x00',               # Source engine
+}
+
+
+def udp_payload(port):
+    """Probe datagram for `port` (empty for ports without a known protocol)"""
+    return PAYLOADS.get(port, b'')
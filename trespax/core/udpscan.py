@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+import asyncio
+import errno
+import socket
+import struct
+import time
+from trespax.core.udp_payloads import udp_payload
+
+# Linux extended socket errors (ip(7) IP_RECVERR, ipv6(7) IPV6_RECVERR)
+IP_RECVERR = getattr(socket, 'IP_RECVERR', 11)
+IPV6_RECVERR = getattr(socket, 'IPV6_RECVERR', 25)
+MSG_ERRQUEUE = getattr(socket, 'MSG_ERRQUEUE', 0x2000)
+SO_EE_ORIGIN_ICMP = 2
+SO_EE_ORIGIN_ICMP6 = 3
+ICMP_UNREACHABLE, ICMP_PORT_UNREACHABLE = 3, 3
+ICMP6_UNREACHABLE, ICMP6_PORT_UNREACHABLE = 1, 4
+
+SEND_BATCH = 64     # Datagrams sent per rate-limit reservation
+MIN_TIMEOUT = 0.05  # Floor for the adaptive retransmission timeout
+
+
+class UdpScanner:
+    """UDP scan of any number of (ip, port) probes on the event loop
+
+    One non-blocking socket per address family carries every probe: sends
+    go out in batches of `SEND_BATCH` datagrams per rate-limit reservation
+    (the 'udp' bucket), and a reader callback matches replies to probes by
+    their (ip, port) source. ICMP errors come back on the socket's error
+    queue (Linux IP_RECVERR), which names the probe that caused them, so
+    port-unreachable marks a port closed and other unreachables mark it
+    filtered. Ports that never answer are `open|filtered`: UDP services
+    often drop requests they do not understand.
+
+    Probes are retransmitted `retries` times. The wait for replies follows
+    the observed round-trip times (SRTT + 4 * RTTVAR, as in TCP's RTO), so a
+    fast host is not held to the full `timeout`, which stays the ceiling.
+    """
+
+    def __init__(self, targets, ports, timeout=1.0, retries=1, limiter=None, metrics=None, module='ports'):
+        self.targets = list(targets)
+        self.ports = list(ports)
+        self.timeout = timeout
+        self.retries = retries
+        self.limiter = limiter
+        self.metrics = metrics
+        self.module = module
+
+        self.states = {}
+        self._wanted = set()
+        self._sent_at = {}
+        self._resent = set()
+        self._sockets = {}
+        self._srtt = None
+        self._rttvar = None
+
+    @property
+    def rto(self):
+        """Current retransmission timeout"""
+        if self._srtt is None:
+            return self.timeout
+        return min(self.timeout, max(MIN_TIMEOUT, self._srtt + 4 * self._rttvar))
+
+    def _sample_rtt(self, key):
+        """Update the RTT estimate (RFC 6298) from the probe `key` just answered"""
+        sent = self._sent_at.get(key)
+        if sent is None or key in self._resent:
+            return  # Karn: a retransmitted probe's reply cannot be timed
+        rtt = time.monotonic() - sent
+        if self._srtt is None:
+            self._srtt, self._rttvar = rtt, rtt / 2
+        else:
+            self._rttvar = 0.75 * self._rttvar + 0.25 * abs(self._srtt - rtt)
+            self._srtt = 0.875 * self._srtt + 0.125 * rtt
+        if self.metrics:
+            self.metrics.observe('udp', rtt, self.module)
+
+    def _socket(self, family):
+        """Non-blocking socket for `family`, with extended errors switched on"""
+        sock = self._sockets.get(family)
+        if sock is None:
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            try:
+                if family == socket.AF_INET6:
+                    sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+                else:
+                    sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+            except OSError:
+                pass  # Not Linux: ICMP errors are not visible, closed ports look open|filtered
+            asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable, sock)
+            self._sockets[family] = sock
+        return sock
+
+    async def scan(self):
+        """Run the scan and return {(ip, port): 'open' | 'closed' | 'filtered' | 'open|filtered'}"""
+        # Port-major order spreads consecutive probes over the hosts
+        probes = [(ip, port) for port in self.ports for ip in self.targets]
+        self._wanted = set(probes)
+        try:
+            for attempt in range(self.retries + 1):
+                unanswered = [key for key in probes if key not in self.states]
+                if not unanswered:
+                    break
+                if attempt:
+                    self._resent.update(unanswered)
+                    if self.metrics:
+                        for _ in unanswered:
+                            self.metrics.retry('udp', self.module)
+                await self._send(unanswered)
+                await self._wait_for_replies()
+        finally:
+            loop = asyncio.get_running_loop()
+            for sock in self._sockets.values():
+                loop.remove_reader(sock.fileno())
+                sock.close()
+            self._sockets = {}
+
+        for key in probes:
+            if key not in self.states:
+                self.states[key] = 'open|filtered'
+                if self.metrics:
+                    self.metrics.timeout('udp', self.module)
+        return self.states
+
+    async def _send(self, probes):
+        """Send `probes` in rate-limited batches"""
+        sent_bytes = 0
+        for offset in range(0, len(probes), SEND_BATCH):
+            batch = probes[offset:offset + SEND_BATCH]
+            if self.limiter:
+                await self.limiter.acquire_async('udp', batch[0][0], self.module, count=len(batch))
+            for ip, port in batch:
+                if (ip, port) in self.states:
+                    continue
+                payload = udp_payload(port)
+                sock = self._socket(socket.AF_INET6 if ':' in ip else socket.AF_INET)
+                self._sent_at[(ip, port)] = time.monotonic()
+                refused = False
+                while True:
+                    try:
+                        sock.sendto(payload, (ip, port))
+                        sent_bytes += len(payload)
+                        break
+                    except BlockingIOError:
+                        await asyncio.sleep(0.001)  # Send buffer full, let the NIC drain it
+                    except OSError as e:
+                        if e.errno == errno.ECONNREFUSED and not refused:
+                            # A queued ICMP error from an earlier probe surfaced on
+                            # send; it is consumed now, so the probe gets one more try
+                            refused = True
+                            continue
+                        if e.errno in (errno.EHOSTUNREACH, errno.ENETUNREACH):
+                            self.states[(ip, port)] = 'filtered'  # No route: retrying cannot help
+                        if self.metrics:
+                            self.metrics.error('udp', self.module)
+                        break
+            await asyncio.sleep(0)  # Let the reader drain replies between batches
+        if self.metrics and sent_bytes:
+            self.metrics.transferred(self.module, sent=sent_bytes)
+
+    async def _wait_for_replies(self):
+        """Wait until every probe answered or one RTO passed since the last send"""
+        deadline = time.monotonic() + self.rto
+        while time.monotonic() < deadline:
+            if len(self.states) >= len(self._wanted):
+                return
+            await asyncio.sleep(min(0.01, self.rto / 4))
+
+    def _on_readable(self, sock):
+        """Drain datagrams and queued ICMP errors (event loop reader callback)"""
+        received = 0
+        while True:
+            try:
+                data, address = sock.recvfrom(65535)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno in (errno.ECONNREFUSED, errno.EHOSTUNREACH, errno.ENETUNREACH):
+                    continue  # Pending ICMP error reported here first; read it from the error queue below
+                break
+            key = (address[0], address[1])
+            received += len(data)
+            if key in self._wanted and self.states.get(key) != 'open':
+                if key not in self.states:
+                    self._sample_rtt(key)
+                self.states[key] = 'open'
+        if received and self.metrics:
+            self.metrics.transferred(self.module, received=received)
+
+        while True:
+            try:
+                _, ancillary, _, address = sock.recvmsg(512, 512, MSG_ERRQUEUE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            if not address:
+                continue
+            key = (address[0], address[1])
+            for _, _, data in ancillary:
+                if len(data) < 8 or key not in self._wanted or key in self.states:
+                    continue
+                _, origin, icmp_type, icmp_code, _ = struct.unpack('=IBBBB', data[:8])
+                state = self._icmp_state(origin, icmp_type, icmp_code)
+                if state:
+                    self._sample_rtt(key)
+                    self.states[key] = state
+
+    @staticmethod
+    def _icmp_state(origin, icmp_type, icmp_code):
+        """Port state an ICMP error implies (None if it says nothing about the port)"""
+        if origin == SO_EE_ORIGIN_ICMP and icmp_type == ICMP_UNREACHABLE:
+            return 'closed' if icmp_code == ICMP_PORT_UNREACHABLE else 'filtered'
+        if origin == SO_EE_ORIGIN_ICMP6 and icmp_type == ICMP6_UNREACHABLE:
+            return 'closed' if icmp_code == ICMP6_PORT_UNREACHABLE else 'filtered'
+        return None
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+
+import asyncio
+import re
+import ssl
+import threading
+import time
+from pathlib import Path
+
+# Bundled nmap-service-probes style database
+DATA_FILE = Path(__file__).resolve().parent.parent / 'data' / 'service-probes'
+
+DEFAULT_INTENSITY = 7    # Probes with a higher rarity only run on their own ports
+IDLE_AFTER_DATA = 0.5    # Stop reading this long after the last chunk if nothing matched
+MAX_RESPONSE = 16384     # Bytes of a reply kept for matching
+BANNER_LENGTH = 160      # Characters of the raw reply kept in the result
+
+TEMPLATE_FIELDS = {'p': 'product', 'v': 'version', 'i': 'info', 'h': 'hostname', 'o': 'os', 'd': 'device'}
+_ESCAPES = {'0': 0, 'a': 7, 'b': 8, 'f': 12, 'n': 10, 'r': 13, 't': 9, 'v': 11, '\\': 92}
+_GROUP = re.compile(r'\$P\((\d)\)|\$(\d)')
+
+
+def _unescape(text):
+    """Decode the C-style escapes of a probe payload"""
+    out = bytearray()
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '\\' and i + 1 < len(text):
+            code = text[i + 1]
+            if code == 'x':
+                out.append(int(text[i + 2:i + 4], 16))
+                i += 4
+                continue
+            out.append(_ESCAPES.get(code, ord(code)))
+            i += 2
+            continue
+        out.append(ord(char))
+        i += 1
+    return bytes(out)
+
+
+def _delimited(text, start):
+    """(value, end) of a field such as 'p/OpenSSH/' whose delimiter is text[start]"""
+    delimiter = text[start]
+    end = text.index(delimiter, start + 1)
+    return text[start + 1:end], end + 1
+
+
+def _port_list(text):
+    """Parse '22,80,8000-8010' into a set"""
+    ports = set()
+    for part in text.split(','):
+        start, _, end = part.strip().partition('-')
+        if start:
+            ports.update(range(int(start), int(end or start) + 1))
+    return ports
+
+
+def _first_bytes(pattern, ignore_case):
+    """Bytes a reply must start with for `pattern` to match, or None if unknown
+
+    Only patterns anchored with '^' and followed by a literal (or escaped)
+    byte qualify; anything else could match any reply.
+    """
+    if not pattern.startswith('^') or len(pattern) < 2:
+        return None
+    depth = 0
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return None  # Top-level alternative, the anchor covers one branch only
+
+    rest = pattern[1:]
+    if rest[0] == '\\':
+        code = rest[1:2]
+        if code == 'x':
+            first, length = int(rest[2:4], 16), 4
+        elif code in ('r', 'n', 't', '0'):
+            first, length = _ESCAPES[code], 2
+        elif code and not code.isalnum():
+            first, length = ord(code), 2
+        else:
+            return None  # A character class such as \d or \w
+    elif rest[0] in '([.^$*+?{|':
+        return None
+    else:
+        first, length = ord(rest[0]), 1
+
+    if rest[length:length + 1] in ('?', '*', '{'):
+        return None  # The literal is optional
+    if ignore_case and chr(first).isalpha():
+        return {ord(chr(first).lower()), ord(chr(first).upper())}
+    return {first}
+
+
+class ServiceMatch:
+    """One match or softmatch line: a compiled regex plus its version template"""
+
+    def __init__(self, service, pattern, flags, template, soft=False):
+        self.service = service
+        self.soft = soft
+        ignore_case = 'i' in flags
+        options = (re.IGNORECASE if ignore_case else 0) | (re.DOTALL if 's' in flags else 0)
+        self.regex = re.compile(pattern.encode('latin-1'), options)
+        self.first = _first_bytes(pattern, ignore_case)
+        self.template = template
+
+    def fingerprint(self, found):
+        """Fill the template from a regex match"""
+        result = {"service": self.service}
+        for field, value in self.template.items():
+            value = _GROUP.sub(lambda group: self._group(found, group), value).strip()
+            if value:
+                result[field] = value
+        return result
+
+    @staticmethod
+    def _group(found, group):
+        printable, plain = group.groups()
+        try:
+            value = found.group(int(printable or plain)) or b''
+        except IndexError:
+            return ''
+        text = value.decode('latin-1')
+        if printable:
+            text = ''.join(char for char in text if char.isprintable())
+        return text
+
+
+class ServiceProbe:
+    """A probe payload with the ports it targets and its matches
+
+    After loading, `dispatch[b]` lists (in file order) the matches that can
+    apply to a reply starting with byte `b`, so a reply is only run
+    against the regexes whose literal prefix fits.
+    """
+
+    def __init__(self, name, payload):
+        self.name = name
+        self.payload = payload
+        self.ports = set()
+        self.sslports = set()
+        self.rarity = 1
+        self.totalwait = 5.0
+        self.matches = []
+        self.dispatch = None
+
+    def compile(self):
+        self.dispatch = [[match for match in self.matches if match.first is None or byte in match.first]
+                         for byte in range(256)]
+
+    def match(self, data):
+        """First match for `data` (hard matches win; softmatches are returned when nothing else fits)"""
+        soft = None
+        for match in self.dispatch[data[0]]:
+            found = match.regex.search(data)
+            if not found:
+                continue
+            if not match.soft:
+                return match.fingerprint(found), False
+            if soft is None:
+                soft = match.fingerprint(found)
+        return soft, soft is not None
+
+
+class ServiceProbeDatabase:
+    """Parsed probe database: probes in file order plus the set of TLS ports"""
+
+    def __init__(self, path=DATA_FILE):
+        self.probes = []
+        self.ssl_ports = set()
+        self.null = None
+        self._load(path)
+
+    def _load(self, path):
+        probe = None
+        with open(path, 'r', encoding='latin-1') as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                directive, _, rest = line.partition(' ')
+                try:
+                    if directive == 'Probe':
+                        protocol, name, payload = rest.split(' ', 2)
+                        if protocol != 'TCP':
+                            probe = None
+                            continue
+                        probe = ServiceProbe(name, _unescape(_delimited(payload, 1)[0]))
+                        self.probes.append(probe)
+                        if name == 'NULL':
+                            self.null = probe
+                    elif probe is None:
+                        continue
+                    elif directive == 'ports':
+                        probe.ports = _port_list(rest)
+                    elif directive == 'sslports':
+                        probe.sslports = _port_list(rest)
+                        self.ssl_ports |= probe.sslports
+                    elif directive == 'rarity':
+                        probe.rarity = int(rest)
+                    elif directive == 'totalwaitms':
+                        probe.totalwait = int(rest) / 1000
+                    elif directive in ('match', 'softmatch'):
+                        probe.matches.append(self._parse_match(rest, directive == 'softmatch'))
+                except (ValueError, IndexError, re.error) as e:
+                    raise ValueError(f"{path}:{number}: {e}")
+        for probe in self.probes:
+            probe.compile()
+
+    @staticmethod
+    def _parse_match(text, soft):
+        """Parse '<service> m|regex|flags template...'"""
+        service, _, rest = text.partition(' ')
+        if not rest.startswith('m'):
+            raise ValueError(f"expected m<delim>regex<delim>, got '{rest[:20]}'")
+        pattern, position = _delimited(rest, 1)
+        flags = ''
+        while position < len(rest) and rest[position] in 'si':
+            flags += rest[position]
+            position += 1
+
+        template = {}
+        while position < len(rest):
+            if rest[position] == ' ':
+                position += 1
+                continue
+            if rest.startswith('cpe:', position):
+                value, position = _delimited(rest, position + 4)
+                template.setdefault('cpe', value)
+                position += rest[position:position + 1] == 'a'
+                continue
+            key = rest[position]
+            value, position = _delimited(rest, position + 1)
+            if key in TEMPLATE_FIELDS:
+                template[TEMPLATE_FIELDS[key]] = value
+        return ServiceMatch(service, pattern, flags, template, soft)
+
+    def probes_for(self, port, tls, intensity=DEFAULT_INTENSITY, service=None):
+        """Probes to try on `port`, in order
+
+        Probes made for the port come first, then the NULL probe (banner on
+        connect), then the common probes up to `intensity`. Once a
+        softmatch names the service, only probes that can refine it remain.
+        """
+        def made_for(probe):
+            return port in (probe.sslports if tls else probe.ports)
+
+        def usable(probe):
+            # TLS detection probes are pointless inside TLS
+            return not (tls and probe.matches and all(match.service == 'ssl' for match in probe.matches))
+
+        ordered = [probe for probe in self.probes if made_for(probe) and probe is not self.null]
+        if self.null:
+            ordered.append(self.null)
+        ordered += [probe for probe in self.probes
+                    if probe not in ordered and probe.rarity <= intensity and usable(probe)]
+        if service:
+            ordered = [probe for probe in ordered
+                       if any(match.service == service and not match.soft for match in probe.matches)]
+        return ordered
+
+    def match(self, probe, data):
+        """(fingerprint, soft) for a probe's reply, falling back to the NULL probe's matches"""
+        if not data:
+            return None, False
+        fingerprint, soft = probe.match(data)
+        if (fingerprint is None or soft) and self.null and probe is not self.null:
+            fallback, fallback_soft = self.null.match(data)
+            if fallback and (fingerprint is None or not fallback_soft):
+                return fallback, fallback_soft
+        return fingerprint, soft
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def service_probe_database():
+    """The bundled probe database, parsed and compiled on first use"""
+    global _database
+    with _database_lock:
+        if _database is None:
+            _database = ServiceProbeDatabase()
+        return _database
+
+
+class ServiceDetector:
+    """Identify the service, product and version behind open TCP ports
+
+    Each port is probed on its own connection per probe, in the order of
+    `ServiceProbeDatabase.probes_for`, until a hard match. Known TLS ports
+    are wrapped in TLS from the start; a reply that looks like TLS on any
+    other port (a TLS alert or ServerHello) makes the detector start over
+    on that port over TLS. Ports are probed concurrently, each connection
+    holding one of the engine's in-flight slots.
+    """
+
+    def __init__(self, engine, target_ip, hostname=None, limiter=None, metrics=None,
+                 module='banner', intensity=DEFAULT_INTENSITY, connect_timeout=None):
+        self.engine = engine
+        self.target_ip = target_ip
+        self.hostname = hostname
+        self.limiter = limiter
+        self.metrics = metrics
+        self.module = module
+        self.intensity = intensity
+        self.connect_timeout = connect_timeout or engine.config.timeout
+        self.database = service_probe_database()
+
+    async def detect_all(self, ports):
+        """{port: fingerprint} for every port that accepted a connection"""
+        results = await asyncio.gather(*(self.detect(port) for port in ports))
+        return {port: result for port, result in zip(ports, results) if result is not None}
+
+    async def detect(self, port):
+        """Fingerprint dict for `port`, or None if it no longer accepts connections"""
+        tls = port in self.database.ssl_ports
+        soft = None
+        banner = b''
+        connected = False
+        wrapped_tried = False
+        probes = self.database.probes_for(port, tls, self.intensity)
+
+        while probes:
+            probe = probes.pop(0)
+            status, data = await self._exchange(port, probe, tls)
+            if status == 'refused':
+                break
+            if status == 'tls-failed':
+                # Listed as a TLS port but does not speak TLS: start over in plain text
+                tls = False
+                probes = self.database.probes_for(port, tls, self.intensity)
+                continue
+            if status != 'ok':
+                continue
+            connected = True
+            banner = banner or data
+
+            fingerprint, is_soft = self.database.match(probe, data)
+            if not fingerprint:
+                continue
+            if fingerprint["service"] == 'ssl' and not tls and not wrapped_tried:
+                tls = wrapped_tried = True
+                probes = self.database.probes_for(port, tls, self.intensity)
+                continue
+            if not is_soft:
+                return self._result(fingerprint, probe, tls, data)
+            if soft is None:
+                soft = (fingerprint, probe, data)
+                probes = [p for p in probes
+                          if any(m.service == fingerprint["service"] and not m.soft for m in p.matches)]
+
+        if soft:
+            fingerprint, probe, data = soft
+            return self._result(fingerprint, probe, tls, data)
+        if not connected:
+            return None
+        if not banner:
+            # Accepts connections but never says a word
+            return self._result({"service": "ssl" if tls else "tcpwrapped"}, None, tls, b'')
+        return self._result({"service": None}, None, tls, banner)
+
+    def _result(self, fingerprint, probe, tls, data):
+        """Complete a fingerprint with the probe, tunnel and a printable banner"""
+        result = dict(fingerprint)
+        result["method"] = "probed"
+        if probe:
+            result["probe"] = probe.name
+        if tls:
+            result["tunnel"] = "ssl"
+        if data:
+            text = data[:BANNER_LENGTH].decode('latin-1')
+            result["banner"] = ''.join(char if char.isprintable() else '.' for char in text).strip('.')
+        return result
+
+    async def _exchange(self, port, probe, tls):
+        """Send one probe on a fresh connection; returns (status, reply)
+
+        status is 'ok', 'refused', 'timeout', 'tls-failed' or 'error'.
+        """
+        if self.limiter:
+            await self.limiter.acquire_async('tcp', self.target_ip, self.module)
+        async with self.engine.slots:
+            kind = 'tls_handshake' if tls else 'tcp_connect'
+            start = time.monotonic()
+            try:
+                reader, writer = await self.engine.open_connection(
+                    self.target_ip, port, timeout=self.connect_timeout, use_ssl=tls,
+                    server_hostname=self.hostname or self.target_ip)
+            except asyncio.TimeoutError:
+                self._count(kind, outcome='timeout')
+                return 'timeout', b''
+            except ConnectionRefusedError:
+                self._count(kind, time.monotonic() - start)
+                return 'refused', b''
+            except ssl.SSLError:
+                self._count(kind, outcome='error')
+                return 'tls-failed', b''
+            except OSError:
+                self._count(kind, outcome='error')
+                return ('tls-failed' if tls else 'error'), b''
+            self._count(kind, time.monotonic() - start)
+
+            try:
+                if probe.payload:
+                    writer.write(probe.payload)
+                    await writer.drain()
+                data = await self._read(reader, probe)
+            except (OSError, ssl.SSLError):
+                data = b''
+            finally:
+                writer.close()
+            if self.metrics:
+                self.metrics.transferred(self.module, received=len(data), sent=len(probe.payload))
+            return 'ok', data
+
+    async def _read(self, reader, probe):
+        """Read until the reply matches, the peer closes or the probe's wait is over"""
+        data = b''
+        deadline = time.monotonic() + probe.totalwait
+        while len(data) < MAX_RESPONSE:
+            wait = deadline - time.monotonic()
+            if data:
+                wait = min(wait, IDLE_AFTER_DATA)
+            if wait <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(reader.read(4096), wait)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            data += chunk
+            fingerprint, soft = self.database.match(probe, data)
+            if fingerprint and not soft:
+                break
+        return data
+
+    def _count(self, kind, latency=None, outcome='ok'):
+        if not self.metrics:
+            return
+        if outcome == 'timeout':
+            self.metrics.timeout(kind, self.module)
+        elif outcome == 'error':
+            self.metrics.error(kind, self.module)
+        else:
+            self.metrics.observe(kind, latency, self.module)
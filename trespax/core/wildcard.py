@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import asyncio
+import random
+import string
+
+PROBES = 3          # Random names resolved per zone level
+LABEL_LENGTH = 12   # Long enough that a random label never exists by accident
+
+
+class WildcardFingerprint:
+    """What a wildcard record under `zone` answers with
+
+    Starts from the answers to random names and keeps learning: load
+    balanced wildcards rotate over many addresses, so the addresses of
+    every candidate recognised as a wildcard answer are added to it.
+    """
+
+    def __init__(self, zone):
+        self.zone = zone
+        self.addresses = set()
+        self.cnames = set()
+        self.ttls = set()
+        self.matches = 0
+
+    def add(self, answer):
+        self.addresses.update(answer.addresses + answer.ipv6)
+        if answer.cnames:
+            self.cnames.add(answer.cnames[-1])
+        if answer.ttl is not None:
+            self.ttls.add(answer.ttl)
+
+    def matches_answer(self, answer):
+        """Check if `answer` looks like it came from the wildcard (and learn from it)"""
+        addresses = set(answer.addresses + answer.ipv6)
+        if answer.cnames and answer.cnames[-1] in self.cnames or addresses & self.addresses:
+            self.matches += 1
+            self.add(answer)
+            return True
+        return False
+
+    def to_dict(self):
+        return {"zone": self.zone, "addresses": sorted(self.addresses), "cnames": sorted(self.cnames),
+                "ttls": sorted(self.ttls), "matches": self.matches}
+
+
+class WildcardDetector:
+    """Find wildcard DNS zones by resolving random labels, one zone level at a time
+
+    Every level between the target and a candidate (for `a.b.example.com`:
+    `example.com`, then `b.example.com`) is probed once with random names;
+    the fingerprint, or the absence of one, is cached for the rest of the
+    run, and concurrent candidates under a level wait for the same probe.
+    """
+
+    def __init__(self, client, target):
+        self.client = client
+        self.target = target.rstrip('.').lower()
+        self._levels = {}
+
+    @property
+    def fingerprints(self):
+        """Fingerprints of the wildcard levels found so far"""
+        return {zone: task.result() for zone, task in self._levels.items()
+                if task.done() and not task.cancelled() and task.result()}
+
+    async def fingerprint(self, zone):
+        """Wildcard fingerprint of `zone` (None when it has no wildcard)"""
+        task = self._levels.get(zone)
+        if task is None:
+            task = self._levels[zone] = asyncio.ensure_future(self._probe(zone))
+        return await task
+
+    async def covering(self, name):
+        """Fingerprint of the closest wildcard level above `name`, or None"""
+        labels = name.rstrip('.').lower()[:-len(self.target)].rstrip('.').split('.')[1:]
+        zone = self.target
+        found = await self.fingerprint(zone)
+        for label in reversed(labels):
+            zone = f"{label}.{zone}"
+            found = await self.fingerprint(zone) or found
+        return found
+
+    async def _probe(self, zone):
+        """Resolve random names under `zone` and fingerprint the answers"""
+        answers = await asyncio.gather(*(self.client.lookup(f"{_random_label()}.{zone}") for _ in range(PROBES)))
+        found = [answer for answer in answers if answer.found]
+        if not found:
+            return None
+        fingerprint = WildcardFingerprint(zone)
+        for answer in found:
+            fingerprint.add(answer)
+        return fingerprint
+
+
+def _random_label():
+    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=LABEL_LENGTH))
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""Fast paths that recover a zone's names without brute force
+
+AXFR asks every authoritative nameserver for a full zone transfer. For
+DNSSEC-signed zones, NSEC records chain every name to the next one, so the
+zone can be walked one query per name; NSEC3 chains hashes instead, which
+are collected (only querying names that hash into a gap not covered yet)
+and cracked offline against the wordlist.
+"""
+
+import asyncio
+import base64
+import bisect
+import hashlib
+import random
+import string
+
+import dns.asyncquery
+import dns.exception
+import dns.flags
+import dns.message
+import dns.name
+import dns.query
+import dns.rdatatype
+
+NSEC3_CONCURRENCY = 16   # NSEC3 gap queries in flight
+NSEC3_HASH_TRIES = 20000  # Random names hashed per query while looking for an uncovered gap
+
+_BASE32HEX = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ234567', '0123456789ABCDEFGHIJKLMNOPQRSTUV')
+
+
+def nsec3_hash(name, salt, iterations):
+    """RFC 5155 hash of `name` (SHA-1), as the upper-case base32hex owner label"""
+    wire = dns.name.from_text(name).canonicalize().to_wire()
+    digest = hashlib.sha1(wire + salt).digest()
+    for _ in range(iterations):
+        digest = hashlib.sha1(digest + salt).digest()
+    return base64.b32encode(digest).decode().translate(_BASE32HEX)
+
+
+class ZoneEnumeration:
+    """Names of a zone recovered by AXFR, an NSEC walk or NSEC3 cracking
+
+    `complete` means the method saw the whole zone: every name in it is in
+    `names` (AXFR, NSEC) or has its hash in `hashes` (NSEC3), so any other
+    name can be ruled out without a query (see `contains`). Names under a
+    delegation live in the child zone, which the parent's data never shows;
+    `delegations` holds the NS owners other than the apex (their hashes for
+    NSEC3).
+    """
+
+    def __init__(self, zone, method, names=(), complete=False):
+        self.zone = zone
+        self.method = method
+        self.names = set(names)
+        self.complete = complete
+        self.hashes = {}     # NSEC3 owner hash -> cracked name (None while unknown)
+        self.delegations = set()
+        self.salt = b''
+        self.iterations = 0
+        self.servers = {}    # AXFR outcome per nameserver address
+        self.queries = 0
+
+    def contains(self, name):
+        """True/False when the enumeration can tell whether `name` exists, None otherwise
+
+        For NSEC3 a matching hash cracks it: the name is added to `names`.
+        """
+        name = name.rstrip('.').lower()
+        if not (name == self.zone or name.endswith('.' + self.zone)):
+            return None
+        try:
+            if self._delegated(name):
+                return None  # Its names are the child zone's, whatever the parent says
+            digest = nsec3_hash(name, self.salt, self.iterations) if self.method == 'nsec3' else None
+        except dns.exception.DNSException:
+            return None  # Not a valid name
+        if digest:
+            if digest in self.hashes:
+                if self.hashes[digest] is None:
+                    self.hashes[digest] = name
+                    self.names.add(name)
+                return True
+        elif name in self.names:
+            return True
+        return False if self.complete else None
+
+    def _delegated(self, name):
+        """Check if `name` is at or below a delegation, where the child zone has its names"""
+        if not self.delegations:
+            return False
+        labels = name[:-len(self.zone) - 1].split('.') if name != self.zone else []
+        for depth in range(len(labels)):
+            owner = '.'.join(labels[depth:] + [self.zone])
+            if self.method == 'nsec3':
+                owner = nsec3_hash(owner, self.salt, self.iterations)
+            if owner in self.delegations:
+                return True
+        return False
+
+    def to_dict(self):
+        result = {"method": self.method, "complete": self.complete, "names": len(self.names),
+                  "queries": self.queries}
+        if self.delegations:
+            result["delegations"] = len(self.delegations)
+        if self.method == 'nsec3':
+            result.update({"hashes": len(self.hashes), "cracked": sum(1 for name in self.hashes.values() if name),
+                           "iterations": self.iterations, "salt": self.salt.hex()})
+        if self.servers:
+            result["axfr"] = self.servers
+        return result
+
+
+class ZoneWalker:
+    """Zone transfer and NSEC/NSEC3 enumeration against a zone's authoritative servers"""
+
+    def __init__(self, zone, addresses, timeout=2.0, budget=5000, limiter=None, engine=None):
+        self.zone = zone.rstrip('.').lower()
+        self.origin = dns.name.from_text(self.zone)
+        self.addresses = list(addresses)
+        self.timeout = timeout
+        self.budget = budget
+        self.limiter = limiter
+        self.engine = engine
+        self.queries = 0
+        self._next = 0
+
+    async def enumerate(self):
+        """The first fast path that works: AXFR, then NSEC or NSEC3
+
+        Returns a ZoneEnumeration whose method is None when none worked; the
+        per-server AXFR outcomes are always filled in.
+        """
+        transfer = await self.axfr()
+        if transfer.names:
+            return transfer
+
+        denial = await self._denial()
+        if denial == 'nsec':
+            enumeration = await self.walk_nsec()
+        elif denial == 'nsec3':
+            enumeration = await self.collect_nsec3()
+        else:
+            enumeration = ZoneEnumeration(self.zone, None)
+        enumeration.servers = transfer.servers
+        enumeration.queries = self.queries
+        return enumeration
+
+    async def axfr(self):
+        """Try a zone transfer from every nameserver; names come from the first that allows it"""
+        enumeration = ZoneEnumeration(self.zone, 'axfr', complete=True)
+        outcomes = await asyncio.gather(*(self.engine.run_blocking(self._transfer, address)
+                                          for address in self.addresses))
+        for address, (outcome, names, delegations) in zip(self.addresses, outcomes):
+            enumeration.servers[address] = outcome
+            if names and not enumeration.names:
+                enumeration.names, enumeration.delegations = names, delegations
+        return enumeration
+
+    def _transfer(self, address):
+        """('allowed' | 'refused' | error, names, delegations) of one AXFR attempt"""
+        names, delegations = set(), set()
+        try:
+            for message in dns.query.xfr(address, self.origin, relativize=False, lifetime=self.timeout * 5):
+                for rrset in message.answer:
+                    name = rrset.name.to_text().rstrip('.').lower()
+                    names.add(name)
+                    if rrset.rdtype == dns.rdatatype.NS and rrset.name != self.origin:
+                        delegations.add(name)
+        except (dns.exception.DNSException, OSError, EOFError) as e:
+            return ('refused' if 'REFUSED' in str(e) or 'NOTAUTH' in str(e) else type(e).__name__), set(), set()
+        if not names:
+            return 'refused', set(), set()
+        return 'allowed', {name for name in names if not name.startswith('*')}, delegations
+
+    async def _query(self, name, rdtype):
+        """DNSSEC-enabled query to the next nameserver (TCP when truncated); None on failure"""
+        if self.queries >= self.budget:
+            return None
+        self.queries += 1
+        query = dns.message.make_query(name, rdtype, want_dnssec=True)
+        query.flags &= ~dns.flags.RD
+        for _ in range(len(self.addresses)):
+            address = self.addresses[self._next % len(self.addresses)]
+            self._next += 1
+            if self.limiter:
+                await self.limiter.acquire_async('dns', address, 'subdomains')
+            try:
+                reply, _ = await dns.asyncquery.udp_with_fallback(query, address, timeout=self.timeout)
+                return reply
+            except (dns.exception.DNSException, OSError, EOFError):
+                continue
+        return None
+
+    async def _denial(self):
+        """'nsec', 'nsec3' or None: how the zone proves a random name does not exist"""
+        reply = await self._query(f"{_random_label()}.{self.zone}", 'A')
+        if reply is None:
+            return None
+        types = {rrset.rdtype for rrset in reply.authority}
+        if dns.rdatatype.NSEC3 in types:
+            return 'nsec3'
+        if dns.rdatatype.NSEC in types:
+            return 'nsec'
+        return None
+
+    async def walk_nsec(self):
+        """Follow the NSEC chain from the apex until it wraps around"""
+        enumeration = ZoneEnumeration(self.zone, 'nsec')
+        current = self.origin
+        while True:
+            nsec = await self._nsec(current)
+            if nsec is None:
+                return enumeration  # Chain broken or budget spent: names so far, not complete
+            if _delegation(nsec):
+                enumeration.delegations.add(current.to_text().rstrip('.').lower())
+            following = nsec.next
+            if following == self.origin or not following.is_subdomain(self.origin):
+                enumeration.complete = True
+                return enumeration
+            name = following.to_text().rstrip('.').lower()
+            if name in enumeration.names:
+                enumeration.complete = True  # Looped back into the chain
+                return enumeration
+            if not name.startswith('*'):
+                enumeration.names.add(name)
+            current = following
+
+    async def _nsec(self, name):
+        """The NSEC record owned by `name` (None if it cannot be read)"""
+        reply = await self._query(name, 'NSEC')
+        if reply is not None:
+            # A delegation point answers with a referral, its NSEC in the authority section
+            for rrset in reply.answer + reply.authority:
+                if rrset.rdtype == dns.rdatatype.NSEC and rrset.name == name:
+                    return rrset[0]
+        # Names without their own NSEC answer (empty non-terminals): the NSEC
+        # covering the name just after them is owned by them
+        reply = await self._query(dns.name.Name((b'\x00',) + name.labels), 'A')
+        if reply is not None:
+            for rrset in reply.authority:
+                if rrset.rdtype == dns.rdatatype.NSEC and rrset.name == name:
+                    return rrset[0]
+        return None
+
+    async def collect_nsec3(self):
+        """Collect the NSEC3 hash chain, querying only names that hash into an uncovered gap"""
+        enumeration = ZoneEnumeration(self.zone, 'nsec3')
+        chain = {}       # owner hash -> next hash
+        owners = []      # sorted owner hashes
+        params = []
+        opt_out = []
+        delegations = set()
+        searching = asyncio.Lock()
+
+        def add(reply):
+            for rrset in reply.authority:
+                if rrset.rdtype != dns.rdatatype.NSEC3:
+                    continue
+                owner = rrset.name.labels[0].decode().upper()
+                rdata = rrset[0]
+                if not params:
+                    params.extend([rdata.salt, rdata.iterations])
+                if rdata.flags & 1 and not opt_out:
+                    opt_out.append(owner)
+                if _delegation(rdata):
+                    delegations.add(owner)
+                if owner not in chain:
+                    bisect.insort(owners, owner)
+                chain[owner] = base64.b32encode(rdata.next).decode().translate(_BASE32HEX)
+
+        def complete():
+            return bool(chain) and all(following in chain for following in chain.values())
+
+        async def probe():
+            while not complete() and self.queries < self.budget:
+                name = f"{_random_label()}.{self.zone}"
+                if params:
+                    # Up to NSEC3_HASH_TRIES iterated hashes: off the event loop, on a snapshot of
+                    # the chain, and one search at a time (hashing holds the GIL; more threads
+                    # would only take turns with the loop)
+                    async with searching:
+                        name = await self.engine.run_blocking(_uncovered_name, self.zone, list(owners),
+                                                              dict(chain), *params)
+                    if name is None:
+                        return  # Every gap looks covered, the rest of the chain is out of reach
+                reply = await self._query(name, 'A')
+                if reply is None:
+                    return
+                add(reply)
+
+        await asyncio.gather(*(probe() for _ in range(NSEC3_CONCURRENCY)))
+        if params:
+            enumeration.salt, enumeration.iterations = params
+        enumeration.hashes = {owner: None for owner in chain}
+        enumeration.delegations = delegations
+        # With opt-out, unsigned delegations are left out of the chain, so a
+        # missing hash does not prove a name is absent
+        enumeration.complete = complete() and not opt_out
+        apex = nsec3_hash(self.zone, enumeration.salt, enumeration.iterations) if params else None
+        if apex in enumeration.hashes:
+            enumeration.hashes[apex] = self.zone
+        return enumeration
+
+
+def _covered(owners, chain, digest):
+    """Check if `digest` falls in a gap of the NSEC3 chain collected so far"""
+    if not owners:
+        return False
+    index = bisect.bisect_right(owners, digest) - 1
+    owner = owners[index]  # index -1 is the last owner: the gap wrapping around
+    following = chain[owner]
+    if owner < following:
+        return owner <= digest < following
+    return digest >= owner or digest < following
+
+
+def _uncovered_name(zone, owners, chain, salt, iterations):
+    """A random name of `zone` hashing into no known gap (None after NSEC3_HASH_TRIES)"""
+    for _ in range(NSEC3_HASH_TRIES):
+        name = f"{_random_label()}.{zone}"
+        if not _covered(owners, chain, nsec3_hash(name, salt, iterations)):
+            return name
+    return None
+
+
+def _delegation(rdata):
+    """Check if an NSEC/NSEC3 type bitmap marks a delegation point (NS without SOA)"""
+    return _has_type(rdata, dns.rdatatype.NS) and not _has_type(rdata, dns.rdatatype.SOA)
+
+
+def _has_type(rdata, rdtype):
+    window, offset = divmod(rdtype, 256)
+    for number, bitmap in rdata.windows:
+        if number == window:
+            return offset // 8 < len(bitmap) and bool(bitmap[offset // 8] & (0x80 >> offset % 8))
+    return False
+
+
+def _random_label():
+    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=12))
@@ -2,6 +2,7 @@
 
 import sys
 import os
+import json
 import argparse
 from datetime import datetime
 from pathlib import Path
@@ -14,29 +15,35 @@ except ImportError:
     SIGNAL_AVAILABLE = False
     print("Warning: Signal handling not available in this environment")
 
-# Disable SSL warnings
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 # Add the parent directory to sys.path to import trespax modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from trespax.core.banner import show_banner
 from trespax.core.config import Config
-from trespax.core.tor_checker import TorChecker
-from trespax.core.scanner import Scanner
 from trespax.core.reporter import Reporter
+from trespax.core.ports import parse_ports, top_ports
+from trespax.core.ratelimit import parse_rate
+from trespax.core.resolverpool import parse_resolvers
+from trespax.core.registry import registry
+from trespax.core.targets import iter_targets
 from trespax.utils.colors import Colors
 from trespax.utils.logger import Logger
 
 
+RUN_FILE = "scan.json"
+STDIN_COPY = "stdin_targets.txt"
+# Arguments about where output goes and how it is shown; every other one is saved for --resume
+NOT_RESUMED = ('resume', 'output', 'manual', 'no_banner', 'modules', 'verbose')
+
+
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully"""
     print(f"\n{Colors.YELLOW}[!] Scan interrupted by user{Colors.RESET}")
+    print(f"{Colors.YELLOW}[*] Progress is journaled; continue with --resume <output dir>{Colors.RESET}")
     sys.exit(0)
 
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
         description="TresPax - The One-Tool Recon & Enumeration Framework",
@@ -48,6 +55,12 @@ Examples:
   trespax -t example.com -v                # Verbose mode
   trespax -t example.com -o /tmp/results   # Custom output directory
   trespax -t example.com --manual          # Manual tool selection
+  trespax -t 10.0.0.0/24 -m ports,banner   # Batch scan of a CIDR range
+  trespax -f targets.txt -c 8 -o /tmp/out  # Batch scan from a file, 8 at a time
+  cat hosts.txt | trespax -f - --batch     # Batch scan from stdin
+  trespax -f targets.txt -p 0 -c 16        # Shard targets over every CPU core
+  trespax --resume /tmp/out                # Continue an interrupted scan
+  trespax -t example.com --rate http=5/10  # At most 5 HTTP requests/s (burst 10) per host
         """
     )
 
@@ -57,8 +70,40 @@ Examples:
     parser.add_argument('-o', '--output', help='Output directory for results')
     parser.add_argument('--manual', action='store_true', help='Manual tool selection mode')
     parser.add_argument('--no-banner', action='store_true', help='Disable banner display')
+    parser.add_argument('-f', '--target-file', action='append', help="File with one target or CIDR range per line ('-' for stdin)")
+    parser.add_argument('--batch', action='store_true', help='Non-interactive batch mode (implied by -f or a CIDR target)')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='Number of targets scanned at the same time in batch mode')
+    parser.add_argument('-p', '--processes', type=int, default=1, help='Worker processes for batch mode (0 = one per CPU core)')
+    parser.add_argument('--resume', metavar='DIR', help='Resume an interrupted scan from its output directory')
+    parser.add_argument('--rate', action='append', metavar='KIND=RATE[/BURST]',
+                        help='Per-host rate limit for http, tcp, udp or dns in ops/second, 0 disables (e.g. http=5/10)')
+    parser.add_argument('--max-concurrency', type=int, help='Upper bound for the adaptive per-module concurrency (default: 500)')
+    parser.add_argument('--no-adaptive', action='store_true', help='Keep per-module concurrency fixed instead of adapting it')
+    parser.add_argument('--ports', help="Ports to scan, e.g. '22,80,8000-8100', 'http,ssh' or 'T:1-1024' ('-' for all 65535)")
+    parser.add_argument('--top-ports', type=int, metavar='N', help='Scan the N most common ports (default: 100)')
+    parser.add_argument('--port-confidence', type=float, metavar='P',
+                        help='Stop once the scanned ports cover this fraction of the expected open ports (e.g. 0.9)')
+    parser.add_argument('--port-timeout', type=float, help='Seconds before an unanswered port counts as filtered (default: 1)')
+    parser.add_argument('--port-retries', type=int, help='Extra attempts for filtered ports (default: 1)')
+    parser.add_argument('--udp', action='store_true', help="Also scan UDP ports (top 100, or the 'U:' / unprefixed part of --ports)")
+    parser.add_argument('--syn', action='store_true', help='Half-open SYN scan over raw sockets (root, IPv4; --rate tcp=N sets packets/s)')
+    parser.add_argument('--resolvers', metavar='LIST|FILE',
+                        help="Nameservers for DNS lookups, comma-separated or one per line in a file (e.g. '1.1.1.1,8.8.8.8,9.9.9.9')")
+    parser.add_argument('--authoritative', action='store_true',
+                        help="Send subdomain queries straight to the target zone's authoritative nameservers")
+    parser.add_argument('--no-zone-walk', action='store_true',
+                        help='Do not try AXFR or NSEC/NSEC3 zone walking before the subdomain brute force')
+    parser.add_argument('--dns-qps', type=int, metavar='N', help='Queries per second for subdomain brute force (default: 1000)')
+    parser.add_argument('--wildcard', choices=('skip', 'filter'),
+                        help="Wildcard DNS zones: skip brute force under them (default) or resolve and filter matching answers")
+    parser.add_argument('--no-permutations', action='store_true', help='Do not try permutations of found subdomains')
+    parser.add_argument('--recursion-depth', type=int, metavar='N',
+                        help='Brute force under found subdomains up to N levels below the target (default: 1, 0 disables)')
+    parser.add_argument('--stream', nargs='?', const='-', metavar='FILE',
+                        help='Stream findings as NDJSON events to FILE, or stdout when no FILE is given')
+    parser.add_argument('-m', '--modules', help='Comma-separated modules to run (e.g. dns,ports,banner)')
     parser.add_argument('--version', action='version', version='TresPax 1.0.0')
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def get_target_interactive():
@@ -90,19 +135,217 @@ def is_root():
     return os.geteuid() == 0
 
 
+def apply_rate_limits(config, rates):
+    """Apply --rate KIND=RATE[/BURST] values to the config"""
+    for value in rates:
+        try:
+            kind, rate, burst = parse_rate(value)
+        except ValueError as e:
+            print(f"{Colors.RED}[!] {str(e)}{Colors.RESET}")
+            sys.exit(1)
+        config.rate_limits[kind] = rate
+        if burst:
+            config.rate_bursts[kind] = burst
+
+
+def apply_port_options(config, args):
+    """Apply --ports / --top-ports / --port-confidence / --port-timeout / --port-retries"""
+    try:
+        if args.ports:
+            parse_ports(args.ports)
+        if args.top_ports:
+            top_ports(args.top_ports)
+        if args.port_confidence is not None and not 0 < args.port_confidence <= 1:
+            raise ValueError("--port-confidence must be between 0 and 1")
+    except ValueError as e:
+        print(f"{Colors.RED}[!] {str(e)}{Colors.RESET}")
+        sys.exit(1)
+
+    config.ports = args.ports
+    if args.syn:
+        config.scan_type = 'syn'
+    if args.udp:
+        config.udp_scan = True
+    config.top_ports = args.top_ports
+    config.port_confidence = args.port_confidence
+    if args.port_timeout:
+        config.port_timeout = args.port_timeout
+    if args.port_retries is not None:
+        config.port_retries = max(0, args.port_retries)
+
+
+def apply_scan_options(config, args):
+    """Apply the rate, concurrency, DNS and event stream options to the config"""
+    config.event_stream = args.stream
+    if args.rate:
+        apply_rate_limits(config, args.rate)
+
+    config.adaptive_concurrency = not args.no_adaptive
+    if args.max_concurrency:
+        config.max_concurrency = args.max_concurrency
+    if args.resolvers:
+        try:
+            config.resolvers = parse_resolvers(args.resolvers)
+        except (ValueError, OSError) as e:
+            print(f"{Colors.RED}[!] {str(e)}{Colors.RESET}")
+            sys.exit(1)
+    if args.authoritative:
+        config.dns_mode = 'authoritative'
+    if args.no_zone_walk:
+        config.zone_walk = False
+    if args.dns_qps is not None:
+        config.dns_qps = max(0, args.dns_qps)
+    if args.wildcard:
+        config.wildcard_policy = args.wildcard
+    if args.no_permutations:
+        config.subdomain_permutations = False
+    if args.recursion_depth is not None:
+        config.recursion_depth = max(0, args.recursion_depth)
+
+
+def apply_module_selection(config, modules):
+    """Restrict the scan to a comma-separated list of modules"""
+    available = registry.names()
+    selected = [m.strip() for m in modules.split(',') if m.strip()]
+    unknown = [m for m in selected if m not in available]
+    if unknown:
+        print(f"{Colors.RED}[!] Unknown module(s): {', '.join(unknown)}{Colors.RESET}")
+        print(f"{Colors.YELLOW}[*] Available: {', '.join(available)}{Colors.RESET}")
+        sys.exit(1)
+    for tool in available:
+        config.selected_tools[tool] = tool in selected
+
+
+def save_run_arguments(args, config):
+    """Remember how the scan was started so --resume can repeat it
+
+    Every argument outside NOT_RESUMED is saved, so options added later
+    are resumed too. Files are saved as absolute paths, since the scan
+    may be resumed from another directory.
+    """
+    run = {key: value for key, value in vars(args).items() if key not in NOT_RESUMED}
+    run["target"] = config.target or args.target
+    run["target_file"] = [
+        os.path.join(config.output_dir, STDIN_COPY) if path == '-' else os.path.abspath(path)
+        for path in args.target_file or []
+    ]
+    run["batch"] = is_batch_mode(args)
+    run["tor"] = config.use_tor
+    if args.resolvers and os.path.isfile(args.resolvers):
+        run["resolvers"] = os.path.abspath(args.resolvers)
+    if args.stream and args.stream != '-':
+        run["stream"] = os.path.abspath(args.stream)
+    run["verbose"] = config.verbose
+    run["selected_tools"] = config.selected_tools
+    try:
+        with open(os.path.join(config.output_dir, RUN_FILE), 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+    except OSError as e:
+        print(f"{Colors.YELLOW}[!] Cannot save run arguments, --resume will not work: {e}{Colors.RESET}")
+
+
+def load_run_arguments(args, config):
+    """Restore the arguments of the run being resumed"""
+    path = os.path.join(args.resume, RUN_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            run = json.load(f)
+    except (OSError, ValueError):
+        print(f"{Colors.RED}[!] No resumable scan found in {args.resume}{Colors.RESET}")
+        sys.exit(1)
+
+    # The saved arguments replace the command line's (runs saved by older
+    # versions lack some; those keep their command line value)
+    for key, value in run.items():
+        if key not in NOT_RESUMED and hasattr(args, key):
+            setattr(args, key, value)
+    args.target_file = args.target_file or None
+    args.verbose = args.verbose or run.get("verbose", False)
+    args.output = args.resume
+    config.selected_tools.update(run.get("selected_tools", {}))
+    config.resume = True
+
+
+def is_batch_mode(args):
+    """Check whether the arguments ask for a multi-target scan"""
+    if args.batch or args.target_file:
+        return True
+    return bool(args.target) and '/' in args.target and not args.target.startswith(('http://', 'https://'))
+
+
+def run_batch(args, config):
+    """Scan many targets without any interactive prompt"""
+    from trespax.core.batch import BatchScanner
+
+    logger = Logger(config.verbose)
+
+    if config.use_tor:
+        from trespax.core.tor_checker import TorChecker
+        tor_checker = TorChecker()
+        if not tor_checker.is_tor_running():
+            print(f"{Colors.RED}[!] TOR service is not active. Please start TOR service first.{Colors.RESET}")
+            sys.exit(1)
+        config.tor_proxy = tor_checker.get_tor_proxy()
+
+    timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M")
+    config.output_dir = args.output or f"reports/batch_{timestamp}"
+    try:
+        os.makedirs(config.output_dir, exist_ok=True)
+    except PermissionError:
+        print(f"{Colors.RED}[!] Cannot write to {config.output_dir}. Check permissions.{Colors.RESET}")
+        sys.exit(1)
+
+    print(f"{Colors.GREEN}[+] Batch results will be saved to: {config.output_dir}{Colors.RESET}")
+    processes = args.processes if args.processes > 0 else (os.cpu_count() or 1)
+    print(f"[*] Scanning up to {args.concurrency} targets at a time in each of {processes} process(es)")
+
+    if not config.resume:
+        save_run_arguments(args, config)
+    stdin_copy = os.path.join(config.output_dir, STDIN_COPY)
+
+    targets = iter_targets([args.target] if args.target else [], args.target_file, stdin_copy)
+    BatchScanner(config, logger, workers=args.concurrency, processes=processes).run(targets)
+
+
 def main():
     """Main entry point"""
     if SIGNAL_AVAILABLE:
         signal.signal(signal.SIGINT, signal_handler)
 
     args = parse_arguments()
+    config = Config()
+    if args.resume:
+        load_run_arguments(args, config)
+
+    # Keep stdout clean for the event stream; everything human-readable goes to stderr
+    if args.stream == '-':
+        sys.stdout = sys.stderr
 
     if not args.no_banner:
         show_banner()
         print(f"{Colors.YELLOW}[!] Disclaimer: Use this tool only on systems you own or have permission to test.{Colors.RESET}")
         print(f"{Colors.YELLOW}🔒 Note: Saving reports requires sudo/root access to write to secure directories.{Colors.RESET}")
 
-    config = Config()
+    apply_scan_options(config, args)
+    if args.resume:
+        print(f"{Colors.GREEN}[+] Resuming scan from: {args.resume}{Colors.RESET}")
+    elif args.modules:
+        apply_module_selection(config, args.modules)
+    apply_port_options(config, args)
+
+    if is_batch_mode(args):
+        config.verbose = args.verbose
+        config.use_tor = args.tor
+        # Ctrl+C has to reach the batch scanner as KeyboardInterrupt so it can
+        # cancel the queued targets, instead of exiting from under its pool
+        if SIGNAL_AVAILABLE:
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+        try:
+            run_batch(args, config)
+        except KeyboardInterrupt:
+            print(f"\n{Colors.YELLOW}[!] Scan interrupted by user{Colors.RESET}")
+            print(f"{Colors.YELLOW}[*] Finished targets are recorded; continue with --resume <output dir>{Colors.RESET}")
+        return
 
     # Get target
     config.target = args.target or get_target_interactive()
@@ -110,8 +353,9 @@ def main():
     logger = Logger(config.verbose)
 
     # TOR
-    config.use_tor = args.tor or ask_yes_no("Do you want to use TOR for anonymity?", False)
+    config.use_tor = args.tor or (not config.resume and ask_yes_no("Do you want to use TOR for anonymity?", False))
     if config.use_tor:
+        from trespax.core.tor_checker import TorChecker
         tor_checker = TorChecker()
         if not tor_checker.is_tor_running():
             print(f"{Colors.RED}[!] TOR service is not active. Please start TOR service first.{Colors.RESET}")
@@ -120,10 +364,10 @@ def main():
         print(f"{Colors.GREEN}[+] TOR service is active. Routing traffic through TOR.{Colors.RESET}")
         config.tor_proxy = tor_checker.get_tor_proxy()
 
-    # SUDO check
+    # SUDO check (a resumed scan already saves to its own directory)
     has_root = is_root()
     can_save = False
-    if has_root:
+    if has_root or config.resume:
         can_save = True
     else:
         print(f"{Colors.YELLOW}🔒 Saving scan results requires sudo/root access.{Colors.RESET}")
@@ -150,8 +394,10 @@ def main():
             except PermissionError:
                 print(f"{Colors.RED}[!] Cannot write to {config.output_dir}. Check permissions.{Colors.RESET}")
                 sys.exit(1)
+            if not config.resume:
+                save_run_arguments(args, config)
 
-    config.manual_mode = args.manual
+    config.manual_mode = args.manual and not args.modules and not config.resume
 
     try:
         # Start scan
@@ -159,6 +405,7 @@ def main():
         if config.use_tor:
             print("[*] Using TOR network for anonymity\n")
 
+        from trespax.core.scanner import Scanner
         scanner = Scanner(config, logger)
         results = scanner.run()  # <- make sure this method prints output
 
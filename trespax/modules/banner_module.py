@@ -1,142 +1,86 @@
 #!/usr/bin/env python3
 
-import socket
-import requests
+import asyncio
+from trespax.core.context import TargetContext
+from trespax.core.engine import Engine
+from trespax.core.ports import port_database, top_ports
+from trespax.core.versionscan import ServiceDetector
 from trespax.utils.colors import Colors
 
+# Ports checked for being open when the PORTS module did not run
+FALLBACK_PORTS = 20
+
 
 class BannerModule:
-    """Banner grabbing module"""
-    
+    """Service and version detection module"""
+
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
-        
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.config.user_agent})
-        
-        if self.config.use_tor and self.config.tor_proxy:
-            self.session.proxies.update(self.config.tor_proxy)
-    
-    def run(self):
-        """Run banner grabbing"""
+
+    async def run(self, context=None):
+        """Identify the service, product and version on every open TCP port
+
+        Only the ports the PORTS module found open are probed. Without a
+        port scan, the most common ports are connect-checked first.
+        """
         try:
-            target = self.config.target
-            results = {}
-            
-            # Resolve domain to IP if necessary
-            if not self._is_ip(target):
-                try:
-                    target_ip = socket.gethostbyname(target)
-                except:
-                    return {"error": "Cannot resolve target to IP address"}
-            else:
-                target_ip = target
-            
-            # HTTP banner grabbing
-            http_banner = self._grab_http_banner(target)
-            if http_banner:
-                results['http'] = http_banner
-            
-            # Service banner grabbing for common ports
-            services = {
-                21: 'FTP',
-                22: 'SSH',
-                25: 'SMTP',
-                80: 'HTTP',
-                110: 'POP3',
-                143: 'IMAP',
-                443: 'HTTPS',
-                993: 'IMAPS',
-                995: 'POP3S'
-            }
-            
-            for port, service in services.items():
-                if service in ['HTTP', 'HTTPS']:
-                    continue  # Already handled above
-                    
-                banner = self._grab_service_banner(target_ip, port, service)
-                if banner:
-                    results[service.lower()] = banner
-            
-            if results and self.config.verbose:
-                print(f"{Colors.GREEN}[+] Banner grabbing results:{Colors.RESET}")
-                for service, banner in results.items():
-                    print(f"    {service.upper()}: {banner}")
-            
-            return results if results else {"banners": []}
-            
+            context = context or TargetContext(self.config)
+            engine = context.engine or Engine(self.config)
+
+            target_ip = context.ip
+            if not target_ip:
+                return {"error": "Cannot resolve target to IP address"}
+
+            open_ports = context.open_ports
+            if open_ports is None:
+                open_ports = await self._find_open_ports(engine, target_ip)
+            if not open_ports:
+                return {"services": {}}
+
+            print(f"{Colors.CYAN}[*] Detecting services on {len(open_ports)} open ports...{Colors.RESET}")
+            detector = ServiceDetector(engine, target_ip, hostname=None if context.is_ip else context.hostname,
+                                       limiter=context.limiter, metrics=context.metrics,
+                                       connect_timeout=self.config.timeout)
+            fingerprints = await detector.detect_all(sorted(open_ports))
+
+            services = {}
+            for port, fingerprint in sorted(fingerprints.items()):
+                if not fingerprint.get("service"):
+                    # Nothing matched, fall back to the port table's guess
+                    fingerprint["service"] = port_database()['tcp'].service_name(port).lower()
+                    fingerprint["method"] = "table"
+                services[f"{port}/tcp"] = fingerprint
+                context.emit('finding', module='banner', type='service', port=port, protocol='tcp',
+                             **{key: value for key, value in fingerprint.items() if key != 'banner'})
+
+            if services and self.config.verbose:
+                print(f"{Colors.GREEN}[+] Services:{Colors.RESET}")
+                for port, fingerprint in services.items():
+                    print(f"    {port:<10} {self._describe(fingerprint)}")
+
+            return {"services": services}
+
         except Exception as e:
-            self.logger.error(f"Banner grabbing failed: {str(e)}")
+            self.logger.error(f"Service detection failed: {str(e)}")
             return {"error": str(e)}
-    
-    def _grab_http_banner(self, target):
-        """Grab HTTP banner"""
-        try:
-            # Try HTTPS first, then HTTP
-            urls = []
-            if not target.startswith(('http://', 'https://')):
-                urls = [f"https://{target}", f"http://{target}"]
-            else:
-                urls = [target]
-            
-            for url in urls:
-                try:
-                    response = self.session.head(url, timeout=5, verify=False)
-                    
-                    server = response.headers.get('Server', 'Unknown')
-                    powered_by = response.headers.get('X-Powered-By', '')
-                    
-                    banner = server
-                    if powered_by:
-                        banner += f" (Powered by: {powered_by})"
-                    
-                    return banner
-                    
-                except:
-                    continue
-            
-            return None
-            
-        except Exception:
-            return None
-    
-    def _grab_service_banner(self, target_ip, port, service):
-        """Grab banner from service port"""
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            
-            result = sock.connect_ex((target_ip, port))
-            
-            if result == 0:
-                # Send appropriate command based on service
-                if service == 'FTP':
-                    pass  # FTP sends banner immediately
-                elif service == 'SSH':
-                    pass  # SSH sends banner immediately
-                elif service == 'SMTP':
-                    sock.send(b'HELO test\r\n')
-                elif service in ['POP3', 'IMAP']:
-                    pass  # These services send banner immediately
-                
-                # Receive banner
-                banner = sock.recv(1024).decode('utf-8', errors='ignore').strip()
-                sock.close()
-                
-                if banner:
-                    return banner
-            
-            sock.close()
-            return None
-            
-        except Exception:
-            return None
-    
-    def _is_ip(self, target):
-        """Check if target is an IP address"""
-        try:
-            socket.inet_aton(target)
-            return True
-        except socket.error:
-            return False
\ No newline at end of file
+
+    async def _find_open_ports(self, engine, target_ip):
+        """Connect-check the most common ports (used when PORTS did not run)"""
+        ports = top_ports(FALLBACK_PORTS)
+        states = await asyncio.gather(*(engine.tcp_connect(target_ip, port, timeout=self.config.port_timeout,
+                                                           module='banner') for port in ports))
+        return [port for port, (state, _) in zip(ports, states) if state == 'open']
+
+    def _describe(self, fingerprint):
+        """One line such as 'ssh OpenSSH 9.6 (protocol 2.0)'"""
+        service = fingerprint["service"]
+        if fingerprint.get("tunnel"):
+            service = f"{fingerprint['tunnel']}/{service}"
+        words = [service] + [fingerprint[key] for key in ("product", "version") if fingerprint.get(key)]
+        line = " ".join(words)
+        if fingerprint.get("info"):
+            line += f" ({fingerprint['info']})"
+        if fingerprint.get("method") == "table":
+            line += "?"
+        return line
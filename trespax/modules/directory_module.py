@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
+import time
 import requests
 from urllib.parse import urljoin
 from concurrent.futures import ThreadPoolExecutor
+from trespax.core.adaptive import ThreadedAdaptiveConcurrency, adaptive_settings
+from trespax.core.checkpoint import module_progress
+from trespax.core.context import TargetContext
 from trespax.utils.colors import Colors
 from trespax.utils.wordlist_manager import WordlistManager
 
@@ -14,39 +18,24 @@ class DirectoryModule:
         self.config = config
         self.logger = logger
         self.found_paths = []
+        self.found_urls = set()  # URLs already in found_paths (journaled ones included)
         self.wordlist_manager = WordlistManager()
         
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.config.user_agent})
-        
-        if self.config.use_tor and self.config.tor_proxy:
-            self.session.proxies.update(self.config.tor_proxy)
+        self.session = None  # Rate-limited session from the target context
+        self.context = None
     
-    def run(self):
+    def run(self, context=None):
         """Run directory brute force"""
         try:
-            target = self.config.target
-            
-            # Determine base URL
-            if not target.startswith(('http://', 'https://')):
-                # Try HTTPS first, then HTTP
-                base_urls = [f"https://{target}", f"http://{target}"]
-            else:
-                base_urls = [target]
-            
-            # Test connectivity
-            working_url = None
-            for url in base_urls:
-                try:
-                    response = self.session.get(url, timeout=self.config.timeout, verify=False)
-                    if response.status_code < 400:
-                        working_url = url
-                        break
-                except:
-                    continue
+            context = context or TargetContext(self.config)
+            self.session = context.session('directories')
+            self.context = context
             
-            if not working_url:
+            # Base URL is probed once per target by the shared context
+            homepage = context.probe()
+            if homepage is None or homepage.status_code >= 400:
                 return {"error": "Cannot connect to target"}
+            working_url = context.base_url
             
             print(f"{Colors.CYAN}[*] Using base URL: {working_url}{Colors.RESET}")
             
@@ -64,13 +53,27 @@ class DirectoryModule:
             
             print(f"{Colors.CYAN}[*] Testing {min(len(paths), 500)} paths...{Colors.RESET}")
             
-            # Use ThreadPoolExecutor for concurrent directory testing
-            with ThreadPoolExecutor(max_workers=10) as executor:
+            # Resume from the checkpoint journal of an interrupted run
+            progress = module_progress(context, 'directories')
+            # Findings past the contiguous resume point are journaled already and
+            # get tested again, so they are keyed by URL to be recorded only once
+            self.found_paths = list(progress.findings)
+            self.found_urls = {path_info.split(' [')[0] for path_info in self.found_paths}
+            paths = paths[:500]  # Limit to first 500 for performance
+            if progress.start:
+                print(f"{Colors.CYAN}[*] Resuming at entry {progress.start}/{len(paths)}{Colors.RESET}")
+            
+            # Concurrency adapts to the target: grows while it answers quickly,
+            # halves on timeouts, resets, 429s and 503s
+            controller = ThreadedAdaptiveConcurrency(**adaptive_settings(self.config, 10))
+            
+            with ThreadPoolExecutor(max_workers=controller.maximum) as executor:
                 futures = []
                 
-                for path in paths[:500]:  # Limit to first 500 for performance
-                    full_url = urljoin(working_url, path)
-                    future = executor.submit(self._test_path, full_url)
+                for index in range(progress.start, len(paths)):
+                    full_url = urljoin(working_url, paths[index])
+                    controller.acquire()
+                    future = executor.submit(self._test_path, full_url, index, progress, controller)
                     futures.append(future)
                 
                 # Wait for completion
@@ -80,26 +83,28 @@ class DirectoryModule:
                     except:
                         pass
             
-            if self.found_paths:
-                result = {"directories": self.found_paths}
-                
-                if self.config.verbose:
-                    print(f"{Colors.GREEN}[+] Found {len(self.found_paths)} accessible paths:{Colors.RESET}")
-                    for path_info in self.found_paths:
-                        print(f"    {path_info}")
-                
-                return result
-            else:
-                return {"directories": []}
+            progress.close()
+            
+            result = {"directories": self.found_paths, "concurrency": controller.stats()}
+            
+            if self.found_paths and self.config.verbose:
+                print(f"{Colors.GREEN}[+] Found {len(self.found_paths)} accessible paths:{Colors.RESET}")
+                for path_info in self.found_paths:
+                    print(f"    {path_info}")
+            
+            return result
                 
         except Exception as e:
             self.logger.error(f"Directory brute force failed: {str(e)}")
             return {"error": str(e)}
     
-    def _test_path(self, url):
+    def _test_path(self, url, index=None, progress=None, controller=None):
         """Test if path exists"""
+        start = time.monotonic()
+        overloaded = False
         try:
             response = self.session.get(url, timeout=3, allow_redirects=False, verify=False)
+            overloaded = response.status_code in (429, 503)
             
             status_reasons = {
                 200: "OK",
@@ -113,16 +118,29 @@ class DirectoryModule:
                 500: "Internal Server Error"
             }
             
-            if response.status_code in [200, 201, 202, 204, 301, 302, 403]:
+            if response.status_code in [200, 201, 202, 204, 301, 302, 403] and url not in self.found_urls:
                 reason = status_reasons.get(response.status_code, "Unknown")
                 path_info = f"{url} [{response.status_code} - {reason}]"
+                self.found_urls.add(url)
                 self.found_paths.append(path_info)
+                if progress:
+                    progress.finding(path_info)
+                if self.context:
+                    self.context.emit('finding', module='directories', type='path', url=url,
+                                      status=response.status_code, reason=reason)
                 
                 if self.config.verbose:
                     color = Colors.GREEN if response.status_code < 300 else Colors.YELLOW
                     print(f"{color}[+] Found: {path_info}{Colors.RESET}")
                     
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            overloaded = True  # Timeout or reset, back off
         except requests.exceptions.RequestException:
             pass  # Path test failed, skip
         except Exception:
-            pass  # Other error, skip
\ No newline at end of file
+            pass  # Other error, skip
+        finally:
+            if progress:
+                progress.done(index)
+            if controller:
+                controller.release(time.monotonic() - start, overloaded)
\ No newline at end of file
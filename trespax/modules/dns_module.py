@@ -1,73 +1,127 @@
 #!/usr/bin/env python3
 
+import asyncio
+import dns.exception
 import dns.resolver
-import socket
+import dns.reversename
+import time
+from trespax.core.authoritative import find_authoritative
+from trespax.core.context import TargetContext
+from trespax.core.resolverpool import resolver_pool
 from trespax.utils.colors import Colors
 
+# SRV records only exist under service labels, so these are asked for under the target
+SRV_SERVICES = ('_sip._tcp', '_sip._udp', '_sips._tcp', '_xmpp-client._tcp', '_xmpp-server._tcp',
+                '_ldap._tcp', '_kerberos._tcp', '_kerberos._udp', '_autodiscover._tcp',
+                '_submission._tcp', '_imaps._tcp', '_caldavs._tcp', '_carddavs._tcp', '_matrix._tcp')
+
 
 class DNSModule:
     """DNS enumeration module"""
-    
+
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
-    
-    def run(self):
-        """Run DNS enumeration"""
+
+    async def run(self, context=None):
+        """Run DNS enumeration
+
+        Every record type (and every SRV service) is queried at once through
+        one resolver, so the records take about one round trip. The zone and
+        its nameservers come out of that batch's SOA and NS replies (see
+        find_authoritative), which adds at most two more.
+        """
         try:
-            target = self.config.target
+            context = context or TargetContext(self.config)
+            target = context.hostname
             results = {}
-            
-            # Record types to query
-            record_types = ['A', 'AAAA', 'CNAME', 'MX', 'NS', 'TXT', 'SOA', 'PTR']
-            
+
+            # Healthiest resolvers of the shared pool first; dnspython moves on
+            # to the next one when a resolver fails
+            pool = resolver_pool(self.config)
+            resolver = pool.dnspython_resolver(self.config.timeout, self.config.dns_payload, asynchronous=True)
+
+            queries = []
+            # SOA and NS are always asked: they name the zone and its nameservers
+            record_types = list(self.config.dns_record_types)
+            record_types += [record_type for record_type in ('SOA', 'NS') if record_type not in record_types]
             for record_type in record_types:
-                try:
-                    answers = dns.resolver.resolve(target, record_type)
-                    records = []
-                    
-                    for answer in answers:
-                        records.append(str(answer))
-                    
-                    if records:
-                        results[record_type] = records
-                        
-                        if self.config.verbose:
-                            print(f"{Colors.GREEN}[+] {record_type} records found: {len(records)}{Colors.RESET}")
-                            for record in records:
-                                print(f"    {record}")
-                
-                except dns.resolver.NXDOMAIN:
-                    if self.config.verbose:
-                        print(f"{Colors.YELLOW}[!] Domain not found for {record_type}{Colors.RESET}")
-                except dns.resolver.NoAnswer:
-                    if self.config.verbose:
-                        print(f"{Colors.YELLOW}[!] No {record_type} records found{Colors.RESET}")
-                except Exception as e:
-                    if self.config.verbose:
-                        print(f"{Colors.RED}[!] Error querying {record_type}: {str(e)}{Colors.RESET}")
-            
-            # Try to get IP address if it's a domain
-            if not self._is_ip(target):
-                try:
-                    ip = socket.gethostbyname(target)
-                    results['IP'] = [ip]
-                    
-                    if self.config.verbose:
-                        print(f"{Colors.GREEN}[+] Resolved IP: {ip}{Colors.RESET}")
-                except:
-                    pass
-            
+                if record_type == 'SRV':
+                    queries += [(record_type, f"{service}.{target}") for service in SRV_SERVICES]
+                elif record_type == 'PTR' and context.is_ip:
+                    queries.append((record_type, dns.reversename.from_address(target)))
+                else:
+                    queries.append((record_type, target))
+
+            answers = await asyncio.gather(*(self._query(context, pool, resolver, record_type, name)
+                                             for record_type, name in queries))
+            replies = {(record_type, str(name)): reply for (record_type, name), (_, reply) in zip(queries, answers)}
+
+            for (record_type, name), (records, _) in zip(queries, answers):
+                if not records or record_type not in self.config.dns_record_types:
+                    continue
+                if record_type == 'SRV':
+                    records = [f"{name[:-len(target) - 1]} {record}" for record in records]
+                results.setdefault(record_type, []).extend(records)
+
+            for record_type, records in results.items():
+                if self.config.verbose:
+                    print(f"{Colors.GREEN}[+] {record_type} records found: {len(records)}{Colors.RESET}")
+                    for record in records:
+                        print(f"    {record}")
+
+            zone, nameservers = None, {}
+            if not context.is_ip:
+                async def query(record_type, name):
+                    return await self._query(context, pool, resolver, record_type, name)
+                zone, nameservers = await find_authoritative(
+                    target, query, replies.get(('SOA', target)), replies.get(('NS', target)))
+            if zone:
+                results['AUTHORITATIVE'] = {"zone": zone, "nameservers": nameservers}
+                if self.config.verbose:
+                    print(f"{Colors.GREEN}[+] Zone {zone}, authoritative nameservers:{Colors.RESET}")
+                    for host, addresses in nameservers.items():
+                        print(f"    {host} ({', '.join(addresses) or 'unresolved'})")
+
+            # The A answer is the target's address; no separate lookup needed
+            if not context.is_ip and results.get('A'):
+                results['IP'] = list(results['A'])
+
+                if self.config.verbose:
+                    print(f"{Colors.GREEN}[+] Resolved IP: {', '.join(results['IP'])}{Colors.RESET}")
+
             return results
-            
+
         except Exception as e:
             self.logger.error(f"DNS enumeration failed: {str(e)}")
             return {"error": str(e)}
-    
-    def _is_ip(self, target):
-        """Check if target is an IP address"""
+
+    async def _query(self, context, pool, resolver, record_type, name):
+        """(records as strings, reply) of one query
+
+        Records are [] when there are none or the query failed; the reply is
+        kept for NODATA and NXDOMAIN too (its authority section names the
+        zone) and is None only when no nameserver answered.
+        """
         try:
-            socket.inet_aton(target)
-            return True
-        except socket.error:
-            return False
\ No newline at end of file
+            await context.limiter.acquire_async('dns', 'resolver', 'dns')
+            start = time.monotonic()
+            with context.metrics.measure('dns', 'dns', answers=(dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+                answers = await resolver.resolve(name, record_type)
+            health = pool.get(answers.nameserver)
+            if health:
+                pool.record(health, 'ok', time.monotonic() - start)
+            return [str(answer) for answer in answers], answers.response
+
+        except dns.resolver.NXDOMAIN as e:
+            if self.config.verbose and record_type in self.config.dns_record_types and record_type != 'SRV':
+                print(f"{Colors.YELLOW}[!] Domain not found for {record_type}{Colors.RESET}")
+            return [], next(iter(e.kwargs.get('responses', {}).values()), None)
+        except dns.resolver.NoAnswer as e:
+            if self.config.verbose and record_type in self.config.dns_record_types and record_type != 'SRV':
+                print(f"{Colors.YELLOW}[!] No {record_type} records found{Colors.RESET}")
+            return [], e.response()
+        except (dns.exception.DNSException, OSError) as e:
+            if self.config.verbose:
+                print(f"{Colors.RED}[!] Error querying {record_type}: {str(e)}{Colors.RESET}")
+        return [], None
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
 import re
-import requests
 from bs4 import BeautifulSoup
+from trespax.core.context import TargetContext
 from trespax.utils.colors import Colors
 
 
@@ -14,37 +14,21 @@ class EmailModule:
         self.logger = logger
         self.found_emails = set()
         
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.config.user_agent})
-        
-        if self.config.use_tor and self.config.tor_proxy:
-            self.session.proxies.update(self.config.tor_proxy)
+        self.session = None  # Rate-limited session from the target context
     
-    def run(self):
+    def run(self, context=None):
         """Run email and contact finder"""
         try:
+            context = context or TargetContext(self.config)
+            self.session = context.session('emails')
             target = self.config.target
             
-            # Determine base URL
-            if not target.startswith(('http://', 'https://')):
-                urls = [f"https://{target}", f"http://{target}"]
-            else:
-                urls = [target]
-            
-            # Test connectivity and scrape emails
-            working_url = None
-            for url in urls:
-                try:
-                    response = self.session.get(url, timeout=self.config.timeout, verify=False)
-                    if response.status_code == 200:
-                        working_url = url
-                        self._extract_emails(response.text, target)
-                        break
-                except:
-                    continue
-            
-            if not working_url:
+            # Homepage is fetched once per target by the shared context
+            homepage = context.probe()
+            if homepage is None or homepage.status_code != 200:
                 return {"error": "Cannot connect to target"}
+            working_url = context.base_url
+            self._extract_emails(homepage.text, target)
             
             # Try common pages
             common_pages = [
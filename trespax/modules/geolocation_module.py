@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 
-import socket
-import requests
+from trespax.core.context import TargetContext
 from trespax.utils.colors import Colors
 
 
@@ -12,23 +11,18 @@ class GeolocationModule:
         self.config = config
         self.logger = logger
         
-        self.session = requests.Session()
-        if self.config.use_tor and self.config.tor_proxy:
-            self.session.proxies.update(self.config.tor_proxy)
+        self.session = None  # Rate-limited session from the target context
     
-    def run(self):
+    def run(self, context=None):
         """Run IP geolocation"""
         try:
-            target = self.config.target
+            context = context or TargetContext(self.config)
+            self.session = context.session('geolocation')
             
             # Get IP address
-            if self._is_ip(target):
-                target_ip = target
-            else:
-                try:
-                    target_ip = socket.gethostbyname(target)
-                except:
-                    return {"error": "Cannot resolve target to IP address"}
+            target_ip = context.ip
+            if not target_ip:
+                return {"error": "Cannot resolve target to IP address"}
             
             # Skip private/local IPs
             if self._is_private_ip(target_ip):
@@ -136,14 +130,6 @@ class GeolocationModule:
         except Exception:
             return None
     
-    def _is_ip(self, target):
-        """Check if target is an IP address"""
-        try:
-            socket.inet_aton(target)
-            return True
-        except socket.error:
-            return False
-    
     def _is_private_ip(self, ip):
         """Check if IP is private/local"""
         try:
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-import requests
+from trespax.core.context import TargetContext
 from trespax.utils.colors import Colors
 
 
@@ -10,58 +10,42 @@ class HeaderModule:
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
-        
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.config.user_agent})
-        
-        if self.config.use_tor and self.config.tor_proxy:
-            self.session.proxies.update(self.config.tor_proxy)
     
-    def run(self):
+    def run(self, context=None):
         """Run HTTP header analysis"""
         try:
-            target = self.config.target
+            context = context or TargetContext(self.config)
             
-            # Determine base URL
-            if not target.startswith(('http://', 'https://')):
-                # Try HTTPS first, then HTTP
-                urls = [f"https://{target}", f"http://{target}"]
-            else:
-                urls = [target]
+            # Homepage is fetched once per target by the shared context
+            response = context.probe()
+            if response is None:
+                return {"error": "Cannot connect to target"}
+            url = context.base_url
+            
+            result = {
+                "url": url,
+                "status_code": response.status_code,
+                "headers": dict(response.headers),
+                "redirect_chain": context.redirect_chain,
+                "technologies": self._detect_technologies(response.headers),
+                "security_headers": self._analyze_security_headers(response.headers)
+            }
             
-            # Test connectivity and get headers
-            for url in urls:
-                try:
-                    response = self.session.get(url, timeout=self.config.timeout, verify=False)
-                    
-                    result = {
-                        "url": url,
-                        "status_code": response.status_code,
-                        "headers": dict(response.headers),
-                        "technologies": self._detect_technologies(response.headers),
-                        "security_headers": self._analyze_security_headers(response.headers)
-                    }
-                    
-                    if self.config.verbose:
-                        print(f"{Colors.GREEN}[+] URL: {url}{Colors.RESET}")
-                        print(f"{Colors.GREEN}[+] Status Code: {response.status_code}{Colors.RESET}")
-                        
-                        if result["technologies"]:
-                            print(f"{Colors.GREEN}[+] Technologies detected:{Colors.RESET}")
-                            for tech in result["technologies"]:
-                                print(f"    {tech}")
-                        
-                        if result["security_headers"]["missing"]:
-                            print(f"{Colors.YELLOW}[!] Missing security headers:{Colors.RESET}")
-                            for header in result["security_headers"]["missing"]:
-                                print(f"    {header}")
-                    
-                    return result
-                    
-                except requests.exceptions.RequestException:
-                    continue
+            if self.config.verbose:
+                print(f"{Colors.GREEN}[+] URL: {url}{Colors.RESET}")
+                print(f"{Colors.GREEN}[+] Status Code: {response.status_code}{Colors.RESET}")
+                
+                if result["technologies"]:
+                    print(f"{Colors.GREEN}[+] Technologies detected:{Colors.RESET}")
+                    for tech in result["technologies"]:
+                        print(f"    {tech}")
+                
+                if result["security_headers"]["missing"]:
+                    print(f"{Colors.YELLOW}[!] Missing security headers:{Colors.RESET}")
+                    for header in result["security_headers"]["missing"]:
+                        print(f"    {header}")
             
-            return {"error": "Cannot connect to target"}
+            return result
             
         except Exception as e:
             self.logger.error(f"Header analysis failed: {str(e)}")
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 
-import socket
-import threading
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+from trespax.core.adaptive import AsyncAdaptiveConcurrency, adaptive_settings
+from trespax.core.context import TargetContext
+from trespax.core.engine import Engine
+from trespax.core.ports import DEFAULT_TOP_PORTS, parse_port_spec, port_database, top_ports
+from trespax.core.synscan import SynScanner, syn_scan_available
+from trespax.core.udpscan import UdpScanner
 from trespax.utils.colors import Colors
 
 
@@ -13,116 +18,211 @@ class PortModule:
         self.config = config
         self.logger = logger
         self.open_ports = []
-        
-        # Common ports to scan
-        self.common_ports = [
-            21, 22, 23, 25, 53, 80, 110, 111, 135, 139, 143, 443, 993, 995,
-            1723, 3306, 3389, 5432, 5900, 8080, 8443, 8888, 9090, 10000
-        ]
+        self.closed = 0
+        self.filtered = 0
     
-    def run(self):
-        """Run port scan"""
+    async def run(self, context=None):
+        """Run port scan on the async engine (no thread per socket)"""
         try:
-            target = self.config.target
+            context = context or TargetContext(self.config)
+            engine = context.engine or Engine(self.config)
+            self.open_ports = []
+            self.closed = 0
+            self.filtered = 0
             
-            # Resolve domain to IP if necessary
-            if not self._is_ip(target):
-                try:
-                    target_ip = socket.gethostbyname(target)
-                except:
-                    return {"error": "Cannot resolve target to IP address"}
-            else:
-                target_ip = target
+            # Resolved once per target by the shared context
+            target_ip = context.ip
+            if not target_ip:
+                return {"error": "Cannot resolve target to IP address"}
             
-            print(f"{Colors.CYAN}[*] Scanning {len(self.common_ports)} common ports on {target_ip}...{Colors.RESET}")
+            try:
+                selection = self._select_ports()
+            except ValueError as e:
+                return {"error": str(e)}
+            if not any(selection.values()):
+                return {"error": "No ports selected"}
             
-            # Use ThreadPoolExecutor for concurrent port scanning
-            with ThreadPoolExecutor(max_workers=50) as executor:
-                futures = []
-                
-                for port in self.common_ports:
-                    future = executor.submit(self._scan_port, target_ip, port)
-                    futures.append(future)
-                
-                # Wait for completion
-                for future in futures:
-                    try:
-                        future.result(timeout=2)
-                    except:
-                        pass
+            coverage = {}
+            if self.config.port_confidence:
+                for protocol, ports in selection.items():
+                    if ports:
+                        selection[protocol], coverage[protocol] = port_database()[protocol].truncate(
+                            ports, self.config.port_confidence)
             
-            if self.open_ports:
-                result = {"open_ports": sorted(self.open_ports)}
-                
-                if self.config.verbose:
-                    print(f"{Colors.GREEN}[+] Found {len(self.open_ports)} open ports:{Colors.RESET}")
-                    for port_info in sorted(self.open_ports):
-                        print(f"    {port_info}")
-                
-                return result
-            else:
-                return {"open_ports": []}
+            # TCP and UDP run side by side on the loop
+            scans = []
+            if selection['tcp']:
+                scans.append(self._tcp_scan(engine, target_ip, selection['tcp'], context))
+            if selection['udp']:
+                scans.append(self._udp_scan(target_ip, selection['udp'], context))
+            results = await asyncio.gather(*scans)
+            self.open_ports.sort()
+            
+            # Let dependent modules (banner) probe only what is open over TCP
+            context.open_ports = [port for port, protocol, _ in self.open_ports if protocol == 'tcp']
+            open_ports = [f"{port}/{protocol} - {service}" for port, protocol, service in self.open_ports]
+            
+            result = {"open_ports": open_ports}
+            for summary in results:
+                result.update(summary)
+            if coverage:
+                result["coverage"] = {protocol: round(value, 4) for protocol, value in coverage.items()}
+            
+            if open_ports and self.config.verbose:
+                print(f"{Colors.GREEN}[+] Found {len(open_ports)} open ports:{Colors.RESET}")
+                for port_info in open_ports:
+                    print(f"    {port_info}")
+            
+            return result
                 
         except Exception as e:
             self.logger.error(f"Port scan failed: {str(e)}")
             return {"error": str(e)}
     
-    def _scan_port(self, target_ip, port):
-        """Scan a single port"""
+    def _select_ports(self):
+        """Ports to scan per protocol, likeliest-open first
+        
+        --ports, else --top-ports, else the top 100. UDP is scanned with
+        --udp or when --ports names 'U:' ports; a spec with only 'U:' ports
+        scans no TCP.
+        """
+        scan_udp = self.config.udp_scan
+        if self.config.ports:
+            selection = parse_port_spec(self.config.ports)
+            scan_udp = scan_udp or 'u:' in str(self.config.ports).lower()
+        else:
+            count = self.config.top_ports or DEFAULT_TOP_PORTS
+            selection = {'tcp': top_ports(count), 'udp': top_ports(count, 'udp')}
+        if not scan_udp:
+            selection['udp'] = []
+        return selection
+    
+    async def _tcp_scan(self, engine, target_ip, ports, context):
+        """Connect or SYN scan of `ports`; returns the TCP part of the result"""
+        scan_type = 'connect'
+        if self.config.scan_type == 'syn':
+            if syn_scan_available(target_ip):
+                scan_type = 'syn'
+            else:
+                print(f"{Colors.YELLOW}[!] SYN scan needs root and an IPv4 target, using connect scan{Colors.RESET}")
+        
+        print(f"{Colors.CYAN}[*] Scanning {len(ports)} TCP ports on {target_ip} ({scan_type} scan)...{Colors.RESET}")
+        start = time.monotonic()
+        concurrency = None
+        if scan_type == 'syn':
+            await self._syn_scan(engine, target_ip, ports, context)
+        else:
+            concurrency = await self._connect_scan(engine, target_ip, ports, context)
+        elapsed = time.monotonic() - start
+        
+        summary = {
+            "closed": self.closed,
+            "filtered": self.filtered,
+            "scanned": len(ports),
+            "ports_per_second": round(len(ports) / elapsed, 1) if elapsed else None,
+            "scan_type": scan_type
+        }
+        if concurrency:
+            summary["concurrency"] = concurrency
+        return summary
+    
+    async def _udp_scan(self, target_ip, ports, context):
+        """UDP scan of `ports` from one socket; returns the UDP part of the result"""
+        print(f"{Colors.CYAN}[*] Scanning {len(ports)} UDP ports on {target_ip}...{Colors.RESET}")
+        scanner = UdpScanner([target_ip], ports, timeout=self.config.port_timeout, retries=self.config.port_retries,
+                             limiter=context.limiter, metrics=context.metrics)
+        start = time.monotonic()
+        states = await scanner.scan()
+        elapsed = time.monotonic() - start
+        
+        counts = {'closed': 0, 'filtered': 0, 'open|filtered': 0}
+        for port in ports:
+            state = states[(target_ip, port)]
+            if state == 'open':
+                self._record_port(target_ip, port, state, context, 'udp')
+            else:
+                counts[state] += 1
+        
+        return {"udp": {
+            "closed": counts['closed'],
+            "filtered": counts['filtered'],
+            "open_filtered": counts['open|filtered'],
+            "scanned": len(ports),
+            "ports_per_second": round(len(ports) / elapsed, 1) if elapsed else None,
+            "timeout": round(scanner.rto, 3)
+        }}
+    
+    async def _connect_scan(self, engine, target_ip, ports, context):
+        """Full TCP connect scan on the event loop; returns the concurrency stats
+        
+        Connects adapt to the target: more in flight while it answers
+        quickly, fewer once connects start erroring out. Only the connects in
+        flight are scheduled, so a full 65535-port sweep never holds more
+        than the current limit in memory.
+        """
+        maximum = min(self.config.port_concurrency, engine.max_inflight)
+        controller = AsyncAdaptiveConcurrency(**adaptive_settings(self.config, min(200, maximum), maximum))
+        pending = set()
+        for port in ports:
+            await controller.acquire()
+            task = asyncio.ensure_future(self._scan_port(engine, target_ip, port, controller, context))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        return controller.stats()
+    
+    async def _syn_scan(self, engine, target_ip, ports, context):
+        """Half-open scan over raw sockets (sender and receiver threads off the loop)"""
+        scanner = SynScanner(target_ip, ports, timeout=self.config.port_timeout, retries=self.config.port_retries,
+                             limiter=context.limiter, metrics=context.metrics)
+        states = await engine.run_blocking(scanner.scan)
+        for port in ports:
+            self._record_port(target_ip, port, states.get(port, 'filtered'), context)
+    
+    async def _scan_port(self, engine, target_ip, port, controller=None, context=None):
+        """Scan a single port, retrying when the answer is ambiguous
+        
+        A refused connection (closed) or a completed one (open) is
+        definitive. A timeout may just be a lost SYN, and a local socket
+        error says nothing about the port, so both are retried before the
+        port is reported as filtered.
+        """
+        state, latency = 'error', None
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            
-            result = sock.connect_ex((target_ip, port))
-            
-            if result == 0:
-                service = self._get_service_name(port)
-                port_info = f"{port}/tcp - {service}"
-                self.open_ports.append(port_info)
-                
-                if self.config.verbose:
-                    print(f"{Colors.GREEN}[+] Open: {port_info}{Colors.RESET}")
+            for attempt in range(self.config.port_retries + 1):
+                if attempt and engine.metrics:
+                    engine.metrics.retry('tcp_connect', 'ports')
+                state, latency = await engine.tcp_connect(target_ip, port, timeout=self.config.port_timeout,
+                                                          module='ports')
+                if state in ('open', 'closed'):
+                    break
             
-            sock.close()
+            self._record_port(target_ip, port, state, context)
             
         except Exception:
             pass  # Port scan failed, skip
+        finally:
+            if controller:
+                # Timeouts are the normal answer of a filtered port, not overload
+                await controller.release(latency if state != 'filtered' else None, state == 'error')
     
-    def _get_service_name(self, port):
-        """Get service name for port"""
-        services = {
-            21: "FTP",
-            22: "SSH",
-            23: "Telnet",
-            25: "SMTP",
-            53: "DNS",
-            80: "HTTP",
-            110: "POP3",
-            111: "RPCbind",
-            135: "MS-RPC",
-            139: "NetBIOS-SSN",
-            143: "IMAP",
-            443: "HTTPS",
-            993: "IMAPS",
-            995: "POP3S",
-            1723: "PPTP",
-            3306: "MySQL",
-            3389: "RDP",
-            5432: "PostgreSQL",
-            5900: "VNC",
-            8080: "HTTP-Alt",
-            8443: "HTTPS-Alt",
-            8888: "HTTP-Alt",
-            9090: "HTTP-Alt",
-            10000: "Webmin"
-        }
-        
-        return services.get(port, "Unknown")
+    def _record_port(self, target_ip, port, state, context=None, protocol='tcp'):
+        """Count a port's final state, keeping open ports as findings"""
+        if state == 'open':
+            service = self._get_service_name(port, protocol)
+            self.open_ports.append((port, protocol, service))
+            if context:
+                context.emit('finding', module='ports', type='port', ip=target_ip,
+                             port=port, protocol=protocol, state=state, service=service)
+            
+            if self.config.verbose:
+                print(f"{Colors.GREEN}[+] Open: {port}/{protocol} - {service}{Colors.RESET}")
+        elif state == 'closed':
+            self.closed += 1
+        else:
+            self.filtered += 1
     
-    def _is_ip(self, target):
-        """Check if target is an IP address"""
-        try:
-            socket.inet_aton(target)
-            return True
-        except socket.error:
-            return False
\ No newline at end of file
+    def _get_service_name(self, port, protocol='tcp'):
+        """Get service name for port from the bundled port table"""
+        return port_database()[protocol].service_name(port)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
-import requests
 from urllib.parse import urljoin
+from trespax.core.context import TargetContext
 from trespax.utils.colors import Colors
 
 
@@ -12,37 +12,20 @@ class RobotsModule:
         self.config = config
         self.logger = logger
         
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.config.user_agent})
-        
-        if self.config.use_tor and self.config.tor_proxy:
-            self.session.proxies.update(self.config.tor_proxy)
+        self.session = None  # Rate-limited session from the target context
     
-    def run(self):
+    def run(self, context=None):
         """Run robots.txt and sitemap analysis"""
         try:
-            target = self.config.target
+            context = context or TargetContext(self.config)
+            self.session = context.session('robots')
             results = {}
             
-            # Determine base URL
-            if not target.startswith(('http://', 'https://')):
-                urls = [f"https://{target}", f"http://{target}"]
-            else:
-                urls = [target]
-            
-            # Find working URL
-            working_url = None
-            for url in urls:
-                try:
-                    response = self.session.get(url, timeout=self.config.timeout, verify=False)
-                    if response.status_code < 400:
-                        working_url = url
-                        break
-                except:
-                    continue
-            
-            if not working_url:
+            # Base URL is probed once per target by the shared context
+            homepage = context.probe()
+            if homepage is None or homepage.status_code >= 400:
                 return {"error": "Cannot connect to target"}
+            working_url = context.base_url
             
             # Check robots.txt
             robots_result = self._check_robots_txt(working_url)
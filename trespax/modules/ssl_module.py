@@ -3,7 +3,7 @@
 import ssl
 import socket
 from datetime import datetime
-import requests
+from trespax.core.context import TargetContext
 from trespax.utils.colors import Colors
 
 
@@ -13,11 +13,18 @@ class SSLModule:
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
+        self.limiter = None
+        self.metrics = None
+        self.address = None  # Target address from the shared (cached) resolution
     
-    def run(self):
+    def run(self, context=None):
         """Run SSL/TLS analysis"""
         try:
-            target = self.config.target
+            context = context or TargetContext(self.config)
+            self.limiter = context.limiter
+            self.metrics = context.metrics
+            self.address = context.ip
+            target = context.hostname
             
             # Skip if target is just an IP without HTTPS indication
             if self._is_ip(target):
@@ -59,32 +66,31 @@ class SSLModule:
             context.check_hostname = False
             context.verify_mode = ssl.CERT_NONE
             
-            with socket.create_connection((hostname, port), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    cert = ssock.getpeercert()
+            with self._connect_tls(context, hostname, port) as ssock:
+                cert = ssock.getpeercert()
+                
+                if cert:
+                    # Parse certificate information
+                    subject = dict(x[0] for x in cert.get('subject', []))
+                    issuer = dict(x[0] for x in cert.get('issuer', []))
+                    
+                    # Parse dates
+                    not_before = datetime.strptime(cert['notBefore'], '%b %d %H:%M:%S %Y %Z')
+                    not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+                    
+                    # Calculate days until expiry
+                    days_until_expiry = (not_after - datetime.now()).days
                     
-                    if cert:
-                        # Parse certificate information
-                        subject = dict(x[0] for x in cert.get('subject', []))
-                        issuer = dict(x[0] for x in cert.get('issuer', []))
-                        
-                        # Parse dates
-                        not_before = datetime.strptime(cert['notBefore'], '%b %d %H:%M:%S %Y %Z')
-                        not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                        
-                        # Calculate days until expiry
-                        days_until_expiry = (not_after - datetime.now()).days
-                        
-                        return {
-                            'subject': subject.get('commonName', 'Unknown'),
-                            'issuer': issuer.get('organizationName', issuer.get('commonName', 'Unknown')),
-                            'not_before': not_before.strftime('%Y-%m-%d %H:%M:%S'),
-                            'not_after': not_after.strftime('%Y-%m-%d %H:%M:%S'),
-                            'days_until_expiry': days_until_expiry,
-                            'serial_number': cert.get('serialNumber', 'Unknown'),
-                            'version': cert.get('version', 'Unknown'),
-                            'subject_alt_names': [x[1] for x in cert.get('subjectAltName', [])]
-                        }
+                    return {
+                        'subject': subject.get('commonName', 'Unknown'),
+                        'issuer': issuer.get('organizationName', issuer.get('commonName', 'Unknown')),
+                        'not_before': not_before.strftime('%Y-%m-%d %H:%M:%S'),
+                        'not_after': not_after.strftime('%Y-%m-%d %H:%M:%S'),
+                        'days_until_expiry': days_until_expiry,
+                        'serial_number': cert.get('serialNumber', 'Unknown'),
+                        'version': cert.get('version', 'Unknown'),
+                        'subject_alt_names': [x[1] for x in cert.get('subjectAltName', [])]
+                    }
             
             return None
             
@@ -98,35 +104,50 @@ class SSLModule:
             # For now, we'll do a basic SSL handshake test
             context = ssl.create_default_context()
             
-            with socket.create_connection((hostname, 443), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    cipher = ssock.cipher()
-                    protocol = ssock.version()
-                    
-                    # Basic grading based on protocol and cipher
-                    if protocol == 'TLSv1.3':
-                        grade = 'A'
-                    elif protocol == 'TLSv1.2':
-                        if cipher and 'AES' in cipher[0]:
-                            grade = 'A-'
-                        else:
-                            grade = 'B'
-                    elif protocol in ['TLSv1.1', 'TLSv1']:
-                        grade = 'C'
+            with self._connect_tls(context, hostname, 443) as ssock:
+                cipher = ssock.cipher()
+                protocol = ssock.version()
+                
+                # Basic grading based on protocol and cipher
+                if protocol == 'TLSv1.3':
+                    grade = 'A'
+                elif protocol == 'TLSv1.2':
+                    if cipher and 'AES' in cipher[0]:
+                        grade = 'A-'
                     else:
-                        grade = 'F'
-                    
-                    return {
-                        'grade': grade,
-                        'protocol': protocol,
-                        'cipher': cipher[0] if cipher else 'Unknown'
-                    }
+                        grade = 'B'
+                elif protocol in ['TLSv1.1', 'TLSv1']:
+                    grade = 'C'
+                else:
+                    grade = 'F'
+                
+                return {
+                    'grade': grade,
+                    'protocol': protocol,
+                    'cipher': cipher[0] if cipher else 'Unknown'
+                }
             
             return None
             
         except Exception:
             return None
-    
+
+    def _connect_tls(self, context, hostname, port):
+        """Connect and complete the TLS handshake, timing both steps separately"""
+        if self.limiter:
+            self.limiter.acquire('tcp', hostname, 'ssl')
+
+        # Connect to the address the context already resolved; SNI and the
+        # certificate check still use the name
+        with self.metrics.measure('tcp_connect', 'ssl'):
+            sock = socket.create_connection((self.address or hostname, port), timeout=10)
+        try:
+            with self.metrics.measure('tls_handshake', 'ssl'):
+                return context.wrap_socket(sock, server_hostname=hostname)
+        except Exception:
+            sock.close()
+            raise
+
     def _is_ip(self, target):
         """Check if target is an IP address"""
         try:
@@ -1,97 +1,339 @@
 #!/usr/bin/env python3
 
-import socket
-import threading
+import asyncio
+import dns.exception
 import time
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
+from trespax.core.adaptive import AsyncAdaptiveConcurrency, adaptive_settings
+from trespax.core.authoritative import find_authoritative, resolve_reply
+from trespax.core.checkpoint import module_progress
+from trespax.core.context import TargetContext
+from trespax.core.dnsclient import DnsClient
+from trespax.core.engine import Engine
+from trespax.core.permutations import BloomFilter, permutations
+from trespax.core.resolverpool import ResolverPool, resolver_pool
+from trespax.core.wildcard import WildcardDetector
+from trespax.core.zonewalk import ZoneWalker
 from trespax.utils.colors import Colors
 from trespax.utils.wordlist_manager import WordlistManager
 
 
 class SubdomainModule:
     """Subdomain brute force module"""
-    
+
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
         self.found_subdomains = []
+        self.records = {}
+        self.wildcard_filtered = 0
         self.wordlist_manager = WordlistManager()
-    
-    def run(self):
-        """Run subdomain brute force"""
+        self.context = None
+
+        # Per-run state of the brute force
+        self.frontier = deque()   # Found names not expanded yet
+        self.seen = None          # Bloom filter of the candidates tried
+        self.tasks = set()
+        self.tested = 0
+        self.generated = 0
+        self.client = None
+        self.detector = None
+        self.controller = None
+        self.progress = None
+        self.target = None
+        self.confirm = False
+        self.enumeration = None   # Zone names from AXFR or NSEC/NSEC3 (see _zone_walk)
+        self.ruled_out = 0
+
+    async def run(self, context=None):
+        """Run subdomain brute force
+
+        Candidates are streamed from the wordlist, so its size does not
+        matter, and resolved by the async DNS client at `config.dns_qps`
+        queries per second. Found names are then expanded into permutations
+        and recursive candidates (see _expand).
+
+        Before that, the zone's authoritative nameservers are asked for a
+        zone transfer or walked through their NSEC/NSEC3 chain (see
+        _zone_walk); names it yields are resolved first, and once the whole
+        zone is known, candidates outside it are ruled out without a query.
+        """
         try:
-            target = self.config.target
-            
+            context = context or TargetContext(self.config)
+            self.context = context
+            target = context.hostname
+
             # Skip if target is an IP
-            if self._is_ip(target):
+            if context.is_ip:
                 return {"error": "Cannot perform subdomain enumeration on IP address"}
-            
+
             # Get wordlist
             wordlist = self.wordlist_manager.get_wordlist('subdomains')
             if not wordlist:
                 return {"error": "No subdomain wordlist found"}
-            
+
             print(f"{Colors.CYAN}[*] Using wordlist: {wordlist}{Colors.RESET}")
-            
-            # Read wordlist
+
             try:
-                with open(wordlist, 'r', encoding='utf-8', errors='ignore') as f:
-                    subdomains = [line.strip() for line in f if line.strip()]
+                total = sum(1 for _ in self._read_wordlist(wordlist))
             except Exception as e:
                 return {"error": f"Failed to read wordlist: {str(e)}"}
-            
-            print(f"{Colors.CYAN}[*] Testing {len(subdomains)} subdomains...{Colors.RESET}")
-            
-            # Use ThreadPoolExecutor for concurrent subdomain testing
-            with ThreadPoolExecutor(max_workers=self.config.threads) as executor:
-                futures = []
-                
-                for subdomain in subdomains[:1000]:  # Limit to first 1000 for performance
-                    full_domain = f"{subdomain}.{target}"
-                    future = executor.submit(self._test_subdomain, full_domain)
-                    futures.append(future)
-                
-                # Wait for completion
-                for future in futures:
-                    try:
-                        future.result(timeout=1)
-                    except:
-                        pass
-            
-            if self.found_subdomains:
-                result = {"subdomains": self.found_subdomains}
-                
-                if self.config.verbose:
-                    print(f"{Colors.GREEN}[+] Found {len(self.found_subdomains)} subdomains:{Colors.RESET}")
-                    for subdomain in self.found_subdomains:
-                        print(f"    {subdomain}")
-                
-                return result
-            else:
-                return {"subdomains": []}
-                
+
+            print(f"{Colors.CYAN}[*] Testing {total} subdomains...{Colors.RESET}")
+
+            # Resume from the checkpoint journal of an interrupted run
+            progress = module_progress(context, 'subdomains')
+            for item in progress.findings:
+                self._restore(item)
+            if progress.start:
+                print(f"{Colors.CYAN}[*] Resuming at entry {progress.start}/{total}{Colors.RESET}")
+
+            # Concurrency adapts to the resolver: grows while lookups come back
+            # quickly, halves when the resolver starts failing or timing out
+            self.controller = AsyncAdaptiveConcurrency(**adaptive_settings(self.config, self.config.threads))
+            pool = resolver_pool(self.config)
+            recursion = True
+            engine = context.engine or Engine(self.config)
+            zone, nameservers = None, {}
+            if self.config.dns_mode == 'authoritative' or self.config.zone_walk:
+                # Same SOA and NS queries as the DNS module's, answered from the
+                # shared DNS cache when it ran first
+                zone, nameservers = await find_authoritative(target, self._lookup(context, pool))
+            addresses = [address for host in nameservers.values() for address in host]
+            if self.config.dns_mode == 'authoritative':
+                if addresses:
+                    print(f"{Colors.CYAN}[*] Querying the {len(nameservers)} authoritative nameservers of {zone} "
+                          f"directly: {', '.join(nameservers)}{Colors.RESET}")
+                    pool, recursion = ResolverPool([(address, 53) for address in addresses]), False
+                else:
+                    print(f"{Colors.YELLOW}[!] No authoritative nameservers found for {target}, "
+                          f"using the recursive resolvers{Colors.RESET}")
+            self.client = DnsClient(pool, qps=self.config.dns_qps, timeout=self.config.dns_timeout,
+                                    retries=self.config.dns_retries, metrics=context.metrics, recursion=recursion,
+                                    limiter=context.limiter)
+            # Hits are confirmed by a second resolver, so one lying resolver cannot add
+            # names (authoritative servers are the source of truth already)
+            self.confirm = self.config.confirm_hits and recursion and len(pool) > 1
+            self.progress = progress
+            self.target = target
+            # Sized for the wordlist; it grows as zone names and expansions come in
+            self.seen = BloomFilter(total)
+
+            start = time.monotonic()
+            try:
+                if self.config.zone_walk and addresses:
+                    self.enumeration = await self._zone_walk(engine, zone, addresses)
+
+                self.detector = WildcardDetector(self.client, target)
+                wildcard = await self.detector.fingerprint(target)
+                if wildcard:
+                    print(f"{Colors.YELLOW}[!] Wildcard DNS: every name under {target} resolves to "
+                          f"{', '.join(sorted(wildcard.addresses | wildcard.cnames))}{Colors.RESET}")
+
+                if self.enumeration:
+                    for name in sorted(self.enumeration.names):
+                        if name.endswith('.' + target) and name not in self.seen:
+                            await self._spawn(name)
+
+                if wildcard and self.config.wildcard_policy == 'skip':
+                    print(f"{Colors.YELLOW}[!] Skipping brute force under the wildcard "
+                          f"(--wildcard filter resolves the wordlist anyway){Colors.RESET}")
+                else:
+                    for index, word in self._read_wordlist(wordlist, progress.start):
+                        candidate = f"{word}.{target}"
+                        if self.enumeration and candidate in self.seen:
+                            self.progress.done(index)  # Resolved already as a zone name
+                            continue
+                        await self._spawn(candidate, index)
+                recursion_words = [word for _, word in
+                                   islice(self._read_wordlist(wordlist), self.config.recursion_words)]
+                await self._expand(recursion_words)
+            finally:
+                self.client.close()
+            elapsed = time.monotonic() - start
+
+            progress.close()
+
+            result = {
+                "subdomains": self.found_subdomains,
+                "records": self.records,
+                "wildcards": [fingerprint.to_dict() for fingerprint in self.detector.fingerprints.values()],
+                "wildcard_filtered": self.wildcard_filtered,
+                "tested": self.tested,
+                "generated": self.generated,
+                "ruled_out": self.ruled_out,
+                "names_per_second": round(self.tested / elapsed, 1) if elapsed else None,
+                "concurrency": self.controller.stats(),
+                "resolvers": pool.stats()
+            }
+            if self.enumeration:
+                result["zone_enumeration"] = self.enumeration.to_dict()
+
+            if self.found_subdomains and self.config.verbose:
+                print(f"{Colors.GREEN}[+] Found {len(self.found_subdomains)} subdomains:{Colors.RESET}")
+                for subdomain in self.found_subdomains:
+                    print(f"    {subdomain}")
+
+            return result
+
         except Exception as e:
             self.logger.error(f"Subdomain enumeration failed: {str(e)}")
             return {"error": str(e)}
-    
-    def _test_subdomain(self, subdomain):
-        """Test if subdomain exists"""
-        try:
-            ip = socket.gethostbyname(subdomain)
-            self.found_subdomains.append(f"{subdomain} -> {ip}")
-            
-            if self.config.verbose:
-                print(f"{Colors.GREEN}[+] Found: {subdomain} -> {ip}{Colors.RESET}")
-                
-        except socket.gaierror:
-            pass  # Subdomain doesn't exist
-        except Exception:
-            pass  # Other error, skip
-    
-    def _is_ip(self, target):
-        """Check if target is an IP address"""
+
+    def _lookup(self, context, pool):
+        """Query coroutine for find_authoritative, through the shared resolvers"""
+        resolver = pool.dnspython_resolver(self.config.timeout, self.config.dns_payload, asynchronous=True)
+
+        async def query(record_type, name):
+            await context.limiter.acquire_async('dns', 'resolver', 'subdomains')
+            try:
+                with context.metrics.measure('dns', 'subdomains'):
+                    return await resolve_reply(resolver, record_type, name)
+            except (dns.exception.DNSException, OSError):
+                return [], None
+        return query
+
+    async def _zone_walk(self, engine, zone, addresses):
+        """Names of `zone` recovered without brute force (None if no fast path works)
+
+        AXFR is tried against every authoritative nameserver, then the NSEC
+        chain is walked or the NSEC3 hashes collected (cracked as the
+        wordlist streams through `_spawn`), within `config.zone_walk_queries`.
+        """
+        walker = ZoneWalker(zone, addresses, timeout=self.config.dns_timeout, budget=self.config.zone_walk_queries,
+                            limiter=self.context.limiter, engine=engine)
+        enumeration = await walker.enumerate()
+        if not enumeration.method:
+            print(f"{Colors.CYAN}[*] Zone transfer refused and no NSEC chain for {zone}, "
+                  f"brute forcing{Colors.RESET}")
+            return None
+
+        extent = 'whole zone' if enumeration.complete else 'partial'
+        if enumeration.method == 'nsec3':
+            print(f"{Colors.GREEN}[+] Collected {len(enumeration.hashes)} NSEC3 hashes of {zone} ({extent}, "
+                  f"{enumeration.queries} queries), cracking them with the wordlist{Colors.RESET}")
+        else:
+            print(f"{Colors.GREEN}[+] {enumeration.method.upper()} of {zone} returned {len(enumeration.names)} names "
+                  f"({extent}){Colors.RESET}")
+        return enumeration
+
+    def _read_wordlist(self, path, start=0):
+        """Yield (index, word) for the non-empty wordlist lines from entry `start` on"""
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            index = 0
+            for line in f:
+                word = line.strip()
+                if not word:
+                    continue
+                if index >= start:
+                    yield index, word
+                index += 1
+
+    async def _spawn(self, subdomain, index=None):
+        """Resolve `subdomain` in the background once a concurrency slot is free
+
+        Names a complete zone enumeration does not contain are ruled out
+        without a query.
+        """
+        known = self.enumeration.contains(subdomain) if self.enumeration else None
+        if known is False:
+            self.ruled_out += 1
+            if index is not None:
+                self.progress.done(index)
+            return
+        self.seen.add(subdomain)
+        self.tested += 1
+        await self.controller.acquire()
+        task = asyncio.ensure_future(self._test_subdomain(subdomain, index, known))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _expand(self, recursion_words):
+        """Resolve candidates derived from found names until no new name turns up
+
+        Every found name is expanded once: its permutations, and the first
+        `recursion_words` wordlist entries under it while it is less than
+        `config.recursion_depth` levels below the target. Candidates are
+        generated lazily and the bloom filter drops the ones already tried,
+        so memory stays bounded by the in-flight lookups and the filter.
+        """
+        while True:
+            while self.frontier:
+                for candidate in self._candidates(self.frontier.popleft(), recursion_words):
+                    self.generated += 1
+                    if candidate not in self.seen:
+                        await self._spawn(candidate)
+            if not self.tasks:
+                return
+            # Lookups still in flight may find names that need expanding
+            await asyncio.wait(set(self.tasks), return_when=asyncio.FIRST_COMPLETED)
+
+    def _candidates(self, name, recursion_words):
+        """Lazily generate the candidates derived from the found `name`"""
+        relative = name[:-len(self.target) - 1]
+        if self.config.subdomain_permutations:
+            for permutation in permutations(relative):
+                yield f"{permutation}.{self.target}"
+        if relative.count('.') + 1 <= self.config.recursion_depth:
+            for word in recursion_words:
+                yield f"{word}.{name}"
+
+    async def _test_subdomain(self, subdomain, index=None, known=None):
+        """Test if subdomain exists
+
+        Under a wildcard level the candidate is skipped (policy 'skip') or
+        resolved and dropped when its answer matches the wildcard's
+        fingerprint; answers that differ are kept and flagged. Names `known`
+        to be in the zone (from the zone enumeration) are always resolved.
+        """
+        start = time.monotonic()
+        overloaded = False
         try:
-            socket.inet_aton(target)
-            return True
-        except socket.error:
-            return False
\ No newline at end of file
+            wildcard = await self.detector.covering(subdomain)
+            if wildcard and known:
+                wildcard = None  # A real name, whatever the wildcard answers
+            if wildcard and self.config.wildcard_policy == 'skip':
+                return
+            answer = await self.client.lookup(subdomain, confirm=self.confirm)
+            # NXDOMAIN is a normal answer; timeouts and SERVFAIL mean the resolver is struggling
+            overloaded = answer.status in ('timeout', 'servfail')
+            if wildcard and answer.found and wildcard.matches_answer(answer):
+                self.wildcard_filtered += 1
+            elif answer.found:
+                record = {"a": answer.addresses, "aaaa": answer.ipv6, "cname": answer.cnames}
+                if answer.delegation:
+                    record["ns"] = answer.delegation
+                if wildcard:
+                    record["wildcard"] = wildcard.zone
+                self._add(subdomain, record)
+                self.progress.finding(dict(record, name=subdomain))
+                self.context.emit('finding', module='subdomains', type='subdomain', name=subdomain,
+                                  ip=(answer.addresses + answer.ipv6 + [None])[0], **record)
+
+                if self.config.verbose:
+                    print(f"{Colors.GREEN}[+] Found: {self.found_subdomains[-1]}{Colors.RESET}")
+        except ValueError:
+            pass  # Word does not make a valid DNS name
+        finally:
+            if index is not None:
+                self.progress.done(index)
+            await self.controller.release(time.monotonic() - start, overloaded)
+
+    def _add(self, subdomain, record):
+        """Record a found subdomain and its 'name -> addresses' summary line"""
+        if subdomain in self.records:
+            return
+        self.records[subdomain] = record
+        self.frontier.append(subdomain)
+        target = ', '.join(record['a'] + record['aaaa']) or (record['cname'] or [None])[-1]
+        line = f"{subdomain} -> {target or 'delegated to ' + ', '.join(record.get('ns', []))}"
+        if record['cname'] and (record['a'] or record['aaaa']):
+            line += f" (via {record['cname'][-1]})"
+        if record.get('wildcard'):
+            line += f" [differs from *.{record['wildcard']}]"
+        self.found_subdomains.append(line)
+
+    def _restore(self, item):
+        """Re-add a finding from the checkpoint journal"""
+        self._add(item["name"], {key: value for key, value in item.items() if key != "name"})
@@ -2,6 +2,8 @@
 
 import whois
 import socket
+from trespax.core.context import TargetContext
+from trespax.core.resolverpool import resolver_pool
 from trespax.utils.colors import Colors
 
 
@@ -12,18 +14,24 @@ class WhoisModule:
         self.config = config
         self.logger = logger
     
-    def run(self):
+    def run(self, context=None):
         """Run WHOIS lookup"""
         try:
+            context = context or TargetContext(self.config)
             target = self.config.target
             
             # If target is an IP, get the domain first
             if self._is_ip(target):
                 try:
-                    target = socket.gethostbyaddr(target)[0]
+                    # PTR through the shared resolvers, so the answer is cached with its TTL
+                    context.limiter.acquire('dns', 'resolver', 'whois')
+                    resolver = resolver_pool(self.config).dnspython_resolver(self.config.timeout, self.config.dns_payload)
+                    target = resolver.resolve_address(target)[0].target.to_text().rstrip('.')
                 except:
                     return {"error": "Cannot perform WHOIS lookup on IP address without reverse DNS"}
             
+            # One budget for the WHOIS servers python-whois picks; 'whois' is not a host to resolve
+            context.limiter.acquire('tcp', 'whois', 'whois', lookup=False)
             domain_info = whois.whois(target)
             
             result = {}